@@ -1,44 +1,44 @@
 import { NextResponse } from 'next/server';
 
+/**
+ * GET /api/analytics/attendance-trend/[studentId]
+ * Weekly attendance rate and predicted grade, computed by the ML service
+ * from the incrementally maintained weekly buckets (app/lib/weeklyStats.ts).
+ * Pass studentId "class" for the class-wide trend.
+ */
 export async function GET(
   request: Request,
   { params }: { params: Promise<{ studentId: string }> }
 ) {
   try {
     const { studentId } = await params;
+    const { searchParams } = new URL(request.url);
+    const weeks = searchParams.get('weeks') || '8';
+    const flaskUrl = process.env.FLASK_ML_URL || 'http://127.0.0.1:5000';
 
-    // Mock data for now (in production, calculate from database)
-    const weeks = [
-      'Week 1', 'Week 2', 'Week 3', 'Week 4', 
-      'Week 5', 'Week 6', 'Week 7', 'Week 8'
-    ];
-    
-    // Simulate attendance degradation and grade correlation
-    const seed = parseInt(studentId); // Use student ID as seed for consistent data
-    
-    // Use a simple seeded random function for consistency
-    const seededRandom = (s: number, i: number) => {
-      const x = Math.sin(s * 9301 + i * 49297) * 49297;
-      return x - Math.floor(x);
-    };
+    const path = studentId === 'class'
+      ? '/attendance-trend/class'
+      : `/attendance-trend/student/${encodeURIComponent(studentId)}`;
 
-    const attendance_rate = weeks.map((_, i) => {
-      const trend = 95 - (i * 3) - (seed % 10); // Declining trend
-      const noise = seededRandom(seed, i) * 5 - 2.5;
-      return Math.max(60, Math.min(100, trend + noise));
-    });
-    
-    const predicted_grades = attendance_rate.map((att, i) => {
-      // Grades correlate with attendance
-      const baseGrade = 50 + (att * 0.5);
-      const noise = seededRandom(seed, i + 100) * 5 - 2.5;
-      return Math.max(40, Math.min(100, baseGrade + noise));
+    const response = await fetch(`${flaskUrl}${path}?weeks=${encodeURIComponent(weeks)}`, {
+      method: 'GET',
+      signal: AbortSignal.timeout(10000),
     });
 
+    const data = await response.json();
+
+    if (!response.ok) {
+      return NextResponse.json(
+        { error: data.error || 'Failed to fetch attendance trend' },
+        { status: response.status }
+      );
+    }
+
     return NextResponse.json({
-      weeks,
-      attendance_rate: attendance_rate.map(v => parseFloat(v.toFixed(1))),
-      predicted_grades: predicted_grades.map(v => parseFloat(v.toFixed(1)))
+      weeks: data.weeks,
+      week_start: data.week_start,
+      attendance_rate: data.attendance_rate,
+      predicted_grades: data.predicted_grades
     });
   } catch (error) {
     console.error('Attendance trend API error:', error);
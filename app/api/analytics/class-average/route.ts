@@ -3,20 +3,14 @@
  * ==================================
  * Addresses audit finding: "Class Average calculated client-side"
  * 
- * Provides server-side calculation of class statistics.
+ * Provides server-side calculation of class statistics. The aggregates are
+ * computed and cached by the ML service (GET /class-analytics), so this
+ * route only forwards one small precomputed payload.
  */
 
 import { NextResponse } from 'next/server';
-import { db } from '@/db';
-import { RowDataPacket } from 'mysql2';
 
-interface StatsRow extends RowDataPacket {
-  total_students: number;
-  class_average: number;
-  total_grades: number;
-}
-
-interface SubjectStatsRow extends RowDataPacket {
+interface SubjectStats {
   subject: string;
   average_score: number;
   student_count: number;
@@ -24,9 +18,18 @@ interface SubjectStatsRow extends RowDataPacket {
   lowest_score: number;
 }
 
-interface RiskStatsRow extends RowDataPacket {
-  risk_level: string;
-  count: number;
+interface ClassAnalytics {
+  overall: {
+    total_students: number;
+    class_average: number;
+    total_grades: number;
+    at_risk_count: number;
+  };
+  by_subject: SubjectStats[];
+  risk_distribution: { risk_level: string; count: number }[];
+  predicted_grade_histogram: { bin: string; count: number }[];
+  computed_at: string;
+  error?: string;
 }
 
 /**
@@ -35,62 +38,35 @@ interface RiskStatsRow extends RowDataPacket {
  */
 export async function GET(request: Request) {
   try {
-    const { searchParams } = new URL(request.url);
-    const groupBy = searchParams.get('groupBy'); // 'subject' or null
+    const flaskUrl = process.env.FLASK_ML_URL || 'http://127.0.0.1:5000';
 
-    // Get overall class statistics
-    const [overallStats] = await db.query<StatsRow[]>(`
-      SELECT 
-        COUNT(DISTINCT s.id) as total_students,
-        ROUND(AVG(g.score), 2) as class_average,
-        COUNT(g.id) as total_grades
-      FROM students s
-      LEFT JOIN grades g ON s.id = g.student_id
-    `);
-
-    // Get statistics grouped by subject
-    const [subjectStats] = await db.query<SubjectStatsRow[]>(`
-      SELECT 
-        subject,
-        ROUND(AVG(score), 2) as average_score,
-        COUNT(DISTINCT student_id) as student_count,
-        MAX(score) as highest_score,
-        MIN(score) as lowest_score
-      FROM grades
-      GROUP BY subject
-      ORDER BY subject
-    `);
+    const response = await fetch(`${flaskUrl}/class-analytics`, {
+      method: 'GET',
+      signal: AbortSignal.timeout(10000),
+    });
 
-    // Get risk level distribution (from latest predictions per student)
-    const [riskStats] = await db.query<RiskStatsRow[]>(`
-      SELECT 
-        p.risk_level,
-        COUNT(*) as count
-      FROM predictions p
-      INNER JOIN (
-        SELECT student_id, MAX(id) as max_id
-        FROM predictions
-        GROUP BY student_id
-      ) latest ON p.id = latest.max_id
-      GROUP BY p.risk_level
-    `);
+    const data: ClassAnalytics = await response.json();
 
-    // Calculate at-risk count
-    const atRiskCount = riskStats
-      .filter(r => r.risk_level === 'High' || r.risk_level === 'Medium')
-      .reduce((sum, r) => sum + r.count, 0);
+    if (!response.ok) {
+      return NextResponse.json(
+        { success: false, message: data.error || "Failed to fetch class statistics" },
+        { status: response.status }
+      );
+    }
 
     return NextResponse.json({
       success: true,
       statistics: {
         overall: {
-          totalStudents: overallStats[0]?.total_students || 0,
-          classAverage: overallStats[0]?.class_average || 0,
-          totalGrades: overallStats[0]?.total_grades || 0,
-          atRiskCount: atRiskCount
+          totalStudents: data.overall.total_students,
+          classAverage: data.overall.class_average,
+          totalGrades: data.overall.total_grades,
+          atRiskCount: data.overall.at_risk_count
         },
-        bySubject: subjectStats,
-        riskDistribution: riskStats
+        bySubject: data.by_subject,
+        riskDistribution: data.risk_distribution,
+        predictedGradeHistogram: data.predicted_grade_histogram,
+        computedAt: data.computed_at
       }
     });
 
@@ -9,6 +9,9 @@
 import { NextResponse } from 'next/server';
 import { db } from '@/db';
 import { RowDataPacket, ResultSetHeader } from 'mysql2';
+import { recordStudentChange } from '@/app/lib/changeLog';
+import { refreshStudentFeatures } from '@/app/lib/studentFeatures';
+import { correctGradeEvent } from '@/app/lib/weeklyStats';
 
 const DEFAULT_MAX_MARKS = 20;
 
@@ -20,6 +23,7 @@ interface GradeRow extends RowDataPacket {
   max_marks: number;
   grade: string;
   date: string;
+  created_at: Date;
 }
 
 /**
@@ -97,7 +101,7 @@ export async function PUT(
 
     // Check if grade exists
     const [existing] = await db.query<GradeRow[]>(
-      'SELECT id, max_marks FROM grades WHERE id = ?',
+      'SELECT id, student_id, score, max_marks, created_at FROM grades WHERE id = ?',
       [id]
     );
 
@@ -143,6 +147,16 @@ export async function PUT(
       `UPDATE grades SET ${updates.join(', ')} WHERE id = ?`,
       values
     );
+    if (numericScore !== undefined || numericMaxMarks !== undefined) {
+      await correctGradeEvent(
+        existing[0].student_id,
+        existing[0].created_at,
+        { score: existing[0].score, maxMarks: existing[0].max_marks },
+        { score: numericScore ?? existing[0].score, maxMarks: numericMaxMarks ?? existing[0].max_marks }
+      );
+    }
+    await recordStudentChange(existing[0].student_id, 'grades');
+    await refreshStudentFeatures(existing[0].student_id);
 
     // Fetch and return the updated grade
     const [updated] = await db.query<GradeRow[]>(
@@ -180,7 +194,7 @@ export async function DELETE(
 
     // Check if grade exists
     const [existing] = await db.query<GradeRow[]>(
-      'SELECT id, subject, student_id FROM grades WHERE id = ?',
+      'SELECT id, subject, student_id, score, max_marks, created_at FROM grades WHERE id = ?',
       [id]
     );
 
@@ -203,6 +217,14 @@ export async function DELETE(
         { status: 500 }
       );
     }
+    await correctGradeEvent(
+      existing[0].student_id,
+      existing[0].created_at,
+      { score: existing[0].score, maxMarks: existing[0].max_marks },
+      null
+    );
+    await recordStudentChange(existing[0].student_id, 'grades');
+    await refreshStudentFeatures(existing[0].student_id);
 
     return NextResponse.json({
       success: true,
@@ -1,5 +1,8 @@
 import { NextResponse } from 'next/server';
 import {db} from '@/db';
+import { recordStudentChange } from '@/app/lib/changeLog';
+import { refreshStudentFeatures } from '@/app/lib/studentFeatures';
+import { recordGradeEvent } from '@/app/lib/weeklyStats';
 
 const DEFAULT_MAX_MARKS = 20;
 
@@ -59,6 +62,9 @@ export async function POST(request: Request) {
       'INSERT INTO grades (student_id, subject, score, max_marks, grade) VALUES (?, ?, ?, ?, ?)',
       [studentId, subject, numericScore, maxMarks, letterGrade]
     );
+    await recordStudentChange(String(studentId), 'grades');
+    await refreshStudentFeatures(String(studentId));
+    await recordGradeEvent(String(studentId), numericScore, maxMarks);
 
     // You can check result.insertId to confirm the insert
     return NextResponse.json({ success: true, message: 'Grade added successfully!' }, { status: 201 });
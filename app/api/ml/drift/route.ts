@@ -0,0 +1,35 @@
+import { NextResponse } from 'next/server';
+
+/**
+ * GET /api/ml/drift
+ * Feature drift (PSI and KS per feature) of live prediction inputs against
+ * the training data, as tracked by the ML service.
+ */
+export async function GET() {
+  try {
+    const flaskUrl = process.env.FLASK_ML_URL || 'http://127.0.0.1:5000';
+
+    const response = await fetch(`${flaskUrl}/drift`, {
+      method: 'GET',
+      cache: 'no-store',
+      signal: AbortSignal.timeout(10000),
+    });
+
+    const data = await response.json();
+
+    if (!response.ok) {
+      return NextResponse.json(
+        { error: data.error || 'Failed to fetch drift statistics' },
+        { status: response.status }
+      );
+    }
+
+    return NextResponse.json(data, { status: 200 });
+  } catch (error) {
+    console.error('Drift API error:', error);
+    return NextResponse.json(
+      { error: 'Failed to connect to ML service' },
+      { status: 500 }
+    );
+  }
+}
@@ -0,0 +1,39 @@
+import { NextResponse } from 'next/server';
+
+/**
+ * GET /api/ml/feature-importance?model=
+ * Global feature importance precomputed at training time. Cheap to serve
+ * and cacheable, so charts can use it without triggering SHAP work.
+ */
+export async function GET(request: Request) {
+  try {
+    const flaskUrl = process.env.FLASK_ML_URL || 'http://127.0.0.1:5000';
+    const { searchParams } = new URL(request.url);
+    const model = searchParams.get('model') || 'linear_regression';
+
+    const response = await fetch(`${flaskUrl}/feature-importance?model=${encodeURIComponent(model)}`, {
+      method: 'GET',
+      next: { revalidate: 3600 },
+    });
+
+    const data = await response.json();
+
+    if (!response.ok) {
+      return NextResponse.json(
+        { error: data.error || 'Failed to fetch feature importance' },
+        { status: response.status }
+      );
+    }
+
+    return NextResponse.json(data, {
+      status: 200,
+      headers: { 'Cache-Control': 'public, max-age=3600' },
+    });
+  } catch (error) {
+    console.error('Feature importance API error:', error);
+    return NextResponse.json(
+      { error: 'Failed to connect to ML service' },
+      { status: 500 }
+    );
+  }
+}
@@ -0,0 +1,39 @@
+import { NextResponse } from 'next/server';
+
+/**
+ * POST /api/predictions/consensus
+ * Scores a student with every model in one ML service round trip and
+ * returns per-model results, the consensus and the model disagreement.
+ */
+export async function POST(request: Request) {
+  try {
+    const body = await request.json();
+    const flaskUrl = process.env.FLASK_ML_URL || 'http://127.0.0.1:5000';
+
+    const response = await fetch(`${flaskUrl}/predict-consensus`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify(body),
+      signal: AbortSignal.timeout(10000),
+    });
+
+    const data = await response.json();
+
+    if (!response.ok) {
+      return NextResponse.json(
+        { error: data.error || 'Consensus prediction failed' },
+        { status: response.status }
+      );
+    }
+
+    return NextResponse.json(data, { status: 200 });
+  } catch (error) {
+    console.error('Consensus prediction API error:', error);
+    return NextResponse.json(
+      { error: 'Consensus prediction request failed' },
+      { status: 500 }
+    );
+  }
+}
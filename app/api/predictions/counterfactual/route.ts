@@ -0,0 +1,39 @@
+import { NextResponse } from 'next/server';
+
+/**
+ * POST /api/predictions/counterfactual
+ * Smallest changes to study time, absences and G2 that bring a student to
+ * a target risk level, searched by the ML service in one request.
+ */
+export async function POST(request: Request) {
+  try {
+    const body = await request.json();
+    const flaskUrl = process.env.FLASK_ML_URL || 'http://127.0.0.1:5000';
+
+    const response = await fetch(`${flaskUrl}/counterfactual`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify(body),
+      signal: AbortSignal.timeout(10000),
+    });
+
+    const data = await response.json();
+
+    if (!response.ok) {
+      return NextResponse.json(
+        { error: data.error || 'Counterfactual search failed' },
+        { status: response.status }
+      );
+    }
+
+    return NextResponse.json(data, { status: 200 });
+  } catch (error) {
+    console.error('Counterfactual API error:', error);
+    return NextResponse.json(
+      { error: 'Counterfactual request failed' },
+      { status: 500 }
+    );
+  }
+}
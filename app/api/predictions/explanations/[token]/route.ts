@@ -0,0 +1,38 @@
+import { NextResponse } from 'next/server';
+
+/**
+ * GET /api/predictions/explanations/[token]
+ * Fetch an explanation that was still running when its prediction was
+ * returned. Responds 202 while pending, 200 with the explanation when done.
+ */
+export async function GET(
+  request: Request,
+  { params }: { params: Promise<{ token: string }> }
+) {
+  try {
+    const { token } = await params;
+    const flaskUrl = process.env.FLASK_ML_URL || 'http://127.0.0.1:5000';
+
+    const response = await fetch(`${flaskUrl}/explanations/${encodeURIComponent(token)}`, {
+      method: 'GET',
+      signal: AbortSignal.timeout(10000),
+    });
+
+    const data = await response.json();
+
+    if (!response.ok) {
+      return NextResponse.json(
+        { error: data.error || 'Failed to fetch explanation' },
+        { status: response.status }
+      );
+    }
+
+    return NextResponse.json(data, { status: response.status });
+  } catch (error) {
+    console.error('Explanation API error:', error);
+    return NextResponse.json(
+      { error: 'Failed to connect to ML service' },
+      { status: 500 }
+    );
+  }
+}
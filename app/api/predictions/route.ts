@@ -8,63 +8,32 @@ const FLASK_BASE_URL = process.env.FLASK_ML_URL || 'http://127.0.0.1:5000';
 const SECRET_KEY = process.env.JWT_SECRET_KEY || "my-super-secret-key-for-development";
 
 // GET: Fetch predictions for all students (for teacher dashboard)
-// filepath: c:\Users\sanaf\student_pred\student_analysis\app\api\predictions\route.ts
-// ...existing code...
-// ...existing imports...
-
+// Reads the latest stored ML prediction per student. The rows are written in
+// bulk by the ML service's roster scoring job (ml-service/score_roster.py,
+// or POST /score-roster), so this is a single indexed read.
 export async function GET() {
     try {
-        const [students] = await pool.query('SELECT * FROM students');
-        const [grades] = await pool.query('SELECT * FROM grades');
-
-        const studentList = students as any[];
-        const gradeList = grades as any[];
-
-        console.log('Students:', studentList.map(s => ({ id: s.id, name: s.name })));
-        console.log('Grades:', gradeList.map(g => ({ student_id: g.student_id, score: g.score })));
-
-        const predictions = studentList.map(student => {
-            // Match using string comparison to handle UUID/int mismatches
-            const studentGrades = gradeList.filter(g => String(g.student_id) === String(student.id));
-            
-            console.log(`Student ${student.name} (${student.id}) has ${studentGrades.length} grades`);
-
-            const avgScore = studentGrades.length > 0
-                ? studentGrades.reduce((sum, g) => sum + Number(g.score), 0) / studentGrades.length
-                : 0;
-
-            console.log(`Student ${student.name} avgScore: ${avgScore}`);
-
-            let riskScore = 0;
-
-            // Grade-based risk (Primary Factor - weighted heavily)
-            if (studentGrades.length === 0) riskScore += 20; // No grades yet
-            else if (avgScore >= 80) riskScore += 0;  // A/B student - no risk from grades
-            else if (avgScore >= 70) riskScore += 10; // C student
-            else if (avgScore >= 60) riskScore += 25; // D student
-            else riskScore += 40; // F student
-
-            // Secondary factors (reduced weight)
-            if (student.study_hours < 5) riskScore += 10;
-            if (student.failures > 0) riskScore += 10;
-            if (student.absences > 10) riskScore += 10;
-
-            let riskLevel: 'Low' | 'Medium' | 'High';
-            if (riskScore >= 40) riskLevel = 'High';
-            else if (riskScore >= 20) riskLevel = 'Medium';
-            else riskLevel = 'Low';
-
-            return {
-                studentId: student.id,
-                riskLevel: riskLevel,
-                probability: Math.min(riskScore / 100, 1)
-            };
-        });
+        const [rows] = await pool.query(`
+            SELECT p.student_id, p.predicted_grade, p.risk_level
+            FROM predictions p
+            INNER JOIN (
+                SELECT student_id, MAX(id) AS max_id
+                FROM predictions
+                GROUP BY student_id
+            ) latest ON p.id = latest.max_id
+        `);
+
+        const predictions = (rows as any[]).map(row => ({
+            studentId: row.student_id,
+            riskLevel: row.risk_level as 'Low' | 'Medium' | 'High',
+            // Share of marks the student is predicted to miss (0-1, higher is riskier)
+            probability: Math.min(Math.max((100 - Number(row.predicted_grade)) / 100, 0), 1)
+        }));
 
         return NextResponse.json(predictions);
     } catch (error) {
         console.error('Prediction GET error:', error);
-        return NextResponse.json({ error: 'Failed to generate predictions' }, { status: 500 });
+        return NextResponse.json({ error: 'Failed to fetch predictions' }, { status: 500 });
     }
 }
 
@@ -96,27 +65,46 @@ export async function POST(request: Request) {
         }
 
         const body = await request.json();
-        const { studentData, max_marks, model } = body;
+        const { studentData, max_marks, model, latency_budget_ms, quality, explanation_deadline_ms, explain } = body;
 
         // Validate that the necessary data is present
         if (!studentData || typeof max_marks === 'undefined') {
             return NextResponse.json({ success: false, message: 'Bad Request: Missing studentData or max_marks' }, { status: 400 });
         }
 
-        // Determine which Flask endpoint to use based on model selection
-        const endpoint = model ? '/predict-with-model' : '/predict';
+        // Determine which Flask endpoint to use based on model selection;
+        // a latency budget or quality tier lets the ML service pick the model
+        const routed = latency_budget_ms !== undefined || quality !== undefined;
+        const endpoint = model || routed ? '/predict-with-model' : '/predict';
 
         // Forward the request to the Flask API
         const flaskResponse = await fetch(`${FLASK_BASE_URL}${endpoint}`, {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
             // FIX: Renamed 'studentData' to 'student_data' to match the Python script's expectation.
-            body: JSON.stringify({ student_data: studentData, max_marks, ...(model && { model }) }),
+            body: JSON.stringify({
+                student_data: studentData,
+                max_marks,
+                ...(model && { model }),
+                ...(latency_budget_ms !== undefined && { latency_budget_ms }),
+                ...(quality !== undefined && { quality }),
+                ...(explanation_deadline_ms !== undefined && { explanation_deadline_ms }),
+                // explain: false skips the SHAP explanation for grade/risk-only callers
+                ...(explain !== undefined && { explain }),
+            }),
             signal: AbortSignal.timeout(10000), // 10-second timeout for the ML service
         });
 
         const predictionData = await flaskResponse.json();
 
+        // ML service is shedding load: pass the retry hint through
+        if (flaskResponse.status === 503) {
+            return NextResponse.json(
+                { success: false, message: predictionData.error || 'Prediction service busy, please retry' },
+                { status: 503, headers: { 'Retry-After': flaskResponse.headers.get('Retry-After') || '1' } }
+            );
+        }
+
         if (!flaskResponse.ok) {
             console.error('Error from Flask API:', predictionData.message || 'Unknown error');
             throw new Error(predictionData.message || 'Error from prediction service');
@@ -129,7 +117,13 @@ export async function POST(request: Request) {
                 predicted_grade: predictionData.predicted_grade,
                 risk_level: predictionData.risk_level,
                 ...(predictionData.explanation && { explanation: predictionData.explanation }),
+                // Explanation still running: poll /api/predictions/explanations/[token]
+                ...(predictionData.explanation_token && { explanation_token: predictionData.explanation_token }),
                 ...(predictionData.model_used && { model_used: predictionData.model_used }),
+                // Conformal interval and risk-bucket probability (confidence is 0-100)
+                ...(predictionData.interval && { interval: predictionData.interval }),
+                ...(predictionData.risk_probabilities && { risk_probabilities: predictionData.risk_probabilities }),
+                ...(predictionData.confidence !== undefined && { confidence: predictionData.confidence }),
             }
         });
 
@@ -0,0 +1,44 @@
+import { NextResponse } from 'next/server';
+
+/**
+ * GET /api/reports/jobs/[jobId]/download
+ * The finished PDF of a report job
+ */
+export async function GET(
+  request: Request,
+  { params }: { params: Promise<{ jobId: string }> }
+) {
+  try {
+    const { jobId } = await params;
+    const flaskUrl = process.env.FLASK_ML_URL || 'http://localhost:5000';
+
+    const response = await fetch(`${flaskUrl}/reports/${encodeURIComponent(jobId)}/download`, {
+      method: 'GET',
+      signal: AbortSignal.timeout(30000),
+    });
+
+    if (!response.ok) {
+      const error = await response.json().catch(() => ({ error: 'Report download failed' }));
+      return NextResponse.json(
+        { error: error.error || 'Report download failed' },
+        { status: response.status }
+      );
+    }
+
+    const pdfBlob = await response.blob();
+
+    return new NextResponse(pdfBlob, {
+      status: 200,
+      headers: {
+        'Content-Type': 'application/pdf',
+        'Content-Disposition': response.headers.get('Content-Disposition') || 'attachment; filename=report.pdf',
+      },
+    });
+  } catch (error) {
+    console.error('Report download API error:', error);
+    return NextResponse.json(
+      { error: 'Failed to download report' },
+      { status: 500 }
+    );
+  }
+}
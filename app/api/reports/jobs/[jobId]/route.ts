@@ -0,0 +1,37 @@
+import { NextResponse } from 'next/server';
+
+/**
+ * GET /api/reports/jobs/[jobId]
+ * Status and progress of a queued report
+ */
+export async function GET(
+  request: Request,
+  { params }: { params: Promise<{ jobId: string }> }
+) {
+  try {
+    const { jobId } = await params;
+    const flaskUrl = process.env.FLASK_ML_URL || 'http://localhost:5000';
+
+    const response = await fetch(`${flaskUrl}/reports/${encodeURIComponent(jobId)}`, {
+      method: 'GET',
+      signal: AbortSignal.timeout(10000),
+    });
+
+    const data = await response.json();
+
+    if (!response.ok) {
+      return NextResponse.json(
+        { error: data.error || 'Failed to fetch report status' },
+        { status: response.status }
+      );
+    }
+
+    return NextResponse.json(data, { status: 200 });
+  } catch (error) {
+    console.error('Report status API error:', error);
+    return NextResponse.json(
+      { error: 'Failed to connect to ML service' },
+      { status: 500 }
+    );
+  }
+}
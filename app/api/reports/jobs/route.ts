@@ -0,0 +1,42 @@
+import { NextResponse } from 'next/server';
+
+/**
+ * POST /api/reports/jobs
+ * Queue a student PDF report. Returns the job immediately; poll
+ * /api/reports/jobs/[jobId] and download from .../download when done.
+ */
+export async function POST(request: Request) {
+  try {
+    const { studentId } = await request.json();
+    const flaskUrl = process.env.FLASK_ML_URL || 'http://localhost:5000';
+
+    if (!studentId) {
+      return NextResponse.json({ error: 'Missing studentId' }, { status: 400 });
+    }
+
+    const response = await fetch(`${flaskUrl}/reports`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ student_id: studentId }),
+      signal: AbortSignal.timeout(10000),
+    });
+
+    const data = await response.json();
+
+    if (!response.ok) {
+      const retryAfter = response.headers.get('Retry-After');
+      return NextResponse.json(
+        { error: data.error || 'Failed to queue report' },
+        { status: response.status, headers: retryAfter ? { 'Retry-After': retryAfter } : undefined }
+      );
+    }
+
+    return NextResponse.json(data, { status: response.status });
+  } catch (error) {
+    console.error('Report job API error:', error);
+    return NextResponse.json(
+      { error: 'Failed to connect to ML service' },
+      { status: 500 }
+    );
+  }
+}
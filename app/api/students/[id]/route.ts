@@ -10,6 +10,9 @@
 import { NextResponse } from 'next/server';
 import { db } from '@/db';
 import { RowDataPacket, ResultSetHeader } from 'mysql2';
+import { recordStudentChange } from '@/app/lib/changeLog';
+import { refreshStudentFeatures } from '@/app/lib/studentFeatures';
+import { recordAttendanceEvent } from '@/app/lib/weeklyStats';
 
 interface StudentRow extends RowDataPacket {
   id: string;
@@ -73,7 +76,7 @@ export async function PUT(
 
     // Check if student exists
     const [existing] = await db.query<StudentRow[]>(
-      'SELECT id FROM students WHERE id = ?',
+      'SELECT id, absences FROM students WHERE id = ?',
       [id]
     );
 
@@ -122,6 +125,11 @@ export async function PUT(
       `UPDATE students SET ${updates.join(', ')} WHERE id = ?`,
       values
     );
+    await recordStudentChange(id, 'students');
+    await refreshStudentFeatures(id);
+    if (absences !== undefined) {
+      await recordAttendanceEvent(id, Number(absences) - Number(existing[0].absences ?? 0));
+    }
 
     // Fetch and return the updated student
     const [updated] = await db.query<StudentRow[]>(
@@ -168,6 +176,11 @@ export async function DELETE(
       );
     }
 
+    // Log the change first so the next --changed-only pass drops the student
+    // from the cohort index even if the process stops right after the delete;
+    // a spurious entry for a failed delete only costs one extra re-score
+    await recordStudentChange(id, 'students');
+
     // Delete the student (grades and predictions cascade automatically via FK)
     const [result] = await db.query<ResultSetHeader>(
       'DELETE FROM students WHERE id = ?',
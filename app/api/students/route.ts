@@ -2,6 +2,8 @@ import { NextResponse } from 'next/server';
 // Use a named import to match your db setup
 import { db } from '@/db'; 
 import { v4 as uuidv4 } from 'uuid'; // For generating unique IDs
+import { recordStudentChange } from '@/app/lib/changeLog';
+import { refreshStudentFeatures } from '@/app/lib/studentFeatures';
 
 /**
  * Handles GET requests to fetch all students.
@@ -37,6 +39,8 @@ export async function POST(request: Request) {
       'INSERT INTO students (id, name, email, age, study_hours, failures, absences) VALUES (?, ?, ?, ?, ?, ?, ?)',
       [newStudentId, name, email, age, study_hours, failures, absences]
     );
+    await recordStudentChange(newStudentId, 'students');
+    await refreshStudentFeatures(newStudentId);
 
     return NextResponse.json({ success: true, message: 'Student added successfully!', studentId: newStudentId }, { status: 201 });
   } catch (error) {
@@ -3,6 +3,19 @@
 import { useState, useEffect, useCallback } from 'react';
 import { debounce } from 'lodash';
 
+interface Counterfactual {
+  changes: Record<string, { from: number; to: number }>;
+  predicted_grade: string;
+  risk_level: string;
+  cost: number;
+}
+
+const FEATURE_LABELS: Record<string, string> = {
+  studytime: 'study time',
+  absences: 'absences',
+  G2: 'second period grade',
+};
+
 interface WhatIfSimulatorProps {
   studentData: {
     id: number;
@@ -29,12 +42,15 @@ export default function WhatIfSimulator({
   const [simulatedPrediction, setSimulatedPrediction] = useState<number | null>(null);
   const [isSimulating, setIsSimulating] = useState(false);
   const [improvement, setImprovement] = useState(0);
+  const [counterfactuals, setCounterfactuals] = useState<Counterfactual[] | null>(null);
+  const [isSearching, setIsSearching] = useState(false);
 
   // Reset sliders when student changes
   useEffect(() => {
     setSimulatedStudytime(studentData.studytime);
     setSimulatedAbsences(studentData.absences);
     setSimulatedPrediction(null);
+    setCounterfactuals(null);
   }, [studentData.id, studentData.studytime, studentData.absences]);
 
   // Debounced simulation fetch
@@ -78,6 +94,49 @@ export default function WhatIfSimulator({
     [studentData, currentPrediction, selectedModel]
   );
 
+  // One search for the smallest changes that reach Low risk, instead of
+  // hunting for them slider by slider
+  const findCounterfactuals = async () => {
+    setIsSearching(true);
+    try {
+      const response = await fetch('/api/predictions/counterfactual', {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({
+          student_data: {
+            age: studentData.age,
+            studytime: studentData.studytime,
+            failures: studentData.failures,
+            absences: studentData.absences,
+            G1: studentData.G1,
+            G2: studentData.G2
+          },
+          target_risk: 'Low',
+          max_marks: 100,
+          model: selectedModel,
+          limit: 3
+        })
+      });
+
+      const data = await response.json();
+
+      if (data.success) {
+        setCounterfactuals(data.counterfactuals);
+      }
+    } catch (error) {
+      console.error('Counterfactual search error:', error);
+    } finally {
+      setIsSearching(false);
+    }
+  };
+
+  const applyCounterfactual = (counterfactual: Counterfactual) => {
+    if (counterfactual.changes.studytime) setSimulatedStudytime(counterfactual.changes.studytime.to);
+    if (counterfactual.changes.absences) setSimulatedAbsences(counterfactual.changes.absences.to);
+  };
+
   // Trigger simulation when sliders change
   useEffect(() => {
     if (counselingMode) {
@@ -251,6 +310,38 @@ export default function WhatIfSimulator({
             </div>
           )}
 
+          {/* Smallest changes to reach Low risk */}
+          <div className="mt-4">
+            <button
+              onClick={findCounterfactuals}
+              disabled={isSearching}
+              className="w-full py-2 px-4 bg-purple-600 text-white text-sm font-medium rounded-lg hover:bg-purple-700 disabled:opacity-50"
+            >
+              {isSearching ? 'Searching...' : 'Find smallest changes to reach Low risk'}
+            </button>
+
+            {counterfactuals && counterfactuals.length === 0 && (
+              <p className="mt-2 text-sm text-gray-600">
+                No combination of study time, absences and second period grade reaches Low risk.
+              </p>
+            )}
+
+            {counterfactuals && counterfactuals.map((counterfactual, index) => (
+              <button
+                key={index}
+                onClick={() => applyCounterfactual(counterfactual)}
+                className="mt-2 w-full text-left p-3 bg-white rounded-lg border border-purple-200 hover:border-purple-400 text-sm"
+              >
+                {Object.entries(counterfactual.changes)
+                  .map(([feature, change]) => `${FEATURE_LABELS[feature] || feature} ${change.from} → ${change.to}`)
+                  .join(', ')}
+                <span className="float-right font-semibold text-green-700">
+                  {parseFloat(counterfactual.predicted_grade).toFixed(1)}%
+                </span>
+              </button>
+            ))}
+          </div>
+
           {simulatedPrediction && improvement < -5 && (
             <div className="mt-4 p-4 bg-red-50 rounded-lg border border-red-200">
               <p className="text-sm text-red-800">
@@ -0,0 +1,26 @@
+/**
+ * Student Change Log
+ * ==================
+ * Records which students changed so the ML service can re-score only
+ * those students (see ml-service/score_roster.py --changed-only).
+ */
+
+import { db } from '@/db';
+
+export type ChangeSource = 'grades' | 'students';
+
+/**
+ * Append a change log entry for a student.
+ * Failures are logged and swallowed: a missed entry only delays re-scoring
+ * until the next full roster pass, so it must not fail the user's write.
+ */
+export async function recordStudentChange(studentId: string, source: ChangeSource): Promise<void> {
+  try {
+    await db.query(
+      'INSERT INTO student_changes (student_id, source) VALUES (?, ?)',
+      [studentId, source]
+    );
+  } catch (error) {
+    console.error('Error recording student change:', error);
+  }
+}
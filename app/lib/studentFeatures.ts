@@ -0,0 +1,52 @@
+/**
+ * Materialized Student Features
+ * =============================
+ * Keeps each student's ready-to-score model input in student_features up
+ * to date, so the ML service reads one row instead of re-deriving G1/G2
+ * from the grade history (see ml-service/feature_store.py, whose
+ * REFRESH_FEATURES this mirrors; defaults match ml-service/scoring.py and
+ * are checked against it by ml-service/tests/test_feature_store.py).
+ */
+
+import { db } from '@/db';
+
+// score / max_marks * 20 of the student's n-th most recent grade
+const nthGrade = (offset: number) => `(
+  SELECT g.score / COALESCE(NULLIF(g.max_marks, 0), 20) * 20
+  FROM grades g
+  WHERE g.student_id = s.id
+  ORDER BY g.date DESC, g.id DESC
+  LIMIT 1 OFFSET ${offset}
+)`;
+
+const REFRESH_FEATURES = `
+  INSERT INTO student_features (student_id, age, failures, absences, studytime, g1, g2)
+  SELECT s.id,
+    COALESCE(NULLIF(s.age, 0), 16),
+    COALESCE(s.failures, 0),
+    COALESCE(s.absences, 0),
+    COALESCE(NULLIF(s.study_hours, 0), 2),
+    COALESCE(${nthGrade(0)}, 10),
+    COALESCE(${nthGrade(1)}, 10)
+  FROM students s
+  WHERE s.id = ?
+  ON DUPLICATE KEY UPDATE
+    age = VALUES(age),
+    failures = VALUES(failures),
+    absences = VALUES(absences),
+    studytime = VALUES(studytime),
+    g1 = VALUES(g1),
+    g2 = VALUES(g2)`;
+
+/**
+ * Recompute a student's feature row after their grades or profile changed.
+ * Failures are logged and swallowed: the change log entry still makes the
+ * next score_roster.py --changed-only pass refresh the row.
+ */
+export async function refreshStudentFeatures(studentId: string): Promise<void> {
+  try {
+    await db.query(REFRESH_FEATURES, [studentId]);
+  } catch (error) {
+    console.error('Error refreshing student features:', error);
+  }
+}
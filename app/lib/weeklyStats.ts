@@ -0,0 +1,131 @@
+/**
+ * Weekly Attendance/Grade Buckets
+ * ===============================
+ * Incrementally maintained per-student and per-class weekly aggregates.
+ * Each event touches exactly one bucket per table, so the ML service can
+ * build attendance and predicted-grade trends without rescanning history
+ * (see ml-service/attendance_trends.py).
+ */
+
+import { db } from '@/db';
+
+// Monday of the current week
+const CURRENT_WEEK = 'DATE_SUB(CURDATE(), INTERVAL WEEKDAY(CURDATE()) DAY)';
+
+// Monday of the week a grade was entered in (bind its created_at twice).
+// Grades are bucketed by entry week, not by their date column.
+const ENTRY_WEEK = 'DATE_SUB(DATE(?), INTERVAL WEEKDAY(?) DAY)';
+
+// A grade's score and max marks, as stored in the grades table
+export interface GradeValue {
+  score: number;
+  maxMarks: number;
+}
+
+/**
+ * A score on the 0-20 scale the models use. A zero or missing max_marks
+ * counts as 20, as in the feature SQL (app/lib/studentFeatures.ts).
+ */
+function toScale20(score: number, maxMarks: number): number {
+  return (Number(score) / (Number(maxMarks) || 20)) * 20;
+}
+
+// The student's grades entered in the bucket's week, newest first
+const BUCKET_GRADES = `FROM grades g
+  WHERE g.student_id = w.student_id
+    AND g.created_at >= w.week_start AND g.created_at < w.week_start + INTERVAL 7 DAY`;
+const BUCKET_GRADE_20 = 'g.score / COALESCE(NULLIF(g.max_marks, 0), 20) * 20';
+
+/**
+ * Record a new grade (on the 0-20 scale the models use) in this week's buckets.
+ * MySQL applies the assignments left to right, so prev_grade receives the
+ * old last_grade.
+ */
+export async function recordGradeEvent(studentId: string, score: number, maxMarks: number): Promise<void> {
+  const grade20 = toScale20(score, maxMarks);
+  try {
+    await db.query(
+      `INSERT INTO student_weekly_stats (student_id, week_start, grade_count, grade_sum, last_grade)
+       VALUES (?, ${CURRENT_WEEK}, 1, ?, ?)
+       ON DUPLICATE KEY UPDATE
+         prev_grade = last_grade,
+         last_grade = VALUES(last_grade),
+         grade_count = grade_count + 1,
+         grade_sum = grade_sum + VALUES(grade_sum)`,
+      [studentId, grade20, grade20]
+    );
+    await db.query(
+      `INSERT INTO class_weekly_stats (week_start, grade_count, grade_sum)
+       VALUES (${CURRENT_WEEK}, 1, ?)
+       ON DUPLICATE KEY UPDATE
+         grade_count = grade_count + 1,
+         grade_sum = grade_sum + VALUES(grade_sum)`,
+      [grade20]
+    );
+  } catch (error) {
+    console.error('Error recording grade event:', error);
+  }
+}
+
+/**
+ * Correct the buckets after an existing grade was edited (after set) or
+ * deleted (after null). Call it once the grades table has been changed,
+ * with the grade's created_at and its values before the change.
+ *
+ * The class bucket of the entry week gets the count/sum delta. The
+ * student's bucket for that week is re-derived from the grades still in
+ * it, because last_grade and prev_grade depend on the order of entry and
+ * cannot be corrected by a delta.
+ */
+export async function correctGradeEvent(
+  studentId: string,
+  createdAt: Date | string,
+  before: GradeValue,
+  after: GradeValue | null
+): Promise<void> {
+  const countDelta = after ? 0 : -1;
+  const sumDelta = (after ? toScale20(after.score, after.maxMarks) : 0) - toScale20(before.score, before.maxMarks);
+  try {
+    await db.query(
+      `UPDATE student_weekly_stats w SET
+         grade_count = (SELECT COUNT(*) ${BUCKET_GRADES}),
+         grade_sum = (SELECT COALESCE(SUM(${BUCKET_GRADE_20}), 0) ${BUCKET_GRADES}),
+         last_grade = (SELECT ${BUCKET_GRADE_20} ${BUCKET_GRADES} ORDER BY g.created_at DESC, g.id DESC LIMIT 1),
+         prev_grade = (SELECT ${BUCKET_GRADE_20} ${BUCKET_GRADES} ORDER BY g.created_at DESC, g.id DESC LIMIT 1 OFFSET 1)
+       WHERE w.student_id = ? AND w.week_start = ${ENTRY_WEEK}`,
+      [studentId, createdAt, createdAt]
+    );
+    await db.query(
+      `UPDATE class_weekly_stats
+       SET grade_count = GREATEST(grade_count + ?, 0), grade_sum = grade_sum + ?
+       WHERE week_start = ${ENTRY_WEEK}`,
+      [countDelta, sumDelta, createdAt, createdAt]
+    );
+  } catch (error) {
+    console.error('Error correcting grade event:', error);
+  }
+}
+
+/**
+ * Record a change in a student's absence count in this week's buckets.
+ * Negative deltas (corrections) are applied as-is.
+ */
+export async function recordAttendanceEvent(studentId: string, absencesDelta: number): Promise<void> {
+  if (!absencesDelta) return;
+  try {
+    await db.query(
+      `INSERT INTO student_weekly_stats (student_id, week_start, absences)
+       VALUES (?, ${CURRENT_WEEK}, ?)
+       ON DUPLICATE KEY UPDATE absences = absences + VALUES(absences)`,
+      [studentId, absencesDelta]
+    );
+    await db.query(
+      `INSERT INTO class_weekly_stats (week_start, absences)
+       VALUES (${CURRENT_WEEK}, ?)
+       ON DUPLICATE KEY UPDATE absences = absences + VALUES(absences)`,
+      [absencesDelta]
+    );
+  } catch (error) {
+    console.error('Error recording attendance event:', error);
+  }
+}
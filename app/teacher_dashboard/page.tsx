@@ -45,6 +45,7 @@ const TeacherDashboard = () => {
   const [students, setStudents] = useState<Student[]>([]);
   const [grades, setGrades] = useState<Grade[]>([]);
   const [predictions, setPredictions] = useState<Prediction[]>([]);
+  const [classStats, setClassStats] = useState<{ classAverage: number } | null>(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState("");
   const [activeTab, setActiveTab] = useState('students');
@@ -62,8 +63,9 @@ const TeacherDashboard = () => {
   const [deleteModal, setDeleteModal] = useState<DeleteModal>({ open: false, type: 'student', id: '', name: '' });
 
   // --- Calculate Stats Safely ---
+  // Prefer the server-side aggregate; fall back to the loaded grades.
   // Using Number() ensures the average calculates even if DB returns strings
-  const classAverage = grades.length > 0 
+  const classAverage = classStats ? Number(classStats.classAverage) : grades.length > 0 
     ? grades.reduce((acc, g) => acc + Number(g.score), 0) / grades.length 
     : 0;
 
@@ -82,10 +84,11 @@ const TeacherDashboard = () => {
       const authHeaders = { 'Authorization': `Bearer ${token}` };
 
       // Unified fetching logic using Promise.all
-      const [studentsRes, gradesRes, predictionsRes] = await Promise.all([
+      const [studentsRes, gradesRes, predictionsRes, statsRes] = await Promise.all([
         fetch('/api/students', { headers: authHeaders }),
         fetch('/api/grades', { headers: authHeaders }),
-        fetch('/api/predictions', { headers: authHeaders }) // Using the new GET endpoint
+        fetch('/api/predictions', { headers: authHeaders }), // Using the new GET endpoint
+        fetch('/api/analytics/class-average', { headers: authHeaders })
       ]);
 
       if (studentsRes.ok) {
@@ -102,6 +105,11 @@ const TeacherDashboard = () => {
         const data = await predictionsRes.json();
         setPredictions(data);
       }
+
+      if (statsRes.ok) {
+        const data = await statsRes.json();
+        setClassStats(data.statistics?.overall ?? null);
+      }
     } catch (err) {
       console.error("Error fetching dashboard data:", err);
       setError("Failed to sync dashboard data.");
@@ -248,12 +256,35 @@ const TeacherDashboard = () => {
     try {
       setLoading(true);
 
-      const response = await fetch(`/api/reports/student/${studentId}`, {
-        method: 'GET',
-        headers: {
-          'Authorization': `Bearer ${localStorage.getItem('accessToken')}`
-        }
+      const headers = { 'Authorization': `Bearer ${localStorage.getItem('accessToken')}` };
+
+      // Queue the report, then poll until the background worker finishes it
+      const submitResponse = await fetch('/api/reports/jobs', {
+        method: 'POST',
+        headers: { ...headers, 'Content-Type': 'application/json' },
+        body: JSON.stringify({ studentId })
       });
+      const job = await submitResponse.json().catch(() => ({ error: 'Unknown error' }));
+      if (!submitResponse.ok) {
+        console.error('Report generation error:', job);
+        throw new Error(job.error || 'Failed to generate report');
+      }
+
+      let status = job.status;
+      for (let attempt = 0; attempt < 120 && status !== 'done'; attempt++) {
+        await new Promise(resolve => setTimeout(resolve, 1000));
+        const statusResponse = await fetch(`/api/reports/jobs/${job.job_id}`, { headers });
+        const current = await statusResponse.json().catch(() => ({ error: 'Unknown error' }));
+        if (!statusResponse.ok || current.status === 'failed') {
+          throw new Error(current.error || 'Failed to generate report');
+        }
+        status = current.status;
+      }
+      if (status !== 'done') {
+        throw new Error('Report generation timed out. Please try again.');
+      }
+
+      const response = await fetch(`/api/reports/jobs/${job.job_id}/download`, { headers });
 
       if (!response.ok) {
         const errorData = await response.json().catch(() => ({ error: 'Unknown error' }));
@@ -64,6 +64,7 @@ const mockFactors = [
 export default function TestComponentsPage() {
   const [selectedModel, setSelectedModel] = useState('linear_regression');
   const [attendanceData, setAttendanceData] = useState<{ weeks: string[]; attendance_rate: number[]; predicted_grades: number[] } | null>(null);
+  const [globalFactors, setGlobalFactors] = useState<typeof mockFactors>([]);
 
   useEffect(() => {
     fetch('/api/analytics/attendance-trend/1')
@@ -72,6 +73,13 @@ export default function TestComponentsPage() {
       .catch(err => console.error('Failed to fetch attendance data:', err));
   }, []);
 
+  useEffect(() => {
+    fetch(`/api/ml/feature-importance?model=${selectedModel}`)
+      .then(res => res.json())
+      .then(data => setGlobalFactors(data.factors || []))
+      .catch(err => console.error('Failed to fetch feature importance:', err));
+  }, [selectedModel]);
+
   return (
     <div className="min-h-screen bg-gray-100 p-8">
       <div className="max-w-6xl mx-auto space-y-8">
@@ -94,6 +102,9 @@ export default function TestComponentsPage() {
         <section>
           <h2 className="text-xl font-semibold mb-4">2. Feature Importance Chart (Mock Data)</h2>
           <FeatureImportanceChart factors={mockFactors} />
+          <div className="mt-4">
+            <FeatureImportanceChart factors={globalFactors} title="Global Feature Importance" />
+          </div>
         </section>
 
         {/* What-If Simulator */}
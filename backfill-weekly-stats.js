@@ -0,0 +1,116 @@
+/**
+ * Weekly Stats Backfill
+ * =====================
+ * One-off rebuild of the grade fields of student_weekly_stats and
+ * class_weekly_stats from the grades table. Run it once after deploying
+ * the grade edit/delete corrections, to repair buckets left stale by grades
+ * edited or deleted before then.
+ *
+ * Usage: npm run backfill:weekly-stats
+ *
+ * Grades are bucketed by the Monday of the week they were entered in
+ * (created_at), as app/lib/weeklyStats.ts does. Absences are left alone:
+ * the grades table holds no attendance history to rebuild them from.
+ */
+
+const mysql = require('mysql2/promise');
+require('dotenv').config({ path: '.env.local' });
+
+const dbConfig = {
+    host: process.env.DB_HOST || 'localhost',
+    user: process.env.DB_USER || 'root',
+    password: process.env.DB_PASSWORD || '',
+    database: process.env.DB_NAME || 'student_analysis',
+};
+
+const colors = {
+    reset: '\x1b[0m',
+    green: '\x1b[32m',
+    red: '\x1b[31m',
+    cyan: '\x1b[36m',
+    bold: '\x1b[1m',
+};
+
+function log(message, color = 'reset') {
+    console.log(`${colors[color]}${message}${colors.reset}`);
+}
+
+function logSuccess(message) {
+    console.log(`${colors.green}✓${colors.reset} ${message}`);
+}
+
+function logError(message) {
+    console.log(`${colors.red}✗${colors.reset} ${message}`);
+}
+
+// Monday of the week a grade was entered in, and its score on the 0-20 scale
+const ENTRY_WEEK = 'DATE_SUB(DATE(g.created_at), INTERVAL WEEKDAY(g.created_at) DAY)';
+const GRADE_20 = 'g.score / COALESCE(NULLIF(g.max_marks, 0), 20) * 20';
+
+// The student's grades entered in bucket w's week
+const BUCKET_GRADES = `FROM grades g
+    WHERE g.student_id = w.student_id
+      AND g.created_at >= w.week_start AND g.created_at < w.week_start + INTERVAL 7 DAY`;
+
+async function backfillStudentBuckets(connection) {
+    await connection.query(
+        'UPDATE student_weekly_stats SET grade_count = 0, grade_sum = 0, last_grade = NULL, prev_grade = NULL'
+    );
+    await connection.query(
+        `INSERT INTO student_weekly_stats (student_id, week_start, grade_count, grade_sum)
+         SELECT g.student_id, ${ENTRY_WEEK} AS week_start, COUNT(*), SUM(${GRADE_20})
+         FROM grades g
+         GROUP BY g.student_id, week_start
+         ON DUPLICATE KEY UPDATE grade_count = VALUES(grade_count), grade_sum = VALUES(grade_sum)`
+    );
+    const [result] = await connection.query(
+        `UPDATE student_weekly_stats w SET
+           last_grade = (SELECT ${GRADE_20} ${BUCKET_GRADES} ORDER BY g.created_at DESC, g.id DESC LIMIT 1),
+           prev_grade = (SELECT ${GRADE_20} ${BUCKET_GRADES} ORDER BY g.created_at DESC, g.id DESC LIMIT 1 OFFSET 1)
+         WHERE w.grade_count > 0`
+    );
+    logSuccess(`Rebuilt ${result.affectedRows} student buckets`);
+}
+
+async function backfillClassBuckets(connection) {
+    await connection.query('UPDATE class_weekly_stats SET grade_count = 0, grade_sum = 0');
+    const [result] = await connection.query(
+        `INSERT INTO class_weekly_stats (week_start, grade_count, grade_sum)
+         SELECT ${ENTRY_WEEK} AS week_start, COUNT(*), SUM(${GRADE_20})
+         FROM grades g
+         GROUP BY week_start
+         ON DUPLICATE KEY UPDATE grade_count = VALUES(grade_count), grade_sum = VALUES(grade_sum)`
+    );
+    logSuccess(`Rebuilt class buckets (${result.affectedRows} rows written)`);
+}
+
+async function backfill() {
+    log('\nBackfilling weekly grade buckets from grades', 'bold');
+    log(`Database: ${dbConfig.database} on ${dbConfig.host}\n`, 'cyan');
+
+    let connection;
+
+    try {
+        connection = await mysql.createConnection(dbConfig);
+
+        // One transaction, so the trend endpoints never see half-rebuilt buckets
+        await connection.beginTransaction();
+        await backfillStudentBuckets(connection);
+        await backfillClassBuckets(connection);
+        await connection.commit();
+
+        log('\n✓ Backfill completed successfully!\n', 'green');
+    } catch (error) {
+        if (connection) {
+            await connection.rollback();
+        }
+        logError(`Backfill failed: ${error.message}`);
+        process.exit(1);
+    } finally {
+        if (connection) {
+            await connection.end();
+        }
+    }
+}
+
+backfill();
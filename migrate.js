@@ -198,6 +198,22 @@ async function seedData(connection) {
             logSuccess('Grades seeded (7 grade records)');
         }
         
+        // Check if feature rows already exist
+        const [existingFeatures] = await connection.query('SELECT COUNT(*) as count FROM student_features');
+        
+        if (existingFeatures[0].count > 0) {
+            log('  Student features already exist, skipping feature seed...', 'yellow');
+        } else {
+            // Ready-to-score rows for the seeded students (G1/G2 from their two latest grades)
+            await connection.query(`
+                INSERT INTO student_features (student_id, age, failures, absences, studytime, g1, g2) VALUES
+                ('st1', 16, 0, 1, 15, 15.0, 18.4),
+                ('st2', 15, 1, 4, 12, 14.4, 13.0),
+                ('st3', 16, 0, 0, 18, 17.8, 19.0)
+            `);
+            logSuccess('Student features seeded (3 feature rows)');
+        }
+        
         // Check if predictions already exist
         const [existingPredictions] = await connection.query('SELECT COUNT(*) as count FROM predictions');
         
@@ -226,7 +242,7 @@ async function seedData(connection) {
 async function verifyTables(connection) {
     logStep(5, 'Verifying table creation...');
     
-    const expectedTables = ['users', 'students', 'grades', 'predictions'];
+    const expectedTables = ['users', 'students', 'grades', 'predictions', 'prediction_audit', 'student_changes', 'student_features', 'student_weekly_stats', 'class_weekly_stats'];
     const [tables] = await connection.query('SHOW TABLES');
     const tableNames = tables.map(t => Object.values(t)[0]);
     
@@ -0,0 +1,147 @@
+"""
+Admission control and load shedding
+Each endpoint belongs to a lane with its own concurrency limit, bounded
+wait queue and maximum queueing time. Requests beyond the queue, or that
+would wait too long, are rejected at once with 503 + Retry-After instead
+of piling up until the Next.js proxy times out. Lanes are separate pools,
+so slow report and scoring calls can never take the slots reserved for
+cheap predictions.
+
+Lanes only work when a worker runs requests concurrently: gunicorn must
+use threaded workers (--worker-class gthread) with more threads than the
+lanes' combined max_concurrent, or no lane ever fills and nothing is
+queued or shed. The Procfile and railway.json use 32 threads for the 22
+default slots, leaving 10 threads that can queue behind a full lane.
+"""
+
+import math
+import threading
+import time
+
+
+class Lane:
+    """Concurrency limit plus a bounded, time-limited wait queue"""
+
+    def __init__(self, name, max_concurrent, max_queue, max_wait):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.queued = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.max_wait_ms = 0.0
+
+    @property
+    def retry_after(self):
+        return max(1, math.ceil(self.max_wait))
+
+    def acquire(self):
+        """Return True once a slot is held, False if the request is shed"""
+        if self._slots.acquire(blocking=False):
+            return self._admitted(0.0)
+
+        with self._lock:
+            if self.queued >= self.max_queue:
+                self.rejected += 1
+                return False
+            self.queued += 1
+
+        start = time.perf_counter()
+        got_slot = self._slots.acquire(timeout=self.max_wait)
+        with self._lock:
+            self.queued -= 1
+            if not got_slot:
+                self.rejected += 1
+                return False
+        return self._admitted((time.perf_counter() - start) * 1000)
+
+    def _admitted(self, waited_ms):
+        with self._lock:
+            self.in_flight += 1
+            self.admitted += 1
+            self.max_wait_ms = max(self.max_wait_ms, waited_ms)
+        return True
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'max_concurrent': self.max_concurrent,
+                'max_queue': self.max_queue,
+                'in_flight': self.in_flight,
+                'queue_depth': self.queued,
+                'admitted': self.admitted,
+                'rejected': self.rejected,
+                'max_wait_ms': round(self.max_wait_ms, 1)
+            }
+
+
+# Lane per Flask endpoint (view function name); unlisted endpoints such as
+# metrics and job polling are never limited.
+ENDPOINT_LANES = {
+    'predict_endpoint': 'predict',
+    'simulate': 'predict',
+    'cohort_endpoint': 'predict',
+    'predict_with_model': 'explain',
+    'predict_consensus': 'explain',
+    'counterfactual_endpoint': 'explain',
+    'predict_stream': 'heavy',
+    'score_roster_endpoint': 'heavy',
+    'score_changed_endpoint': 'heavy',
+    'generate_report_endpoint': 'heavy',
+    'student_attendance_trend': 'heavy',
+    'class_attendance_trend': 'heavy',
+    'backtest_endpoint': 'heavy',
+}
+
+
+def default_lanes():
+    return {
+        'predict': Lane('predict', max_concurrent=16, max_queue=64, max_wait=1.0),
+        'explain': Lane('explain', max_concurrent=4, max_queue=16, max_wait=2.0),
+        'heavy': Lane('heavy', max_concurrent=2, max_queue=4, max_wait=0.5),
+    }
+
+
+class AdmissionControl:
+    """Flask hooks that admit, queue or shed each request by its lane"""
+
+    def __init__(self, app=None, lanes=None, endpoint_lanes=None):
+        self.lanes = lanes or default_lanes()
+        self.endpoint_lanes = endpoint_lanes or ENDPOINT_LANES
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        from flask import g, jsonify, request
+
+        @app.before_request
+        def admit():
+            lane = self.lanes.get(self.endpoint_lanes.get(request.endpoint))
+            if lane is None:
+                return None
+            if not lane.acquire():
+                response = jsonify({'error': 'Service busy, please retry', 'lane': lane.name})
+                response.status_code = 503
+                response.headers['Retry-After'] = str(lane.retry_after)
+                return response
+            g.admission_lane = lane
+            return None
+
+        # Runs after streamed responses finish, so streams hold their slot
+        @app.teardown_request
+        def release(exc=None):
+            lane = g.pop('admission_lane', None)
+            if lane is not None:
+                lane.release()
+
+    def stats(self):
+        return {name: lane.stats() for name, lane in self.lanes.items()}
@@ -0,0 +1,146 @@
+"""
+ASGI serving mode for the ML service
+Serves the same endpoints as predict_script.app, but a worker waiting on
+MySQL can keep accepting requests. /generate-report runs natively on the
+event loop: DB reads go through an async aiomysql pool, report preparation
+is offloaded to a thread pool and PDF rendering to a process pool. Every
+other endpoint, /predict included, is the Flask app itself, mounted
+through a WSGI adapter that runs it on threads, so admission lanes,
+tenants, response options and auditing behave exactly as under gunicorn.
+
+Usage:
+    uvicorn asgi_app:app --host 0.0.0.0 --port 5000      (async)
+    gunicorn predict_script:app                          (sync, unchanged)
+"""
+
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Mount, Route
+
+import predict_script
+from database import DB_CONFIG
+from generate_report import generate_student_report
+
+THREAD_WORKERS = 8
+PROCESS_WORKERS = 2
+
+
+class AsyncDatabase:
+    """aiomysql connection pool, opened and closed with the app"""
+
+    def __init__(self, config=DB_CONFIG, minsize=1, maxsize=10):
+        self.config = config
+        self.minsize = minsize
+        self.maxsize = maxsize
+        self.pool = None
+
+    async def start(self):
+        import aiomysql
+        self.pool = await aiomysql.create_pool(
+            host=self.config['host'], user=self.config['user'],
+            password=self.config['password'], db=self.config['database'],
+            minsize=self.minsize, maxsize=self.maxsize, autocommit=True
+        )
+
+    async def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            await self.pool.wait_closed()
+
+    async def fetch_report_data(self, student_id):
+        """Async twin of predict_script.fetch_report_data()"""
+        import aiomysql
+        async with self.pool.acquire() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cursor:
+                await cursor.execute(predict_script.REPORT_STUDENT_QUERY, (student_id,))
+                student = await cursor.fetchone()
+                if not student:
+                    raise LookupError(f'Student {student_id} not found')
+                await cursor.execute(predict_script.REPORT_GRADES_QUERY, (student_id,))
+                grades = list(await cursor.fetchall())
+        return student, grades
+
+
+class LocalDatabase:
+    """
+    In-memory stand-in for AsyncDatabase (tests and benchmarks)
+
+    latency seconds are awaited per query to mimic a network round trip.
+    """
+
+    def __init__(self, students, grades, latency=0.0):
+        self.students = students
+        self.grades = grades
+        self.latency = latency
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def fetch_report_data(self, student_id):
+        await asyncio.sleep(self.latency)
+        student = self.students.get(student_id)
+        if not student:
+            raise LookupError(f'Student {student_id} not found')
+        await asyncio.sleep(self.latency)
+        return dict(student), [dict(g) for g in self.grades.get(student_id, [])]
+
+
+def create_app(db=None, thread_workers=THREAD_WORKERS, process_workers=PROCESS_WORKERS):
+    """Build the ASGI app; db defaults to an aiomysql pool on DB_CONFIG"""
+    db = db or AsyncDatabase()
+    state = {}
+
+    @asynccontextmanager
+    async def lifespan(app):
+        state['threads'] = ThreadPoolExecutor(max_workers=thread_workers, thread_name_prefix='cpu')
+        # spawn: PDF workers import only generate_report, not the models
+        state['processes'] = ProcessPoolExecutor(max_workers=process_workers,
+                                                 mp_context=multiprocessing.get_context('spawn'))
+        await db.start()
+        try:
+            yield
+        finally:
+            await db.close()
+            state['threads'].shutdown(wait=False)
+            state['processes'].shutdown(wait=False)
+
+    async def in_threads(fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(state['threads'], fn, *args)
+
+    async def generate_report(request):
+        """Async /generate-report/<student_id>: same PDF as the sync endpoint"""
+        student_id = request.path_params['student_id']
+        try:
+            student, grades = await db.fetch_report_data(student_id)
+            report_args = await in_threads(predict_script.prepare_report, student_id, student, grades)
+            pdf_buffer = await asyncio.get_running_loop().run_in_executor(
+                state['processes'], generate_student_report, *report_args)
+        except LookupError as e:
+            return JSONResponse({'error': str(e)}, status_code=404)
+        except Exception as e:
+            print(f"Report generation error: {str(e)}")
+            return JSONResponse({'error': str(e)}, status_code=500)
+
+        return Response(pdf_buffer.getvalue(), media_type='application/pdf', headers={
+            'Content-Disposition': f'attachment; filename=student_{student_id}_report.pdf'
+        })
+
+    return Starlette(
+        routes=[
+            Route('/generate-report/{student_id}', generate_report, methods=['GET']),
+            Mount('/', app=WSGIMiddleware(predict_script.app, workers=thread_workers)),
+        ],
+        lifespan=lifespan
+    )
+
+
+app = create_app()
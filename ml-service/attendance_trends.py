@@ -0,0 +1,167 @@
+"""
+Weekly attendance and predicted-grade trends
+Reads the incrementally maintained weekly buckets (student_weekly_stats,
+class_weekly_stats) and turns them into one feature snapshot per week,
+scored in a single vectorized predict() call. A lookup is O(weeks): only
+the requested weeks are read, plus the last GRADE_LOOKBACK weeks with
+grades before them, which carry G1/G2 into the window.
+"""
+
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from scoring import FEATURE_NAMES, FEATURE_DEFAULTS, scale_predictions
+
+# Attendance rate denominator: school days in a week
+SESSIONS_PER_WEEK = 5
+
+# Graded weeks before the window needed to forward-fill G1 and G2
+GRADE_LOOKBACK = 2
+
+STUDENT_QUERY = """
+    SELECT id, age, study_hours AS studytime, failures, absences
+    FROM students
+    WHERE id = %s
+"""
+
+# Newest buckets first, then the graded buckets from before the window
+STUDENT_BUCKETS_QUERY = """
+    (SELECT week_start, absences, grade_count, last_grade, prev_grade
+     FROM student_weekly_stats
+     WHERE student_id = %s
+     ORDER BY week_start DESC LIMIT %s)
+    UNION
+    (SELECT week_start, absences, grade_count, last_grade, prev_grade
+     FROM student_weekly_stats
+     WHERE student_id = %s AND grade_count > 0 AND week_start < %s
+     ORDER BY week_start DESC LIMIT %s)
+    ORDER BY week_start
+"""
+
+CLASS_PROFILE_QUERY = """
+    SELECT COUNT(*) AS students, AVG(age) AS age, AVG(failures) AS failures,
+           AVG(study_hours) AS studytime, SUM(absences) AS absences
+    FROM students
+"""
+
+CLASS_BUCKETS_QUERY = """
+    (SELECT week_start, absences, grade_count, grade_sum
+     FROM class_weekly_stats
+     ORDER BY week_start DESC LIMIT %s)
+    UNION
+    (SELECT week_start, absences, grade_count, grade_sum
+     FROM class_weekly_stats
+     WHERE grade_count > 0 AND week_start < %s
+     ORDER BY week_start DESC LIMIT %s)
+    ORDER BY week_start
+"""
+
+
+def current_week():
+    today = date.today()
+    return today - timedelta(days=today.weekday())
+
+
+def window_start(weeks):
+    """Monday of the oldest week a trend of `weeks` weeks shows"""
+    return current_week() - timedelta(weeks=weeks - 1)
+
+
+def weekly_frame(buckets, columns):
+    """
+    Bucket rows reindexed onto every week up to the current one
+
+    Weeks without events get zero counts and NaN grades, so the snapshot
+    pass below can forward-fill grades across quiet weeks.
+    """
+    last_week = pd.Timestamp(current_week())
+    if not buckets:
+        return pd.DataFrame({c: [np.nan] for c in columns}, index=[last_week]).assign(absences=0, grade_count=0)
+
+    frame = pd.DataFrame(buckets).set_index('week_start')
+    frame.index = pd.to_datetime(frame.index)
+    weeks = pd.date_range(frame.index.min(), max(frame.index.max(), last_week), freq='W-MON')
+    frame = frame.reindex(weeks)
+    frame[['absences', 'grade_count']] = frame[['absences', 'grade_count']].fillna(0)
+    return frame.astype(float)
+
+
+def cumulative_absences(total_absences, weekly_absences):
+    """Absences as of each week's end, walking back from today's total"""
+    later = weekly_absences[::-1].cumsum()[::-1] - weekly_absences
+    return (total_absences - later).clip(lower=0)
+
+
+def student_snapshots(student, frame):
+    """One six-feature row per week for a single student"""
+    g1 = frame['last_grade'].ffill()
+    # Second most recent grade: the earlier grade in the same week if there
+    # was one, otherwise the latest grade of an earlier week
+    had_grades = frame['grade_count'] > 0
+    g2 = frame['prev_grade'].fillna(g1.shift(1)).where(had_grades).ffill()
+
+    return pd.DataFrame({
+        'age': float(student.get('age') or FEATURE_DEFAULTS['age']),
+        'failures': float(student.get('failures') or FEATURE_DEFAULTS['failures']),
+        'absences': cumulative_absences(float(student.get('absences') or 0), frame['absences']),
+        'studytime': float(student.get('studytime') or FEATURE_DEFAULTS['studytime']),
+        'G1': g1.fillna(FEATURE_DEFAULTS['G1']),
+        'G2': g2.fillna(FEATURE_DEFAULTS['G2'])
+    }, index=frame.index)[FEATURE_NAMES]
+
+
+def class_snapshots(profile, frame):
+    """One average-student feature row per week for the whole class"""
+    students = max(int(profile['students'] or 0), 1)
+    mean_grade = (frame['grade_sum'] / frame['grade_count'].replace(0, np.nan)).ffill()
+
+    return pd.DataFrame({
+        'age': float(profile['age'] or FEATURE_DEFAULTS['age']),
+        'failures': float(profile['failures'] or FEATURE_DEFAULTS['failures']),
+        'absences': cumulative_absences(float(profile['absences'] or 0), frame['absences']) / students,
+        'studytime': float(profile['studytime'] or FEATURE_DEFAULTS['studytime']),
+        'G1': mean_grade.fillna(FEATURE_DEFAULTS['G1']),
+        'G2': mean_grade.shift(1).fillna(FEATURE_DEFAULTS['G2'])
+    }, index=frame.index)[FEATURE_NAMES]
+
+
+def build_trend(model, grade_scaler, frame, snapshots, weeks, sessions):
+    """Score all snapshots at once and format the last `weeks` weeks"""
+    frame, snapshots = frame.tail(weeks), snapshots.tail(weeks)
+    _, predicted_grades = scale_predictions(model.predict(snapshots), grade_scaler, 100)
+    attendance_rate = np.clip(100 * (1 - frame['absences'].to_numpy() / sessions), 0, 100)
+
+    return {
+        'weeks': [f'Week {i + 1}' for i in range(len(frame))],
+        'week_start': [d.strftime('%Y-%m-%d') for d in frame.index],
+        'attendance_rate': [round(float(v), 1) for v in attendance_rate],
+        'predicted_grades': [round(float(v), 1) for v in predicted_grades]
+    }
+
+
+def student_trend(cursor, model, grade_scaler, student_id, weeks=8):
+    """Trend for one student, or None if the student does not exist"""
+    cursor.execute(STUDENT_QUERY, (student_id,))
+    student = cursor.fetchone()
+    if not student:
+        return None
+
+    cursor.execute(STUDENT_BUCKETS_QUERY, (student_id, weeks, student_id, window_start(weeks), GRADE_LOOKBACK))
+    frame = weekly_frame(cursor.fetchall(), ['last_grade', 'prev_grade'])
+    snapshots = student_snapshots(student, frame)
+    return build_trend(model, grade_scaler, frame, snapshots, weeks, SESSIONS_PER_WEEK)
+
+
+def class_trend(cursor, model, grade_scaler, weeks=8):
+    """Trend for the average student across the whole class"""
+    cursor.execute(CLASS_PROFILE_QUERY)
+    profile = cursor.fetchone()
+
+    cursor.execute(CLASS_BUCKETS_QUERY, (weeks, window_start(weeks), GRADE_LOOKBACK))
+    frame = weekly_frame(cursor.fetchall(), ['grade_sum'])
+    frame['grade_sum'] = frame['grade_sum'].fillna(0)
+    snapshots = class_snapshots(profile, frame)
+    students = max(int(profile['students'] or 0), 1)
+    return build_trend(model, grade_scaler, frame, snapshots, weeks, SESSIONS_PER_WEEK * students)
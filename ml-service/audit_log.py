@@ -0,0 +1,218 @@
+"""
+Write-behind prediction audit log
+Serving a prediction only appends a record to an in-memory ring buffer;
+a background thread flushes the buffer as multi-row INSERTs into the
+prediction_audit table once batch_size records are waiting or every
+flush_interval seconds. If MySQL is unreachable the batch goes to a local
+SQLite file (audit_fallback.db) instead, so no request ever waits on the
+database. When the buffer is full the oldest unflushed records are
+dropped and counted.
+
+AUDIT_SINK=none keeps records in memory only (the test suite sets it), and
+AUDIT_FALLBACK_FILE moves the SQLite file.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+AUDIT_COLUMNS = ('served_at', 'endpoint', 'tenant', 'student_id', 'model_name', 'model_version',
+                 'inputs', 'predicted_grade', 'risk_level', 'latency_ms', 'top_factors')
+
+INSERT_AUDIT = f"""
+    INSERT INTO prediction_audit ({', '.join(AUDIT_COLUMNS)})
+    VALUES ({', '.join(['%s'] * len(AUDIT_COLUMNS))})
+"""
+
+FALLBACK_FILE = 'audit_fallback.db'
+
+FALLBACK_SCHEMA = f"""
+    CREATE TABLE IF NOT EXISTS prediction_audit (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        {', '.join(AUDIT_COLUMNS)}
+    )
+"""
+
+
+def audit_row(record):
+    """Column tuple for one record; inputs and factors are stored as JSON"""
+    return (
+        record['served_at'], record['endpoint'], record.get('tenant', 'default'), record.get('student_id'),
+        record['model_name'], record['model_version'], json.dumps(record['inputs']),
+        record['predicted_grade'], record['risk_level'], record['latency_ms'],
+        json.dumps(record.get('top_factors') or [])
+    )
+
+
+class MySQLSink:
+    """Batched inserts into MySQL (executemany() sends one multi-row INSERT)"""
+
+    def __init__(self, connect):
+        self.connect = connect
+
+    def write(self, rows):
+        conn = self.connect()
+        try:
+            cursor = conn.cursor()
+            cursor.executemany(INSERT_AUDIT, rows)
+            conn.commit()
+            cursor.close()
+        finally:
+            conn.close()
+
+
+class NullSink:
+    """Discards batches; for runs that must not write audit rows anywhere"""
+
+    def write(self, rows):
+        pass
+
+
+class SQLiteSink:
+    """Local fallback file for batches MySQL could not take"""
+
+    def __init__(self, path=FALLBACK_FILE):
+        self.path = path
+
+    def write(self, rows):
+        conn = sqlite3.connect(self.path)
+        try:
+            conn.execute(FALLBACK_SCHEMA)
+            conn.executemany(
+                f"INSERT INTO prediction_audit ({', '.join(AUDIT_COLUMNS)}) "
+                f"VALUES ({', '.join(['?'] * len(AUDIT_COLUMNS))})",
+                rows
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+
+class AuditLog:
+    """Bounded ring buffer drained by a background flusher thread"""
+
+    def __init__(self, sink, fallback=None, capacity=10000, batch_size=200, flush_interval=2.0):
+        self.sink = sink
+        self.fallback = fallback
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._buffer = deque()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self.recorded = 0
+        self.dropped = 0
+        self.flushed = 0
+        self.fallback_rows = 0
+        self.failed_rows = 0
+        self.flushes = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self.high_water = 0
+        self.last_error = None
+
+    @classmethod
+    def from_env(cls, connect):
+        """MySQL with the SQLite fallback, or no sink at all for AUDIT_SINK=none"""
+        if os.environ.get('AUDIT_SINK', 'mysql').lower() == 'none':
+            return cls(NullSink())
+        return cls(MySQLSink(connect),
+                   fallback=SQLiteSink(os.environ.get('AUDIT_FALLBACK_FILE', FALLBACK_FILE)))
+
+    def record(self, record):
+        """Queue one audit record; O(1) and never touches the database"""
+        record.setdefault('served_at', datetime.now())
+        with self._lock:
+            if len(self._buffer) >= self.capacity:
+                self._buffer.popleft()
+                self.dropped += 1
+            self._buffer.append(record)
+            self.recorded += 1
+            depth = len(self._buffer)
+            self.high_water = max(self.high_water, depth)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='audit-flush', daemon=True)
+                self._thread.start()
+        if depth >= self.batch_size:
+            self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                # The flusher is the only thread draining the buffer: never let it die
+                print(f"Audit flush failed: {e}")
+                self.last_error = str(e)
+
+    def flush(self):
+        """Write everything buffered so far in batch_size chunks; returns rows written"""
+        written = 0
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    batch = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+                if not batch:
+                    return written
+                rows = self._rows(batch)
+                if rows:
+                    self._write(rows)
+                    written += len(rows)
+
+    def _rows(self, batch):
+        """Column tuples for the batch; a record that cannot be converted is counted as failed"""
+        rows = []
+        for record in batch:
+            try:
+                rows.append(audit_row(record))
+            except Exception as e:
+                self.last_error = f"Bad audit record: {e}"
+                self.failed_rows += 1
+        return rows
+
+    def _write(self, rows):
+        start = time.perf_counter()
+        try:
+            self.sink.write(rows)
+            self.flushed += len(rows)
+        except Exception as e:
+            self.last_error = str(e)
+            if self.fallback is None:
+                self.failed_rows += len(rows)
+            else:
+                try:
+                    self.fallback.write(rows)
+                    self.fallback_rows += len(rows)
+                except Exception as fallback_error:
+                    print(f"Audit fallback failed: {fallback_error}")
+                    self.failed_rows += len(rows)
+        elapsed = (time.perf_counter() - start) * 1000
+        self.flushes += 1
+        self.last_flush_ms = elapsed
+        self.max_flush_ms = max(self.max_flush_ms, elapsed)
+
+    def stats(self):
+        with self._lock:
+            depth = len(self._buffer)
+        return {
+            'buffer_depth': depth,
+            'capacity': self.capacity,
+            'high_water': self.high_water,
+            'recorded': self.recorded,
+            'flushed': self.flushed,
+            'fallback_rows': self.fallback_rows,
+            'dropped': self.dropped,
+            'failed_rows': self.failed_rows,
+            'flushes': self.flushes,
+            'last_flush_ms': round(self.last_flush_ms, 2),
+            'max_flush_ms': round(self.max_flush_ms, 2),
+            'last_error': self.last_error
+        }
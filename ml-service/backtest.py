@@ -0,0 +1,204 @@
+"""
+Offline backtest of every model on labelled student data
+model_metrics.json is measured once, at training time, on one 80/20 split
+of student-mat.csv. This re-measures every model on any labelled CSV in
+the UCI student format (student-mat.csv, student-por.csv or an export with
+the same columns, comma or semicolon separated). It reports R², MAE and
+RMSE on the 0-20 grade scale, a risk-bucket confusion matrix and predict
+latency per row.
+
+The input is read in chunks. Each chunk is scored by all models in
+parallel and folded into running totals, so memory stays flat however
+large the file is.
+
+Usage:
+    python backtest.py student-por.csv
+    python backtest.py export.csv --tenant school_a --chunk-size 20000 --output report.json
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from model_registry import ModelRegistry, DEFAULT_TENANT, SCALER
+from scoring import FEATURE_NAMES, FEATURE_DEFAULTS, scale_predictions, risk_levels
+
+LABEL = 'G3'
+CHUNK_ROWS = 5000
+RISK_BUCKETS = ('High', 'Medium', 'Low')
+
+
+def read_chunks(source, chunk_size=CHUNK_ROWS):
+    """
+    Yield (features, labels, skipped) for each chunk of a labelled CSV
+
+    source is a path or a binary stream positioned at the header (e.g. an
+    upload); only one chunk is held at a time. Missing feature values get
+    the scoring defaults, and rows without a numeric G3 are skipped and
+    counted. Raises ValueError if the header lacks a feature or G3.
+    """
+    stream = open(source, 'rb') if isinstance(source, str) else source
+    try:
+        header = stream.readline()
+        if isinstance(header, bytes):
+            header = header.decode('utf-8-sig')
+        if not header.strip():
+            raise ValueError('Input is empty')
+        sep = ';' if header.count(';') > header.count(',') else ','
+        columns = [c.strip().strip('"') for c in header.strip().split(sep)]
+        missing = [c for c in FEATURE_NAMES + [LABEL] if c not in columns]
+        if missing:
+            raise ValueError(f'Missing columns: {missing}')
+
+        for chunk in pd.read_csv(stream, sep=sep, header=None, names=columns,
+                                 usecols=FEATURE_NAMES + [LABEL], chunksize=chunk_size):
+            chunk = chunk.apply(pd.to_numeric, errors='coerce')
+            labelled = chunk[LABEL].notna().to_numpy()
+            features = chunk.loc[labelled, FEATURE_NAMES].fillna(FEATURE_DEFAULTS).astype(float)
+            yield features, chunk.loc[labelled, LABEL].to_numpy(dtype=float), int((~labelled).sum())
+    finally:
+        if isinstance(source, str):
+            stream.close()
+
+
+class BacktestStats:
+    """Running error sums and risk-bucket confusion counts for one model"""
+
+    def __init__(self):
+        self.rows = 0
+        self.error_sum = 0.0
+        self.abs_error_sum = 0.0
+        self.squared_error_sum = 0.0
+        self.label_sum = 0.0
+        self.label_squared_sum = 0.0
+        self.confusion = np.zeros((len(RISK_BUCKETS), len(RISK_BUCKETS)), dtype=np.int64)
+        self.predict_seconds = 0.0
+
+    def add(self, actual, predicted, seconds):
+        errors = predicted - actual
+        self.rows += len(actual)
+        self.error_sum += float(errors.sum())
+        self.abs_error_sum += float(np.abs(errors).sum())
+        self.squared_error_sum += float((errors ** 2).sum())
+        self.label_sum += float(actual.sum())
+        self.label_squared_sum += float((actual ** 2).sum())
+        bucket = {level: i for i, level in enumerate(RISK_BUCKETS)}
+        actual_idx = np.array([bucket[level] for level in risk_levels(actual)])
+        predicted_idx = np.array([bucket[level] for level in risk_levels(predicted)])
+        np.add.at(self.confusion, (actual_idx, predicted_idx), 1)
+        self.predict_seconds += seconds
+
+    def summary(self):
+        if not self.rows:
+            return {'rows': 0}
+        total_ss = self.label_squared_sum - self.label_sum ** 2 / self.rows
+        correct = int(np.trace(self.confusion))
+        return {
+            'rows': self.rows,
+            'r2_score': round(1 - self.squared_error_sum / total_ss, 4) if total_ss > 0 else None,
+            'mae': round(self.abs_error_sum / self.rows, 4),
+            'rmse': round(float(np.sqrt(self.squared_error_sum / self.rows)), 4),
+            'mean_error': round(self.error_sum / self.rows, 4),
+            'risk_accuracy': round(correct / self.rows, 4),
+            # actual bucket -> predicted bucket -> rows
+            'risk_confusion': {
+                actual: {predicted: int(self.confusion[i, j]) for j, predicted in enumerate(RISK_BUCKETS)}
+                for i, actual in enumerate(RISK_BUCKETS)
+            },
+            'latency_ms_per_row': round(self.predict_seconds * 1000 / self.rows, 5)
+        }
+
+
+def _timed_predict(model, X):
+    start = time.perf_counter()
+    scaled = model.predict(X)
+    return scaled, time.perf_counter() - start
+
+
+def backtest(source, models, grade_scaler, chunk_size=CHUNK_ROWS, frozen_metrics=None):
+    """
+    Score a labelled CSV with every model and compare against G3
+
+    models maps model name -> loaded model. Each chunk is predicted by all
+    models at once on a thread pool (sklearn and xgboost release the GIL
+    while predicting), so the latency per row is measured with the other
+    models running alongside. frozen_metrics (model_metrics.json) adds
+    each model's training-time R² for comparison.
+    """
+    stats = {name: BacktestStats() for name in models}
+    skipped = 0
+    chunks = 0
+    start = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=max(len(models), 1), thread_name_prefix='backtest') as pool:
+        for features, labels, chunk_skipped in read_chunks(source, chunk_size):
+            skipped += chunk_skipped
+            if not len(labels):
+                continue
+            chunks += 1
+            futures = {name: pool.submit(_timed_predict, model, features) for name, model in models.items()}
+            for name, future in futures.items():
+                scaled, seconds = future.result()
+                final_grades, _ = scale_predictions(scaled, grade_scaler)
+                stats[name].add(labels, final_grades, seconds)
+
+    elapsed = time.perf_counter() - start
+    frozen_metrics = frozen_metrics or {}
+    rows = next(iter(stats.values())).rows if stats else 0
+    return {
+        'rows': rows,
+        'skipped_rows': skipped,
+        'chunks': chunks,
+        'seconds': round(elapsed, 3),
+        'models': {
+            name: dict(model_stats.summary(), **(
+                {'trained_r2': frozen_metrics[name]['r2_score']}
+                if 'r2_score' in frozen_metrics.get(name, {}) else {}
+            ))
+            for name, model_stats in stats.items()
+        }
+    }
+
+
+def load_frozen_metrics(path='model_metrics.json'):
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def tenant_models(registry, tenant=DEFAULT_TENANT):
+    """Every model the tenant has, plus its grade scaler"""
+    models = {name: registry.get(tenant, name) for name in registry.available(tenant)}
+    return models, registry.scaler(tenant)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Backtest every model on a labelled student CSV')
+    parser.add_argument('input', help='CSV with the six features and G3 (comma or semicolon separated)')
+    parser.add_argument('--tenant', default=DEFAULT_TENANT)
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_ROWS)
+    parser.add_argument('--output', help='also write the report to this JSON file')
+    args = parser.parse_args()
+
+    input_path = os.path.abspath(args.input)
+    output_path = os.path.abspath(args.output) if args.output else None
+    # Model artifacts live next to this file
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+    registry = ModelRegistry()
+    models, grade_scaler = tenant_models(registry, args.tenant)
+    if not models:
+        raise SystemExit(f"No models found for tenant {args.tenant!r} (missing {SCALER}.pkl or *_model.pkl)")
+
+    report = backtest(input_path, models, grade_scaler, chunk_size=args.chunk_size,
+                      frozen_metrics=load_frozen_metrics() if args.tenant == DEFAULT_TENANT else None)
+    print(json.dumps(report, indent=2))
+    if output_path:
+        with open(output_path, 'w') as f:
+            json.dump(report, f, indent=2)
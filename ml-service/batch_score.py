@@ -0,0 +1,220 @@
+"""
+Offline chunked batch scorer for large student files
+Scores CSV or Parquet input without going through HTTP, using the same
+model artifacts and scaling/risk rules as predict().
+
+Usage:
+    python batch_score.py students.csv scored.csv [--model xgboost] [--shap]
+    python batch_score.py students.parquet scored.csv --resume
+"""
+
+import argparse
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import numpy as np
+import pandas as pd
+import shap
+
+from scoring import FEATURE_NAMES, scale_predictions, risk_levels
+
+# Per-process state, filled by _init_worker() so each worker unpickles
+# the model and builds its explainer once instead of once per chunk.
+_worker = {}
+
+
+def _init_worker(model_name, with_shap):
+    # Workers start in the caller's cwd; artifacts live next to this file
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    _worker['model'] = joblib.load(f'{model_name}_model.pkl')
+    _worker['grade_scaler'] = joblib.load('grade_scaler.pkl')
+    _worker['explainer'] = None
+    if with_shap:
+        X_train = joblib.load('x_train.pkl')
+        if model_name == 'linear_regression':
+            _worker['explainer'] = shap.LinearExplainer(_worker['model'], X_train)
+        else:
+            _worker['explainer'] = shap.Explainer(_worker['model'], X_train)
+
+
+def top_factors(shap_values, top_k=3):
+    """
+    Format the top-k SHAP contributions of every row in one pass
+
+    Returns strings like "G2:+0.104;absences:-0.021".
+    """
+    order = np.argsort(-np.abs(shap_values), axis=1)[:, :top_k]
+    picked = np.take_along_axis(shap_values, order, axis=1)
+    return [
+        ';'.join(f"{FEATURE_NAMES[i]}:{v:+.3f}" for i, v in zip(idx, vals))
+        for idx, vals in zip(order, picked)
+    ]
+
+
+def score_chunk(chunk, max_marks=100, top_k=3):
+    """Score one DataFrame chunk with the worker's model"""
+    X = chunk[FEATURE_NAMES].astype(float)
+    scaled_prediction = _worker['model'].predict(X)
+    final_grades, predicted_grades = scale_predictions(
+        scaled_prediction, _worker['grade_scaler'], max_marks
+    )
+
+    result = chunk.drop(columns=FEATURE_NAMES)
+    result['predicted_grade'] = np.round(predicted_grades, 2)
+    result['risk_level'] = risk_levels(final_grades)
+
+    if _worker['explainer'] is not None:
+        shap_values = np.asarray(_worker['explainer'].shap_values(X)).reshape(len(X), -1)
+        result['top_factors'] = top_factors(shap_values, top_k)
+
+    return result
+
+
+def read_chunks(path, chunk_size, skip_rows=0):
+    """Yield DataFrame chunks of the input, skipping rows already scored"""
+    if path.endswith('.parquet'):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Reading Parquet requires pyarrow: pip install pyarrow")
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            chunk = batch.to_pandas()
+            if skip_rows >= len(chunk):
+                skip_rows -= len(chunk)
+                continue
+            yield chunk.iloc[skip_rows:]
+            skip_rows = 0
+        return
+
+    with open(path, 'r') as f:
+        sep = ';' if ';' in f.readline() else ','
+    # A callable skips scored rows as they are read; a range of row numbers
+    # would be materialised as a set of skip_rows ints first
+    yield from pd.read_csv(path, sep=sep, chunksize=chunk_size,
+                           skiprows=(lambda i: 0 < i <= skip_rows) if skip_rows else None)
+
+
+def new_progress(input_path, model_name, max_marks, with_shap, top_k):
+    """Checkpoint for a fresh run; the settings say which run it belongs to"""
+    return {'input_path': input_path, 'model_name': model_name, 'max_marks': max_marks,
+            'with_shap': with_shap, 'top_k': top_k, 'rows_done': 0, 'bytes_written': 0}
+
+
+def load_progress(progress_path, run):
+    """
+    Return the checkpoint to resume from
+
+    Refuses a checkpoint written for another input file or other scoring
+    settings, whose rows would be spliced into this run's output.
+    """
+    if not os.path.exists(progress_path):
+        return run
+    with open(progress_path, 'r') as f:
+        progress = json.load(f)
+    mismatched = [key for key in ('input_path', 'model_name', 'max_marks', 'with_shap', 'top_k')
+                  if progress.get(key) != run[key]]
+    if mismatched:
+        raise SystemExit(f"{progress_path} belongs to a different run ({', '.join(mismatched)} "
+                         f"differ); rerun without --resume to start over")
+    return progress
+
+
+def save_progress(progress_path, progress):
+    tmp_path = f'{progress_path}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(progress, f)
+    os.replace(tmp_path, progress_path)
+
+
+def batch_score(input_path, output_path, model_name='linear_regression',
+                chunk_size=10000, workers=None, max_marks=100,
+                with_shap=False, top_k=3, resume=False):
+    """
+    Score input_path into output_path chunk by chunk
+
+    At most 2 * workers chunks are in flight, and results are appended in
+    input order as soon as the oldest chunk finishes, so memory stays flat
+    regardless of input size. Progress is checkpointed after every chunk;
+    with resume=True the output is truncated back to the last checkpoint
+    and scoring continues from the next unscored row.
+    """
+    input_path = os.path.abspath(input_path)
+    output_path = os.path.abspath(output_path)
+    progress_path = f'{output_path}.progress'
+    workers = workers or os.cpu_count() or 1
+
+    run = new_progress(input_path, model_name, max_marks, with_shap, top_k)
+    progress = load_progress(progress_path, run) if resume else run
+    if resume and os.path.exists(output_path):
+        with open(output_path, 'r+b') as f:
+            f.truncate(progress['bytes_written'])
+    elif os.path.exists(output_path):
+        os.remove(output_path)
+
+    print(f"Scoring {input_path} with {model_name} ({workers} workers)")
+    if progress['rows_done']:
+        print(f"Resuming after {progress['rows_done']} rows")
+
+    rows_scored = 0
+    start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(model_name, with_shap)) as pool, \
+            open(output_path, 'a', newline='') as out:
+        pending = deque()
+
+        def drain(until):
+            nonlocal rows_scored
+            while len(pending) > until:
+                result = pending.popleft().result()
+                result.to_csv(out, index=False, header=out.tell() == 0)
+                out.flush()
+                rows_scored += len(result)
+                progress['rows_done'] += len(result)
+                progress['bytes_written'] = out.tell()
+                save_progress(progress_path, progress)
+
+                elapsed = time.perf_counter() - start
+                print(f"  {progress['rows_done']} rows | {rows_scored / elapsed:,.0f} rows/sec")
+
+        for chunk in read_chunks(input_path, chunk_size, progress['rows_done']):
+            pending.append(pool.submit(score_chunk, chunk, max_marks, top_k))
+            drain(until=2 * workers)
+        drain(until=0)
+
+    elapsed = time.perf_counter() - start
+    rate = rows_scored / elapsed if elapsed > 0 else 0
+    print(f"Done: {rows_scored} rows in {elapsed:.1f}s ({rate:,.0f} rows/sec) -> {output_path}")
+    os.remove(progress_path)
+    return {'rows': rows_scored, 'seconds': elapsed, 'rows_per_second': rate}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Score a CSV/Parquet file of students offline')
+    parser.add_argument('input', help='CSV (comma or semicolon separated) or .parquet file')
+    parser.add_argument('output', help='CSV file to write results to')
+    parser.add_argument('--model', default='linear_regression',
+                        choices=['linear_regression', 'random_forest', 'xgboost'])
+    parser.add_argument('--chunk-size', type=int, default=10000)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--max-marks', type=float, default=100)
+    parser.add_argument('--shap', action='store_true', help='include top SHAP factors per row')
+    parser.add_argument('--top-k', type=int, default=3)
+    parser.add_argument('--resume', action='store_true', help='continue an interrupted run')
+    args = parser.parse_args()
+
+    batch_score(
+        args.input, args.output,
+        model_name=args.model,
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+        max_marks=args.max_marks,
+        with_shap=args.shap,
+        top_k=args.top_k,
+        resume=args.resume
+    )
@@ -0,0 +1,284 @@
+"""
+Benchmark suite for the Flask ML service
+Runs in-process against the Flask test client, so no server is needed.
+
+Usage: python benchmark.py [benchmark_name ...]
+"""
+
+import asyncio
+import datetime
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from werkzeug.test import EnvironBuilder
+
+# predict_script builds its audit log at import time; benchmark traffic must
+# not land in prediction_audit or ml-service/audit_fallback.db
+os.environ['AUDIT_SINK'] = 'none'
+
+import predict_script
+import responses
+
+SAMPLE_STUDENT = {
+    'age': 16,
+    'failures': 0,
+    'absences': 4,
+    'studytime': 2,
+    'G1': 12,
+    'G2': 13
+}
+
+
+class NDJSONStudents:
+    """Request body that generates NDJSON rows lazily, like a chunked upload"""
+
+    def __init__(self, n_rows):
+        self.lines = (
+            (json.dumps(dict(SAMPLE_STUDENT, id=f'st{i}', absences=i % 30)) + '\n').encode()
+            for i in range(n_rows)
+        )
+
+    def __iter__(self):
+        return self.lines
+
+    def read(self, size=-1):
+        return b''.join(self.lines)
+
+
+def stream_request(path, body):
+    """
+    Call the WSGI app with a streamed (unknown length) body
+
+    Returns the response iterable, which is consumed lazily by the caller.
+    """
+    environ = EnvironBuilder(path=path, method='POST', content_type='application/x-ndjson').get_environ()
+    environ['wsgi.input'] = body
+    environ['wsgi.input_terminated'] = True
+    environ.pop('CONTENT_LENGTH', None)
+    return predict_script.app(environ, lambda status, headers: None)
+
+
+def bench_predict_stream(n_rows=50000, chunk_size=500, model='linear_regression'):
+    """
+    Throughput, time to first result and memory high-water of /predict-stream
+
+    Runs the same stream at two sizes: the peak should stay flat while the
+    row count grows 10x.
+    """
+    results = {}
+    for rows in (n_rows // 10, n_rows):
+        tracemalloc.start()
+        start = time.perf_counter()
+        first_result = None
+        scored = 0
+        for piece in stream_request(f'/predict-stream?chunk_size={chunk_size}&model={model}',
+                                    NDJSONStudents(rows)):
+            if first_result is None:
+                first_result = time.perf_counter() - start
+            scored += piece.count(b'\n')
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        results[f'{rows}_rows'] = {
+            'rows_per_sec': round(scored / elapsed),
+            'first_result_ms': round(first_result * 1000, 1),
+            'peak_mem_mb': round(peak / 1024 / 1024, 2)
+        }
+    return results
+
+
+REPORT_STUDENT = {'id': 'st1', 'name': 'Bench Student', 'email': 'bench@example.com',
+                  'age': 16, 'studytime': 2, 'failures': 0, 'absences': 4}
+REPORT_GRADES = [
+    {'subject': subject, 'score': score, 'max_marks': 100, 'grade': 'B', 'date': datetime.date(2025, 1, 6)}
+    for subject, score in (('Math', 72), ('Science', 65), ('English', 80))
+]
+
+
+def bench_asgi_vs_wsgi(n_requests=32, db_latency=0.05):
+    """
+    /generate-report throughput: one sync Flask worker vs one ASGI worker
+
+    Both see the same simulated MySQL round trip (db_latency seconds per
+    query). The sync worker serves requests one after another; the ASGI
+    worker keeps accepting while earlier requests wait on the database.
+    """
+    import httpx
+    import asgi_app
+
+    def slow_fetch(student_id):
+        time.sleep(2 * db_latency)
+        return dict(REPORT_STUDENT), [dict(g) for g in REPORT_GRADES]
+
+    original_fetch = predict_script.fetch_report_data
+    predict_script.fetch_report_data = slow_fetch
+    try:
+        client = predict_script.app.test_client()
+        start = time.perf_counter()
+        for _ in range(n_requests):
+            assert client.get('/generate-report/st1').status_code == 200
+        wsgi_elapsed = time.perf_counter() - start
+    finally:
+        predict_script.fetch_report_data = original_fetch
+
+    db = asgi_app.LocalDatabase({'st1': REPORT_STUDENT}, {'st1': REPORT_GRADES}, latency=db_latency)
+    app = asgi_app.create_app(db)
+    in_flight = {'now': 0, 'peak': 0}
+
+    async def one(client):
+        in_flight['now'] += 1
+        in_flight['peak'] = max(in_flight['peak'], in_flight['now'])
+        response = await client.get('/generate-report/st1')
+        in_flight['now'] -= 1
+        assert response.status_code == 200
+
+    async def burst():
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url='http://bench') as client:
+                await one(client)  # warm up the PDF worker processes
+                in_flight['peak'] = 0
+                start = time.perf_counter()
+                await asyncio.gather(*(one(client) for _ in range(n_requests)))
+                return time.perf_counter() - start
+
+    asgi_elapsed = asyncio.run(burst())
+    return {
+        'wsgi_reports_per_sec': round(n_requests / wsgi_elapsed, 1),
+        'asgi_reports_per_sec': round(n_requests / asgi_elapsed, 1),
+        'asgi_peak_in_flight': in_flight['peak'],
+        'speedup': round(wsgi_elapsed / asgi_elapsed, 1)
+    }
+
+
+RESPONSE_VARIANTS = {
+    'full': {},
+    'no_explain': {'explain': False},
+    'compact_grade_risk': {'fields': ['predicted_grade', 'risk_level'], 'format': 'compact'},
+}
+
+
+def bench_response_size(n_requests=200):
+    """
+    Bytes and CPU time per response for /predict and /predict-with-model
+
+    Compares the full response (with SHAP explanation) against explain=false
+    and a compact grade-and-risk-only response. CPU time is process time,
+    so explanation work on the background pool is included.
+    """
+    client = predict_script.app.test_client()
+    results = {}
+    for path, extra in (('/predict', {}), ('/predict-with-model', {'model': 'linear_regression'})):
+        for variant, options in RESPONSE_VARIANTS.items():
+            body = dict({'student_data': SAMPLE_STUDENT, 'max_marks': 100}, **extra, **options)
+            assert client.post(path, json=body).status_code == 200  # warm up
+            total_bytes = 0
+            start = time.process_time()
+            for _ in range(n_requests):
+                total_bytes += len(client.post(path, json=body).data)
+            cpu = time.process_time() - start
+            results[f'{path.strip("/")}_{variant}'] = {
+                'bytes': total_bytes // n_requests,
+                'cpu_ms': round(cpu * 1000 / n_requests, 3)
+            }
+    return results
+
+
+def bench_json_encoding(n_rows=50000):
+    """Encoding a large batch response: stdlib json vs responses.dumps (orjson when installed)"""
+    rows = [
+        {'line': i, 'success': True, 'id': f'st{i}', 'predicted_grade': f"{50 + i % 50:.2f}",
+         'risk_level': ('High', 'Medium', 'Low')[i % 3]}
+        for i in range(n_rows)
+    ]
+    start = time.perf_counter()
+    stdlib = json.dumps({'results': rows}, sort_keys=True)
+    stdlib_elapsed = time.perf_counter() - start
+    start = time.perf_counter()
+    fast = responses.dumps({'results': rows}, sort_keys=True)
+    fast_elapsed = time.perf_counter() - start
+    assert json.loads(fast) == json.loads(stdlib)
+    return {
+        'encoder': 'orjson' if responses.orjson is not None else 'json',
+        'stdlib_ms': round(stdlib_elapsed * 1000, 1),
+        'fast_ms': round(fast_elapsed * 1000, 1),
+        'speedup': round(stdlib_elapsed / fast_elapsed, 1)
+    }
+
+
+# Run in a fresh interpreter so each measurement starts from an empty
+# process; libraries are imported in dependency order, so each one is
+# charged only for what it adds to the ones before it
+LIBRARY_RSS_SCRIPT = """
+import json, os
+def rss_mb():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 / 1024
+added = {}
+for library in ('numpy', 'pandas', 'sklearn', 'xgboost', 'shap', 'reportlab'):
+    before = rss_mb()
+    __import__(library)
+    added[library] = round(rss_mb() - before, 1)
+print(json.dumps(added))
+"""
+
+WORKER_RSS_SCRIPT = """
+import json
+import predict_script
+client = predict_script.app.test_client()
+for name in predict_script.MODEL_NAMES:
+    client.post('/predict-with-model', json={'student_data': %r, 'max_marks': 100, 'model': name,
+                                             'explanation_deadline_ms': 10000})
+report = client.get('/memory').get_json()
+print(json.dumps({'rss_mb': report['process']['rss_mb'],
+                  'pss_mb': report['process']['pss_mb'],
+                  'accounted_mb': report['process']['accounted_mb'],
+                  **{group: c['total_mb'] for group, c in report['components'].items()}}))
+""" % SAMPLE_STUDENT
+
+
+def bench_memory_footprint():
+    """RSS added by each heavy library, then a worker that has served every model, per profile (Linux)"""
+    output = subprocess.run([sys.executable, '-c', LIBRARY_RSS_SCRIPT], capture_output=True,
+                            text=True, check=True).stdout
+    results = {f'import_{library}_mb': mb for library, mb in json.loads(output.strip().splitlines()[-1]).items()}
+
+    for profile in ('standard', 'low'):
+        env = dict(os.environ, MEMORY_PROFILE=profile, AUDIT_SINK='none')
+        env.pop('MODEL_MEMORY_BUDGET_MB', None)
+        output = subprocess.run([sys.executable, '-c', WORKER_RSS_SCRIPT], capture_output=True,
+                                text=True, check=True, env=env).stdout
+        results[f'worker_{profile}'] = json.loads(output.strip().splitlines()[-1])
+    return results
+
+
+BENCHMARKS = {
+    'predict_stream': bench_predict_stream,
+    'asgi_vs_wsgi': bench_asgi_vs_wsgi,
+    'response_size': bench_response_size,
+    'json_encoding': bench_json_encoding,
+    'memory_footprint': bench_memory_footprint,
+}
+
+
+def run(names=None):
+    print("="*60)
+    print("ML SERVICE BENCHMARKS")
+    print("="*60)
+
+    results = {}
+    for name in names or BENCHMARKS:
+        results[name] = BENCHMARKS[name]()
+        print(f"\n{name}")
+        for key, value in results[name].items():
+            print(f"  {key:<20} {value}")
+    return results
+
+
+if __name__ == '__main__':
+    run(sys.argv[1:])
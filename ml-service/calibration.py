@@ -0,0 +1,155 @@
+"""
+Prediction intervals and risk probabilities from conformal residuals
+Residuals of each model on held-out rows are computed once at training
+time and stored in calibration.json. Serving turns a point grade into an
+interval and a probability per risk bucket with a quantile and a
+searchsorted lookup, never another model pass.
+
+Random forest intervals are locally adaptive: the per-tree spread is
+averaged per predicted-grade band at training time, residuals are scored
+relative to their band's spread and the interval is scaled back by it.
+
+Usage: python calibration.py      (recalibrate saved models on the 20% test split)
+"""
+
+import json
+import math
+import os
+
+import joblib
+import numpy as np
+
+from scoring import FEATURE_NAMES
+
+CALIBRATION_FILE = 'calibration.json'
+MODEL_IDS = ['linear_regression', 'random_forest', 'xgboost']
+
+COVERAGE_LEVELS = (0.8, 0.9, 0.95)
+DEFAULT_COVERAGE = 0.9
+
+# Predicted-grade bands (0-20 scale) for the random forest tree spread
+SPREAD_EDGES = [8, 10, 12, 14]
+
+# Risk bucket boundaries on the 0-20 scale (see scoring.risk_level_for)
+RISK_BOUNDS = (10, 14)
+
+
+def conformal_quantile(scores, coverage):
+    """Split-conformal quantile: the ceil((n + 1) * coverage)-th smallest score"""
+    scores = np.sort(np.asarray(scores, dtype=float))
+    k = math.ceil((len(scores) + 1) * coverage)
+    return float(scores[min(k, len(scores)) - 1])
+
+
+def to_grades(scaled, grade_scaler):
+    """Scaled model output or target -> 0-20 grades"""
+    return np.clip(grade_scaler.inverse_transform(np.asarray(scaled).reshape(-1, 1)).ravel(), 0, 20)
+
+
+def tree_spread_table(model, X, grade_scaler):
+    """Mean standard deviation across trees per predicted-grade band (0-20 scale)"""
+    per_tree = np.stack([tree.predict(X.to_numpy(dtype=float)) for tree in model.estimators_])
+    spread = per_tree.std(axis=0) / grade_scaler.scale_[0]
+    bands = np.searchsorted(SPREAD_EDGES, to_grades(per_tree.mean(axis=0), grade_scaler), side='right')
+    overall = float(spread.mean())
+    return [
+        round(float(spread[bands == b].mean()) if np.any(bands == b) else overall, 4)
+        for b in range(len(SPREAD_EDGES) + 1)
+    ]
+
+
+def calibrate(model_id, model, X_cal, y_cal, grade_scaler, X_spread=None):
+    """
+    Calibration entry for one model
+
+    X_cal/y_cal must be rows the model was not fitted on (y_cal scaled like
+    the training target). X_spread, used only for the random forest spread
+    table, needs no labels and defaults to X_cal.
+    """
+    X_cal = X_cal[FEATURE_NAMES]
+    predicted = to_grades(model.predict(X_cal), grade_scaler)
+    residuals = to_grades(y_cal, grade_scaler) - predicted
+    scores = np.abs(residuals)
+
+    entry = {
+        'samples': len(residuals),
+        'residuals': [round(float(r), 3) for r in np.sort(residuals)]
+    }
+    if model_id == 'random_forest':
+        table = tree_spread_table(model, (X_spread if X_spread is not None else X_cal)[FEATURE_NAMES],
+                                  grade_scaler)
+        entry['tree_spread'] = {'edges': SPREAD_EDGES, 'mean_spread': table}
+        scores = scores / spread_for(entry, predicted)
+    entry['quantiles'] = {str(c): round(conformal_quantile(scores, c), 4) for c in COVERAGE_LEVELS}
+    return entry
+
+
+def spread_for(entry, final_grades):
+    """Band spread for each predicted grade, or ones for models without a table"""
+    table = entry.get('tree_spread')
+    if table is None:
+        return np.ones(len(final_grades))
+    spread = np.asarray(table['mean_spread'])
+    return np.maximum(spread[np.searchsorted(table['edges'], final_grades, side='right')], 1e-3)
+
+
+def prediction_intervals(entry, final_grades, coverage=DEFAULT_COVERAGE):
+    """(lower, upper) arrays on the 0-20 scale"""
+    final_grades = np.asarray(final_grades, dtype=float)
+    half_width = entry['quantiles'][str(coverage)] * spread_for(entry, final_grades)
+    return np.clip(final_grades - half_width, 0, 20), np.clip(final_grades + half_width, 0, 20)
+
+
+def risk_probabilities(entry, final_grades):
+    """
+    P(High), P(Medium), P(Low) per grade, from the empirical residual CDF
+
+    The true grade is the prediction plus a residual drawn from the
+    calibration residuals.
+    """
+    residuals = np.asarray(entry['residuals'])
+    final_grades = np.asarray(final_grades, dtype=float)
+    below = [np.searchsorted(residuals, bound - final_grades, side='left') / len(residuals)
+             for bound in RISK_BOUNDS]
+    return below[0], below[1] - below[0], 1 - below[1]
+
+
+def risk_confidence(entry, final_grades):
+    """Probability (0-100) that each grade's true risk bucket is the predicted one"""
+    final_grades = np.asarray(final_grades, dtype=float)
+    probabilities = np.column_stack(risk_probabilities(entry, final_grades))
+    chosen = np.searchsorted(RISK_BOUNDS, final_grades, side='right')
+    return probabilities[np.arange(len(final_grades)), chosen] * 100
+
+
+def save_calibration(results, path=CALIBRATION_FILE):
+    """Merge results into the calibration file (atomic replace)"""
+    existing = load_calibration(path)
+    existing.update(results)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(existing, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def load_calibration(path=CALIBRATION_FILE):
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+if __name__ == '__main__':
+    import pandas as pd
+    from sklearn.model_selection import train_test_split
+
+    df = pd.read_csv('student-mat.csv', sep=';')
+    grade_scaler = joblib.load('grade_scaler.pkl')
+    y_scaled = grade_scaler.transform(df[['G3']].values.reshape(-1, 1))
+    _, X_test, _, y_test = train_test_split(df[FEATURE_NAMES], y_scaled, test_size=0.2, random_state=42)
+    save_calibration({
+        model_id: calibrate(model_id, joblib.load(f'{model_id}_model.pkl'), X_test, y_test,
+                            grade_scaler, X_spread=df[FEATURE_NAMES])
+        for model_id in MODEL_IDS if os.path.exists(f'{model_id}_model.pkl')
+    })
+    print(f"Calibration saved: {CALIBRATION_FILE}")
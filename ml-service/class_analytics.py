@@ -0,0 +1,137 @@
+"""
+Class analytics computed with SQL aggregation and cached per data version
+"""
+
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+from database import get_db_connection
+
+# Cheap O(1) probe: any grade/student change or new prediction bumps one of these
+VERSION_QUERY = """
+    SELECT
+        (SELECT COALESCE(MAX(id), 0) FROM student_changes) AS last_change,
+        (SELECT COALESCE(MAX(id), 0) FROM predictions) AS last_prediction,
+        (SELECT COALESCE(MAX(id), 0) FROM grades) AS last_grade
+"""
+
+OVERALL_QUERY = """
+    SELECT
+        (SELECT COUNT(*) FROM students) AS total_students,
+        ROUND(AVG(score), 2) AS class_average,
+        COUNT(*) AS total_grades
+    FROM grades
+"""
+
+SUBJECT_QUERY = """
+    SELECT
+        subject,
+        ROUND(AVG(score), 2) AS average_score,
+        COUNT(DISTINCT student_id) AS student_count,
+        MAX(score) AS highest_score,
+        MIN(score) AS lowest_score
+    FROM grades
+    GROUP BY subject
+    ORDER BY subject
+"""
+
+# Latest prediction per student, bucketed by risk and by 10-point grade bin
+LATEST_PREDICTIONS_QUERY = """
+    SELECT
+        p.risk_level,
+        LEAST(FLOOR(p.predicted_grade / 10), 9) AS grade_bin,
+        COUNT(*) AS count
+    FROM predictions p
+    INNER JOIN (
+        SELECT student_id, MAX(id) AS max_id
+        FROM predictions
+        GROUP BY student_id
+    ) latest ON p.id = latest.max_id
+    GROUP BY p.risk_level, grade_bin
+"""
+
+HISTOGRAM_BINS = [f"{low}-{low + 10}" for low in range(0, 100, 10)]
+
+_cache = {'version': None, 'payload': None, 'computed_at': 0.0}
+_cache_lock = threading.Lock()
+
+
+def compute_class_analytics(cursor):
+    """Run the aggregate queries and build the analytics payload"""
+    cursor.execute(OVERALL_QUERY)
+    overall = cursor.fetchone()
+
+    cursor.execute(SUBJECT_QUERY)
+    by_subject = [
+        {
+            'subject': row['subject'],
+            'average_score': float(row['average_score'] or 0),
+            'student_count': int(row['student_count']),
+            'highest_score': float(row['highest_score']),
+            'lowest_score': float(row['lowest_score'])
+        }
+        for row in cursor.fetchall()
+    ]
+
+    cursor.execute(LATEST_PREDICTIONS_QUERY)
+    risk_counts = {'High': 0, 'Medium': 0, 'Low': 0}
+    histogram = np.zeros(len(HISTOGRAM_BINS), dtype=int)
+    for row in cursor.fetchall():
+        risk_counts[row['risk_level']] += int(row['count'])
+        histogram[int(row['grade_bin'])] += int(row['count'])
+
+    return {
+        'overall': {
+            'total_students': int(overall['total_students'] or 0),
+            'class_average': float(overall['class_average'] or 0),
+            'total_grades': int(overall['total_grades'] or 0),
+            'at_risk_count': risk_counts['High'] + risk_counts['Medium']
+        },
+        'by_subject': by_subject,
+        'risk_distribution': [
+            {'risk_level': level, 'count': count} for level, count in risk_counts.items()
+        ],
+        'predicted_grade_histogram': [
+            {'bin': label, 'count': int(count)} for label, count in zip(HISTOGRAM_BINS, histogram)
+        ],
+        'computed_at': datetime.now().isoformat(timespec='seconds')
+    }
+
+
+def get_class_analytics(ttl=300):
+    """
+    Return (payload, cached) for the class analytics
+
+    The payload is reused while the data version is unchanged and it is
+    younger than ttl seconds; otherwise the aggregates are recomputed.
+    """
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(VERSION_QUERY)
+        row = cursor.fetchone()
+        version = (row['last_change'], row['last_prediction'], row['last_grade'])
+
+        with _cache_lock:
+            fresh = time.time() - _cache['computed_at'] < ttl
+            if _cache['version'] == version and fresh:
+                cursor.close()
+                return _cache['payload'], True
+
+        payload = compute_class_analytics(cursor)
+        cursor.close()
+    finally:
+        conn.close()
+
+    with _cache_lock:
+        _cache.update(version=version, payload=payload, computed_at=time.time())
+    return payload, False
+
+
+def invalidate_class_analytics():
+    """Drop the cached payload (called after scoring passes)"""
+    with _cache_lock:
+        _cache.update(version=None, payload=None, computed_at=0.0)
@@ -0,0 +1,215 @@
+"""
+Cohort percentile index
+Keeps each model's roster predictions in a sorted array so percentile rank
+and top-k / bottom-k lookups are a binary search instead of a scan and sort.
+The index is replaced after a full scoring pass and patched after a
+changed-only pass. Requests only ever read an index that already exists:
+the first lookup starts a background build from the roster, and a failed
+build (e.g. MySQL down) is retried with exponential backoff instead of on
+every request.
+"""
+
+import threading
+import time
+from bisect import bisect_left, bisect_right
+
+import joblib
+import numpy as np
+
+from database import get_db_connection
+from score_roster import load_feature_rows, score_students
+from scoring import risk_level_for
+
+
+class CohortIndex:
+    """Predicted grades (0-100) of one cohort, sorted ascending"""
+
+    def __init__(self, ids=(), grades=()):
+        grades = np.asarray(grades, dtype=float)
+        order = np.argsort(grades, kind='stable')
+        self.grades = grades[order].tolist()
+        self.ids = [ids[i] for i in order]
+        self.by_id = dict(zip(self.ids, self.grades))
+
+    def __len__(self):
+        return len(self.grades)
+
+    def copy(self):
+        clone = CohortIndex()
+        clone.grades, clone.ids, clone.by_id = list(self.grades), list(self.ids), dict(self.by_id)
+        return clone
+
+    def _position(self, student_id):
+        # Equal grades are adjacent, so only the tied run is scanned
+        pos = bisect_left(self.grades, self.by_id[student_id])
+        while self.ids[pos] != student_id:
+            pos += 1
+        return pos
+
+    def update(self, scored, removed=()):
+        """Apply {student_id: grade} and drop removed ids, O(log n) search each"""
+        for student_id in list(scored) + list(removed):
+            if student_id in self.by_id:
+                pos = self._position(student_id)
+                del self.grades[pos]
+                del self.ids[pos]
+                del self.by_id[student_id]
+        for student_id, grade in scored.items():
+            pos = bisect_right(self.grades, grade)
+            self.grades.insert(pos, grade)
+            self.ids.insert(pos, student_id)
+            self.by_id[student_id] = grade
+
+    def percentile(self, grade):
+        """Share of the cohort below grade, counting ties as half"""
+        if not self.grades:
+            return None
+        below = bisect_left(self.grades, grade)
+        ties = bisect_right(self.grades, grade) - below
+        return round(100 * (below + 0.5 * ties) / len(self.grades), 1)
+
+    def _entries(self, positions):
+        return [
+            {
+                'student_id': self.ids[i],
+                'predicted_grade': round(self.grades[i], 2),
+                'risk_level': risk_level_for(self.grades[i] / 5)
+            }
+            for i in positions
+        ]
+
+    def bottom(self, k):
+        """The k lowest predicted grades, most at risk first"""
+        return self._entries(range(min(k, len(self))))
+
+    def top(self, k):
+        """The k highest predicted grades, best first"""
+        return self._entries(range(len(self) - 1, max(len(self) - k, 0) - 1, -1))
+
+
+# A failed background build is retried after WARM_RETRY_SECONDS, doubling
+# with each consecutive failure up to WARM_RETRY_MAX_SECONDS
+WARM_RETRY_SECONDS = 30
+WARM_RETRY_MAX_SECONDS = 900
+
+_indexes = {}
+_building = set()
+_failures = {}  # model_name -> (consecutive failures, monotonic time of the last one, error)
+_indexes_lock = threading.Lock()
+
+
+def build_cohort(model_name):
+    """Score the roster in memory (no writes) and index the results"""
+    model = joblib.load(f'{model_name}_model.pkl')
+    grade_scaler = joblib.load('grade_scaler.pkl')
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor(dictionary=True)
+        ids, features = load_feature_rows(cursor)
+        cursor.close()
+    finally:
+        conn.close()
+
+    if not ids:
+        return CohortIndex()
+    _, predicted_grades, _ = score_students(model, grade_scaler, features)
+    return CohortIndex(ids, predicted_grades)
+
+
+def _retry_in(model_name):
+    """Seconds until a failed build may be retried, 0 if it may start now (caller holds the lock)"""
+    failure = _failures.get(model_name)
+    if failure is None:
+        return 0
+    count, failed_at, _ = failure
+    delay = min(WARM_RETRY_SECONDS * 2 ** (count - 1), WARM_RETRY_MAX_SECONDS)
+    return max(0.0, failed_at + delay - time.monotonic())
+
+
+def _build_in_background(model_name):
+    try:
+        index = build_cohort(model_name)
+    except Exception as e:
+        print(f"Cohort index build failed for {model_name}: {e}")
+        with _indexes_lock:
+            count = _failures.get(model_name, (0,))[0] + 1
+            _failures[model_name] = (count, time.monotonic(), str(e))
+            _building.discard(model_name)
+        return
+    with _indexes_lock:
+        # A roster pass that finished meanwhile holds fresher grades
+        _indexes.setdefault(model_name, index)
+        _failures.pop(model_name, None)
+        _building.discard(model_name)
+
+
+def warm_cohort(model_name):
+    """
+    Start building the model's index on a background thread
+
+    Does nothing if the index exists, is already being built or the last
+    build failed less than the backoff ago. Returns True if a build started.
+    """
+    with _indexes_lock:
+        if model_name in _indexes or model_name in _building or _retry_in(model_name) > 0:
+            return False
+        _building.add(model_name)
+    threading.Thread(target=_build_in_background, args=(model_name,),
+                     name=f'cohort-{model_name}', daemon=True).start()
+    return True
+
+
+def get_cohort(model_name):
+    """
+    Return the model's index, or None if it has not been built yet
+
+    Never touches the database on the caller's thread: a missing index is
+    built in the background (see warm_cohort) for later requests.
+    """
+    with _indexes_lock:
+        index = _indexes.get(model_name)
+    if index is None:
+        warm_cohort(model_name)
+    return index
+
+
+def cohort_status(model_name):
+    """'ready', 'building' or 'failed' plus the last build error and seconds until the retry"""
+    with _indexes_lock:
+        if model_name in _indexes:
+            return {'state': 'ready'}
+        if model_name in _building:
+            return {'state': 'building'}
+        failure = _failures.get(model_name)
+        if failure is None:
+            return {'state': 'building'}
+        return {'state': 'failed', 'error': failure[2], 'retry_in': round(_retry_in(model_name), 1)}
+
+
+def cached_cohorts():
+    """Indexes built so far, by model name"""
+    with _indexes_lock:
+        return dict(_indexes)
+
+
+def set_cohort(model_name, ids, grades):
+    """Replace the model's index after a full roster pass"""
+    with _indexes_lock:
+        _indexes[model_name] = CohortIndex(ids, grades)
+        _failures.pop(model_name, None)
+
+
+def update_cohort(model_name, scored, removed=()):
+    """
+    Patch the model's index after a changed-only pass
+
+    Does nothing if the index has not been built yet: the background build
+    reads current data anyway. The patch is applied to a copy so
+    requests holding the previous index never see a half-updated array.
+    """
+    with _indexes_lock:
+        index = _indexes.get(model_name)
+        if index is not None:
+            patched = index.copy()
+            patched.update(scored, removed)
+            _indexes[model_name] = patched
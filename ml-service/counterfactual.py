@@ -0,0 +1,153 @@
+"""
+Counterfactual search: the smallest actionable changes that reach a risk level
+Candidates are every combination of study time, absences and G2 between
+the student's current value and the end of its domain in the improving
+direction. They are ranked by cost (change per feature divided by its
+spread in the training data) and scored in large batches with one
+predict() call each. Candidates that change every feature at least as
+much as an answer already found are pruned before scoring, and the
+search stops once enough answers are found. Later candidates cost more
+and so cannot beat them.
+"""
+
+import math
+import time
+
+import numpy as np
+import pandas as pd
+
+from scoring import FEATURE_NAMES, FEATURE_DEFAULTS, scale_predictions, risk_level_for
+
+# Highest absences in the UCI student data's domain (0-93). Also the size
+# of the absences axis of the search, so it must stay bounded.
+MAX_ABSENCES = 93
+
+# feature -> (lower bound, upper bound, improving direction)
+ACTIONABLE_FEATURES = {
+    'studytime': (1, 4, 1),
+    'absences': (0, MAX_ABSENCES, -1),
+    'G2': (0, 20, 1),
+}
+
+# Lowest 0-20 grade in each target risk level
+TARGET_GRADES = {'Medium': 10, 'Low': 14}
+
+# Cost of one unit of change when no training spread is supplied
+DEFAULT_SCALES = {'studytime': 0.84, 'absences': 8.42, 'G2': 3.76}
+
+
+def feature_scales(X_train):
+    """Training standard deviation of each actionable feature"""
+    if X_train is None:
+        return dict(DEFAULT_SCALES)
+    return {f: max(float(X_train[f].std()), 1e-6) for f in ACTIONABLE_FEATURES}
+
+
+def check_student(student):
+    """
+    Raise ValueError unless every feature is a finite, non-negative number
+    and absences are at most MAX_ABSENCES
+    """
+    for feature in FEATURE_NAMES:
+        value = student.get(feature, FEATURE_DEFAULTS[feature])
+        if not math.isfinite(value) or value < 0:
+            raise ValueError(f'{feature} must be a finite, non-negative number')
+    if student.get('absences', 0) > MAX_ABSENCES:
+        raise ValueError(f'absences must be at most {MAX_ABSENCES}')
+
+
+def candidate_values(current):
+    """Every reachable value combination, shape (n, len(ACTIONABLE_FEATURES))"""
+    axes = []
+    for feature, (low, high, direction) in ACTIONABLE_FEATURES.items():
+        value = int(round(current[feature]))
+        if direction > 0:
+            axes.append(np.arange(value, max(value, high) + 1))
+        else:
+            axes.append(np.arange(value, min(value, low) - 1, -1))
+    return np.stack(np.meshgrid(*axes, indexing='ij'), axis=-1).reshape(-1, len(axes))
+
+
+def dominated(deltas, found):
+    """Rows of deltas that change every feature at least as much as some found answer"""
+    if not len(found):
+        return np.zeros(len(deltas), dtype=bool)
+    return np.any(np.all(deltas[:, None, :] >= np.asarray(found)[None, :, :], axis=2), axis=1)
+
+
+def search_counterfactuals(model, grade_scaler, student, target_risk='Low', scales=None,
+                           limit=5, batch_size=512, max_marks=100):
+    """
+    Minimal-cost changes that bring a student to target_risk or better
+
+    Returns a dict with the current prediction, up to limit answers ranked
+    by cost (none of which changes every feature more than another) and
+    search statistics. Raises ValueError for inputs check_student() rejects.
+    """
+    start = time.perf_counter()
+    scales = scales or DEFAULT_SCALES
+    target_grade = TARGET_GRADES[target_risk]
+    current = {f: float(student.get(f, FEATURE_DEFAULTS[f])) for f in FEATURE_NAMES}
+    check_student(current)
+    actionable = list(ACTIONABLE_FEATURES)
+    columns = [FEATURE_NAMES.index(f) for f in actionable]
+    base = np.array([current[f] for f in FEATURE_NAMES])
+
+    def score(values):
+        rows = np.repeat(base[None, :], len(values), axis=0)
+        rows[:, columns] = values
+        return scale_predictions(model.predict(pd.DataFrame(rows, columns=FEATURE_NAMES)),
+                                 grade_scaler, max_marks)
+
+    final, predicted = score(np.array([[current[f] for f in actionable]]))
+    result = {
+        'current': {'predicted_grade': f"{predicted[0]:.2f}", 'risk_level': risk_level_for(final[0])},
+        'target_risk': target_risk,
+        'already_at_target': bool(final[0] >= target_grade),
+        'counterfactuals': []
+    }
+    if result['already_at_target']:
+        result.update(search_space=0, evaluated=0, elapsed_ms=round((time.perf_counter() - start) * 1000, 2))
+        return result
+
+    values = candidate_values(current)
+    deltas = np.abs(values - np.array([current[f] for f in actionable]))
+    costs = (deltas / np.array([scales[f] for f in actionable])).sum(axis=1)
+    # Cheapest first; equal costs prefer fewer changed features
+    order = np.lexsort(((deltas > 0).sum(axis=1), costs))
+    order = order[deltas[order].sum(axis=1) > 0]
+
+    found, answers, evaluated = [], [], 0
+    for i in range(0, len(order), batch_size):
+        chunk = order[i:i + batch_size]
+        chunk = chunk[~dominated(deltas[chunk], found)]
+        if not len(chunk):
+            continue
+        final, predicted = score(values[chunk])
+        evaluated += len(chunk)
+        for j in np.flatnonzero(final >= target_grade):
+            idx = chunk[j]
+            if dominated(deltas[idx][None, :], found)[0]:
+                continue
+            found.append(deltas[idx])
+            answers.append({
+                'changes': {
+                    f: {'from': current[f], 'to': float(values[idx][k])}
+                    for k, f in enumerate(actionable) if deltas[idx][k]
+                },
+                'predicted_grade': f"{predicted[j]:.2f}",
+                'risk_level': risk_level_for(final[j]),
+                'cost': round(float(costs[idx]), 3)
+            })
+            if len(answers) >= limit:
+                break
+        if len(answers) >= limit:
+            break
+
+    result.update(
+        counterfactuals=answers,
+        search_space=int(len(values)),
+        evaluated=evaluated,
+        elapsed_ms=round((time.perf_counter() - start) * 1000, 2)
+    )
+    return result
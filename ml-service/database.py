@@ -0,0 +1,18 @@
+"""
+MySQL connection helpers shared by the Flask service and offline jobs
+"""
+
+import mysql.connector
+
+# Database configuration
+DB_CONFIG = {
+    'host': 'localhost',
+    'user': 'root',
+    'password': 'Nadaf@123',
+    'database': 'student_data'
+}
+
+
+def get_db_connection():
+    """Create MySQL connection"""
+    return mysql.connector.connect(**DB_CONFIG)
@@ -0,0 +1,181 @@
+"""
+Streaming feature-drift monitor
+Every scored row is dropped into a fixed set of bins per feature (bin
+edges and reference proportions come from the training data and are saved
+in drift_reference.json at training time). Updating is one searchsorted
+per feature and memory is a few counters per bin, however many rows are
+scored. PSI and a binned Kolmogorov-Smirnov statistic against the
+reference are recomputed at most once per interval, so drift shows up
+without storing or rescanning request logs.
+
+Usage: python drift_monitor.py      (rebuild drift_reference.json from x_train.pkl)
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+import joblib
+import numpy as np
+
+from scoring import FEATURE_NAMES
+
+REFERENCE_FILE = 'drift_reference.json'
+
+# Bins per feature; discrete features with fewer distinct values get one bin each
+REFERENCE_BINS = 10
+
+# Usual PSI reading: below 0.1 stable, 0.1-0.25 moderate shift, above that significant
+PSI_THRESHOLDS = (0.1, 0.25)
+
+# Floor for empty bins so PSI stays finite
+EPSILON = 1e-4
+
+
+def bin_edges(values, bins=REFERENCE_BINS):
+    """Interior bin edges: midpoints between values if few distinct, else quantiles"""
+    distinct = np.unique(values)
+    if len(distinct) <= bins:
+        return (distinct[:-1] + distinct[1:]) / 2
+    return np.unique(np.quantile(values, np.linspace(0, 1, bins + 1)[1:-1]))
+
+
+def build_reference(X_train, bins=REFERENCE_BINS):
+    """Bin edges and reference proportions for every feature"""
+    features = {}
+    for feature in FEATURE_NAMES:
+        values = X_train[feature].to_numpy(dtype=float)
+        edges = bin_edges(values, bins)
+        counts = np.bincount(np.searchsorted(edges, values, side='right'), minlength=len(edges) + 1)
+        features[feature] = {
+            'edges': [round(float(e), 4) for e in edges],
+            'proportions': [round(float(p), 6) for p in counts / counts.sum()]
+        }
+    return {
+        'samples': len(X_train),
+        'computed_at': datetime.now().isoformat(timespec='seconds'),
+        'features': features
+    }
+
+
+def save_reference(reference, path=REFERENCE_FILE):
+    """Write the reference file (atomic replace)"""
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(reference, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def load_reference(path=REFERENCE_FILE):
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def psi(expected, actual):
+    """Population stability index between two proportion vectors"""
+    expected = np.maximum(expected, EPSILON)
+    actual = np.maximum(actual, EPSILON)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def binned_ks(expected, actual):
+    """Largest gap between the two cumulative distributions at the bin edges"""
+    return float(np.max(np.abs(np.cumsum(expected) - np.cumsum(actual))))
+
+
+def drift_status(value):
+    if value < PSI_THRESHOLDS[0]:
+        return 'stable'
+    if value < PSI_THRESHOLDS[1]:
+        return 'moderate'
+    return 'significant'
+
+
+class DriftMonitor:
+    """
+    Per-feature bin counters over two rotating windows
+
+    Statistics cover the current and the previous window, so old traffic
+    ages out after at most two windows while a fresh window never starts
+    empty.
+    """
+
+    def __init__(self, reference, window=86400, interval=60, min_samples=50):
+        self.reference = reference
+        self.window = window
+        self.interval = interval
+        self.min_samples = min_samples
+        self._edges = [np.asarray(reference['features'][f]['edges']) for f in FEATURE_NAMES]
+        self._expected = [np.asarray(reference['features'][f]['proportions']) for f in FEATURE_NAMES]
+        self._current = self._empty()
+        self._previous = self._empty()
+        self._window_start = time.time()
+        self._lock = threading.Lock()
+        self._report = None
+        self._report_at = 0.0
+        self.observed = 0
+
+    def _empty(self):
+        return [np.zeros(len(edges) + 1, dtype=np.int64) for edges in self._edges]
+
+    def _rotate(self, now):
+        if now - self._window_start >= self.window:
+            # A gap longer than two windows leaves nothing worth keeping
+            self._previous = self._current if now - self._window_start < 2 * self.window else self._empty()
+            self._current = self._empty()
+            self._window_start = now
+
+    def observe(self, X):
+        """Count a batch of rows (DataFrame with FEATURE_NAMES columns)"""
+        values = np.asarray(X[FEATURE_NAMES], dtype=float)
+        if not len(values):
+            return
+        bins = [np.searchsorted(edges, values[:, j], side='right') for j, edges in enumerate(self._edges)]
+        with self._lock:
+            self._rotate(time.time())
+            for counts, feature_bins in zip(self._current, bins):
+                np.add.at(counts, feature_bins, 1)
+            self.observed += len(values)
+
+    def report(self, force=False):
+        """PSI/KS per feature, recomputed at most once per interval"""
+        now = time.time()
+        with self._lock:
+            if not force and self._report is not None and now - self._report_at < self.interval:
+                return self._report
+            self._rotate(now)
+            windows = [c + p for c, p in zip(self._current, self._previous)]
+
+        samples = int(windows[0].sum())
+        features = {}
+        for feature, expected, counts in zip(FEATURE_NAMES, self._expected, windows):
+            entry = {'psi': None, 'ks': None, 'status': 'insufficient_data'}
+            if samples >= self.min_samples:
+                actual = counts / samples
+                value = psi(expected, actual)
+                entry = {'psi': round(value, 4), 'ks': round(binned_ks(expected, actual), 4),
+                         'status': drift_status(value)}
+            features[feature] = entry
+
+        drifted = [f for f, e in features.items() if e['status'] == 'significant']
+        report = {
+            'samples': samples,
+            'observed_total': self.observed,
+            'window_seconds': self.window,
+            'reference_samples': self.reference['samples'],
+            'computed_at': datetime.fromtimestamp(now).isoformat(timespec='seconds'),
+            'drifted_features': drifted,
+            'features': features
+        }
+        with self._lock:
+            self._report, self._report_at = report, now
+        return report
+
+
+if __name__ == '__main__':
+    save_reference(build_reference(joblib.load('x_train.pkl')))
+    print(f"Drift reference saved: {REFERENCE_FILE}")
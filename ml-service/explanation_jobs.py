@@ -0,0 +1,148 @@
+"""
+Background explanation jobs
+SHAP for tree models can take far longer than the prediction, so it runs
+in a small bounded worker pool. Callers wait up to a deadline; if the
+explanation is not ready the job keeps running and its result can be
+fetched later by token.
+
+Each job is also a JSON record, explanations/<token>.json, written when it
+is queued and again when it finishes, so any gunicorn worker sharing the
+directory can answer GET /explanations/<token> for a job another worker
+ran. Records are deleted once they are older than the time-to-live.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+EXPLANATION_DIR = 'explanations'
+
+TOKEN = re.compile(r'^[0-9a-f]{32}$')
+
+
+class ExplanationJobs:
+    """Bounded pool of explanation jobs addressable by token"""
+
+    def __init__(self, max_workers=2, max_pending=32, max_results=1000, ttl=3600,
+                 result_dir=EXPLANATION_DIR):
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='explain')
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.max_results = max_results
+        self.ttl = ttl
+        self.result_dir = result_dir
+        self.pending = 0
+        self.jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Other workers' results live here too: only expired records are removed
+        os.makedirs(result_dir, exist_ok=True)
+        self.sweep()
+
+    def submit(self, fn, *args):
+        """
+        Queue fn(*args) and return its token, or None when the queue is full
+
+        Refusing work beyond max_pending keeps a burst of slow explanations
+        from building an unbounded backlog. fn must return something JSON
+        serialisable, since other workers read the result from disk.
+        """
+        self.sweep()
+        with self._lock:
+            if self.pending >= self.max_pending:
+                return None
+            self.pending += 1
+            token = uuid.uuid4().hex
+            self._write(token, {'status': 'pending', 'result': None})
+            future = self.pool.submit(self._run, token, fn, args)
+            self.jobs[token] = future
+            # Forget the oldest finished jobs once the store is full; their
+            # records stay on disk until the TTL
+            while len(self.jobs) > self.max_results:
+                oldest, oldest_future = next(iter(self.jobs.items()))
+                if not oldest_future.done():
+                    break
+                del self.jobs[oldest]
+        future.add_done_callback(self._finished)
+        return token
+
+    def _run(self, token, fn, args):
+        # The record is written before the future resolves, so a caller that
+        # waited on the result never reads a stale 'pending' record
+        try:
+            result = fn(*args)
+        except Exception as e:
+            self._write(token, {'status': 'failed', 'result': str(e)})
+            raise
+        try:
+            self._write(token, {'status': 'done', 'result': result})
+        except (TypeError, ValueError) as e:
+            print(f"Explanation {token} could not be stored: {str(e)}")
+        return result
+
+    def _finished(self, future):
+        with self._lock:
+            self.pending -= 1
+
+    def _record_path(self, token):
+        return os.path.join(self.result_dir, f'{token}.json')
+
+    def _write(self, token, record):
+        path = self._record_path(token)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(record, f)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _read(self, token):
+        try:
+            with open(self._record_path(token), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def wait(self, token, timeout):
+        """Return the result if it finishes within timeout seconds, else None"""
+        try:
+            return self.jobs[token].result(timeout=timeout)
+        except FutureTimeout:
+            return None
+
+    def status(self, token):
+        """Return ('pending' | 'done' | 'failed' | 'unknown', result)"""
+        with self._lock:
+            future = self.jobs.get(token)
+        if future is not None:
+            if not future.done():
+                return 'pending', None
+            if future.exception() is not None:
+                return 'failed', str(future.exception())
+            return 'done', future.result()
+
+        # Queued by another worker, or forgotten here after max_results
+        if not TOKEN.match(token):
+            return 'unknown', None
+        record = self._read(token)
+        if record is None:
+            return 'unknown', None
+        return record['status'], record['result']
+
+    def sweep(self):
+        """Delete records and partial files older than the TTL"""
+        cutoff = time.time() - self.ttl
+        for name in os.listdir(self.result_dir):
+            path = os.path.join(self.result_dir, name)
+            try:
+                if os.path.getmtime(path) <= cutoff:
+                    os.remove(path)
+            except OSError:
+                pass  # another worker removed it first
@@ -0,0 +1,150 @@
+"""
+Global feature importance computed once per trained model
+Explains every training row in one vectorized SHAP call per model (models
+run in parallel processes) and stores mean |SHAP| per feature plus
+dependence-curve samples in feature_importance.json next to the models,
+so serving the importance chart never runs an explainer.
+
+Usage: python feature_importance.py [model_id ...]
+"""
+
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import joblib
+import numpy as np
+import shap
+
+from scoring import FEATURE_NAMES
+
+IMPORTANCE_FILE = 'feature_importance.json'
+MODEL_IDS = ['linear_regression', 'random_forest', 'xgboost']
+
+# Points kept per dependence curve, spread evenly over the feature's range
+DEPENDENCE_POINTS = 50
+
+FEATURE_DISPLAY_NAMES = {
+    'age': 'Age',
+    'failures': 'Past Failures',
+    'absences': 'Absences',
+    'studytime': 'Study Time',
+    'G1': 'First Period Grade',
+    'G2': 'Second Period Grade'
+}
+
+
+def shap_matrix(model_id, model, X_train):
+    """SHAP values for every training row, shape (rows, features)"""
+    if model_id == 'linear_regression':
+        explainer = shap.LinearExplainer(model, X_train)
+    else:
+        explainer = shap.TreeExplainer(model)
+    return np.asarray(explainer.shap_values(X_train)).reshape(len(X_train), -1)
+
+
+def dependence_samples(values, shap_values, points=DEPENDENCE_POINTS):
+    """Evenly spaced (value, shap) pairs along the sorted feature values"""
+    order = np.argsort(values, kind='stable')
+    picked = np.unique(order[np.linspace(0, len(order) - 1, min(points, len(order))).astype(int)])
+    picked = picked[np.argsort(values[picked], kind='stable')]
+    return {
+        'values': [round(float(v), 3) for v in values[picked]],
+        'shap_values': [round(float(v), 5) for v in shap_values[picked]]
+    }
+
+
+def global_importance(model_id, model, X_train):
+    """
+    Summarise one model's SHAP matrix
+
+    factors uses the same shape as the per-prediction explanation so
+    FeatureImportanceChart can render it unchanged; impact is the
+    direction of the feature's effect (higher value -> higher grade).
+    """
+    X = X_train[FEATURE_NAMES].to_numpy(dtype=float)
+    shap_values = shap_matrix(model_id, model, X_train[FEATURE_NAMES])
+    mean_abs = np.abs(shap_values).mean(axis=0)
+    shares = mean_abs / mean_abs.sum() * 100 if mean_abs.sum() > 0 else mean_abs
+
+    # Correlation sign between value and contribution; constant columns count as positive
+    centered_x = X - X.mean(axis=0)
+    direction = np.sign((centered_x * (shap_values - shap_values.mean(axis=0))).sum(axis=0))
+
+    order = np.argsort(-mean_abs)
+    factors = [
+        {
+            'factor': FEATURE_DISPLAY_NAMES[FEATURE_NAMES[i]],
+            'feature_name': FEATURE_NAMES[i],
+            'value': round(float(mean_abs[i]), 5),
+            'impact': 'negative' if direction[i] < 0 else 'positive',
+            'contribution_percentage': f"{shares[i]:.1f}%",
+            'shap_value': round(float(mean_abs[i]), 5)
+        }
+        for i in order
+    ]
+
+    return {
+        'model': model_id,
+        'samples': len(X),
+        'computed_at': datetime.now().isoformat(timespec='seconds'),
+        'factors': factors,
+        'dependence': {
+            feature: dependence_samples(X[:, j], shap_values[:, j])
+            for j, feature in enumerate(FEATURE_NAMES)
+        }
+    }
+
+
+def compute_importance(models, X_train, workers=None):
+    """Run global_importance() for {model_id: model} in parallel processes"""
+    with ProcessPoolExecutor(max_workers=workers or len(models)) as pool:
+        futures = {
+            model_id: pool.submit(global_importance, model_id, model, X_train)
+            for model_id, model in models.items()
+        }
+        return {model_id: future.result() for model_id, future in futures.items()}
+
+
+def save_importance(results, path=IMPORTANCE_FILE):
+    """Merge results into the importance file (atomic replace)"""
+    existing = load_importance(path)
+    existing.update(results)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(existing, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def load_importance(path=IMPORTANCE_FILE):
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def refresh_importance(model_ids=None):
+    """Recompute importance for saved models (e.g. after retraining)"""
+    X_train = joblib.load('x_train.pkl')
+    models = {
+        model_id: joblib.load(f'{model_id}_model.pkl')
+        for model_id in (model_ids or MODEL_IDS)
+        if os.path.exists(f'{model_id}_model.pkl')
+    }
+    if not models:
+        return {}
+    results = compute_importance(models, X_train)
+    save_importance(results)
+    return results
+
+
+if __name__ == '__main__':
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    results = refresh_importance(sys.argv[1:] or None)
+    for model_id, result in results.items():
+        print(f"\n{model_id}")
+        for factor in result['factors']:
+            print(f"  {factor['factor']:<22} {factor['contribution_percentage']:>6}  ({factor['impact']})")
+    print(f"\nSaved: {IMPORTANCE_FILE}")
@@ -0,0 +1,131 @@
+"""
+Materialized per-student feature rows
+The student_features table holds the ready-to-score six-feature row of
+every student, so scoring reads one indexed row (or one bulk scan) instead
+of re-deriving G1/G2 from the grade history each time. The grade and
+student API routes refresh a student's row after every write
+(app/lib/studentFeatures.ts); score_roster.py --changed-only refreshes the
+logged students again before scoring, which repairs any write-path refresh
+that failed. Students without a row yet are derived from their grades.
+
+REFRESH_FEATURES is the SQL twin of scoring.build_feature_row().
+
+Usage: python feature_store.py      (rebuild every student's row)
+"""
+
+import os
+import time
+
+import pandas as pd
+
+from database import get_db_connection
+from scoring import FEATURE_NAMES, FEATURE_DEFAULTS, build_feature_row
+
+# score / max_marks * 20 of the student's n-th most recent grade
+_NTH_GRADE = """(
+            SELECT g.score / COALESCE(NULLIF(g.max_marks, 0), 20) * 20
+            FROM grades g
+            WHERE g.student_id = s.id
+            ORDER BY g.date DESC, g.id DESC
+            LIMIT 1 OFFSET {offset}
+        )"""
+
+REFRESH_FEATURES = f"""
+    INSERT INTO student_features (student_id, age, failures, absences, studytime, g1, g2)
+    SELECT s.id,
+        COALESCE(NULLIF(s.age, 0), {FEATURE_DEFAULTS['age']}),
+        COALESCE(s.failures, {FEATURE_DEFAULTS['failures']}),
+        COALESCE(s.absences, {FEATURE_DEFAULTS['absences']}),
+        COALESCE(NULLIF(s.study_hours, 0), {FEATURE_DEFAULTS['studytime']}),
+        COALESCE({_NTH_GRADE.format(offset=0)}, {FEATURE_DEFAULTS['G1']}),
+        COALESCE({_NTH_GRADE.format(offset=1)}, {FEATURE_DEFAULTS['G2']})
+    FROM students s
+    {{where}}
+    ON DUPLICATE KEY UPDATE
+        age = VALUES(age),
+        failures = VALUES(failures),
+        absences = VALUES(absences),
+        studytime = VALUES(studytime),
+        g1 = VALUES(g1),
+        g2 = VALUES(g2)
+"""
+
+# Every requested student; feature columns are NULL for students without a row
+FEATURES_QUERY = """
+    SELECT s.id, f.age, f.failures, f.absences, f.studytime, f.g1 AS G1, f.g2 AS G2
+    FROM students s
+    LEFT JOIN student_features f ON f.student_id = s.id
+    {where}
+    ORDER BY s.id
+"""
+
+
+def _where(student_ids):
+    if student_ids is None:
+        return '', ()
+    placeholders = ', '.join(['%s'] * len(student_ids))
+    return f'WHERE s.id IN ({placeholders})', tuple(student_ids)
+
+
+def refresh_features(conn, student_ids=None):
+    """Recompute and store the rows of student_ids (every student if None); returns rows written"""
+    if student_ids is not None and not student_ids:
+        return 0
+    where, params = _where(student_ids)
+    cursor = conn.cursor()
+    try:
+        cursor.execute(REFRESH_FEATURES.format(where=where), params)
+        conn.commit()
+        return cursor.rowcount
+    finally:
+        cursor.close()
+
+
+def fetch_materialized(cursor, student_ids=None):
+    """
+    Read stored feature rows
+
+    Returns (ids, features DataFrame, missing): missing lists the students
+    that exist but have no stored row yet.
+    """
+    where, params = _where(student_ids)
+    cursor.execute(FEATURES_QUERY.format(where=where), params)
+
+    ids, rows, missing = [], [], []
+    for row in cursor.fetchall():
+        if row['age'] is None:
+            missing.append(row['id'])
+            continue
+        ids.append(row['id'])
+        rows.append([row[f] for f in FEATURE_NAMES])
+    return ids, pd.DataFrame(rows, columns=FEATURE_NAMES).astype(float), missing
+
+
+def report_features(student, grades):
+    """
+    Feature row for a report
+
+    Uses the stored row joined in by REPORT_STUDENT_QUERY (f_* columns) and
+    derives it from grades only for students without one.
+    """
+    if student.get('f_age') is None:
+        return build_feature_row(student, grades)
+    return {
+        'age': student['f_age'],
+        'failures': student['f_failures'],
+        'absences': student['f_absences'],
+        'studytime': student['f_studytime'],
+        'G1': float(student['f_G1']),
+        'G2': float(student['f_G2'])
+    }
+
+
+if __name__ == '__main__':
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    start = time.perf_counter()
+    conn = get_db_connection()
+    try:
+        written = refresh_features(conn)
+    finally:
+        conn.close()
+    print(f"Refreshed feature rows ({written} rows affected) in {time.perf_counter() - start:.2f}s")
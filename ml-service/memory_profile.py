@@ -0,0 +1,184 @@
+"""
+Memory footprint of a serving worker
+Estimates how much memory each component of the service holds (models,
+SHAP explainers, the SHAP background, in-process caches) so the largest
+one can be found without a heap profiler, and builds the smaller SHAP
+background used by the low-memory serving profile.
+
+MEMORY_PROFILE=low trades a little explanation accuracy for a smaller
+worker: the background is a float32 array of at most LOW_MEMORY_BACKGROUND
+training rows instead of the full DataFrame, and the model registry keeps
+only the most recently used models (LOW_MEMORY_BUDGET_MB) so models a
+worker no longer serves are dropped along with their explainers.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+MEMORY_PROFILES = ('standard', 'low')
+
+# Rows kept in the low-memory SHAP background
+LOW_MEMORY_BACKGROUND = 100
+
+# Registry budget (MB of pickled model) when MEMORY_PROFILE=low and
+# MODEL_MEMORY_BUDGET_MB is not set
+LOW_MEMORY_BUDGET_MB = 4
+
+# Libraries reported as loaded; their import cost is measured by
+# `python benchmark.py memory_footprint`
+HEAVY_LIBRARIES = ('numpy', 'pandas', 'sklearn', 'xgboost', 'shap', 'numba', 'reportlab')
+
+
+def memory_profile():
+    """Serving profile from MEMORY_PROFILE (standard | low)"""
+    profile = os.environ.get('MEMORY_PROFILE', 'standard').lower()
+    if profile not in MEMORY_PROFILES:
+        print(f"Warning: unknown MEMORY_PROFILE {profile!r}, using 'standard'")
+        return 'standard'
+    return profile
+
+
+def model_memory_budget_mb(profile):
+    """MODEL_MEMORY_BUDGET_MB if set, else the profile's default"""
+    default = LOW_MEMORY_BUDGET_MB if profile == 'low' else 512
+    return float(os.environ.get('MODEL_MEMORY_BUDGET_MB', default))
+
+
+def shap_background(X_train, profile, max_rows=LOW_MEMORY_BACKGROUND):
+    """
+    Background data for SHAP explainers
+
+    The standard profile uses the training DataFrame as is. The low profile
+    keeps a float32 array of at most max_rows rows, sampled with a fixed
+    seed so every worker explains against the same background.
+    """
+    if X_train is None or profile != 'low':
+        return X_train
+    background = np.asarray(X_train, dtype=np.float32)
+    if len(background) > max_rows:
+        rows = np.random.default_rng(0).choice(len(background), size=max_rows, replace=False)
+        background = background[np.sort(rows)]
+    return np.ascontiguousarray(background)
+
+
+def _state(obj):
+    """Attributes that hold an object's memory, for objects that are not containers"""
+    if hasattr(obj, 'save_raw'):
+        # xgboost Booster: the trees live in C++, the raw model is the same size
+        return obj.save_raw(raw_format='ubj')
+    if type(obj).__getstate__ is not object.__getstate__:
+        return obj.__getstate__()
+    if hasattr(obj, '__dict__'):
+        return vars(obj)
+    # Extension types (e.g. sklearn's Cython trees) expose their arrays when reduced
+    reduced = obj.__reduce_ex__(4)
+    return reduced[2] if isinstance(reduced, tuple) and len(reduced) > 2 else None
+
+
+def deep_size(obj, seen=None):
+    """
+    Approximate bytes held by obj and everything it references
+
+    Objects already in seen (id -> object) are not counted again, so one
+    seen dict shared across components attributes shared objects to the
+    first component that holds them. seen also keeps the temporary state
+    objects alive, so their ids cannot be reused while measuring.
+    """
+    if seen is None:
+        seen = {}
+    if id(obj) in seen:
+        return 0
+    seen[id(obj)] = obj
+
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes + (deep_size(obj.base, seen) if obj.base is not None else 0)
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        return int(np.sum(obj.memory_usage(deep=True)))
+    if isinstance(obj, (str, bytes, bytearray, int, float, bool, type(None))):
+        return sys.getsizeof(obj)
+    if isinstance(obj, type) or (callable(obj) and not hasattr(obj, '__dict__')):
+        return 0  # classes and builtins are shared code, not per-worker data
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        return size + sum(deep_size(k, seen) + deep_size(v, seen) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set, frozenset)) or type(obj).__name__ == 'deque':
+        return size + sum(deep_size(item, seen) for item in obj)
+    if type(obj).__module__.split('.')[0] in ('builtins', 'threading', '_thread'):
+        return size
+    try:
+        state = _state(obj)
+    except Exception:
+        return size
+    return size + (deep_size(state, seen) if state is not None else 0)
+
+
+def _proportional_set_size():
+    """PSS in MB: RSS with pages shared between processes split among them (Linux)"""
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            if line.startswith('Pss:'):
+                return int(line.split()[1]) / 1024
+    return None
+
+
+def process_memory():
+    """
+    Current, proportional and peak resident set size of this process in MB
+
+    PSS is what one more gunicorn worker really costs: pages shared with
+    the master (see --preload) count only in part. Values this platform
+    cannot report are None.
+    """
+    rss = pss = None
+    try:
+        with open('/proc/self/statm') as f:
+            rss = int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 / 1024
+        pss = _proportional_set_size()
+    except (OSError, ValueError, AttributeError):
+        pass
+    peak = None
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # kilobytes on Linux, bytes on macOS
+        peak = peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+    return {
+        'rss_mb': round(rss, 1) if rss is not None else None,
+        'pss_mb': round(pss, 1) if pss is not None else None,
+        'peak_rss_mb': round(peak, 1) if peak is not None else None
+    }
+
+
+def loaded_libraries():
+    """Version of each heavy library imported by this process"""
+    return {
+        name: getattr(sys.modules[name], '__version__', 'unknown')
+        for name in HEAVY_LIBRARIES if name in sys.modules
+    }
+
+
+def memory_report(components):
+    """
+    Footprint of each named group of objects
+
+    components maps a group (e.g. 'models') to {label: object}. Groups are
+    measured in order with one shared seen dict, so an explainer listed
+    after its model is charged only for what it adds.
+    """
+    seen = {}
+    report = {}
+    for group, objects in components.items():
+        sizes = {label: deep_size(obj, seen) for label, obj in objects.items()}
+        report[group] = {
+            'total_mb': round(sum(sizes.values()) / 1024 / 1024, 3),
+            'items_kb': {label: round(size / 1024, 1) for label, size in sizes.items()}
+        }
+    return report
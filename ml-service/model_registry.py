@@ -0,0 +1,155 @@
+"""
+Multi-tenant model registry
+Each tenant (school) has its own model bundle in tenants/<tenant_id>/:
+{model}_model.pkl files plus an optional grade_scaler.pkl. The default
+tenant is the bundle in ml-service/ itself. Models are loaded on first
+use, and the least recently used ones are evicted once their combined
+size passes the memory budget, so one process can serve many tenants
+without holding every model in RAM. Concurrent requests for a model that
+is still loading wait for that one load instead of starting their own.
+
+Memory is estimated from the size of each pickle on disk, which tracks
+the unpickled size of these sklearn/xgboost models closely enough for a
+budget.
+"""
+
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import joblib
+
+DEFAULT_TENANT = 'default'
+TENANTS_DIR = 'tenants'
+MODEL_NAMES = ['linear_regression', 'random_forest', 'xgboost']
+SCALER = 'grade_scaler'
+
+TENANT_ID = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+
+class ModelRegistry:
+    """LRU cache of (tenant, model) -> model under a memory budget"""
+
+    def __init__(self, default_dir='.', tenants_dir=TENANTS_DIR, memory_budget_mb=512, on_evict=None):
+        self.default_dir = default_dir
+        self.tenants_dir = tenants_dir
+        self.memory_budget = memory_budget_mb * 1024 * 1024
+        self.on_evict = on_evict
+        self._models = OrderedDict()  # (tenant, name) -> (mtime, size, model)
+        self._loading = {}            # (tenant, name) -> Event set when the load finishes
+        self._lock = threading.Lock()
+        self.memory_used = 0
+        self.tenant_stats = {}
+
+    def tenant_dir(self, tenant):
+        if tenant == DEFAULT_TENANT:
+            return self.default_dir
+        if not TENANT_ID.match(tenant):
+            raise ValueError(f'Invalid tenant id: {tenant!r}')
+        return os.path.join(self.tenants_dir, tenant)
+
+    def path(self, tenant, name):
+        """File for a model, or the grade scaler for name='grade_scaler'"""
+        if name == SCALER:
+            return os.path.join(self.tenant_dir(tenant), 'grade_scaler.pkl')
+        return os.path.join(self.tenant_dir(tenant), f'{name}_model.pkl')
+
+    def has(self, tenant, name):
+        return os.path.exists(self.path(tenant, name))
+
+    def available(self, tenant):
+        return [name for name in MODEL_NAMES if self.has(tenant, name)]
+
+    def _stats(self, tenant):
+        return self.tenant_stats.setdefault(tenant, {'loads': 0, 'hits': 0, 'evictions': 0, 'load_ms': 0.0})
+
+    def get(self, tenant, name):
+        """
+        Return a loaded model (or the scaler, for name='grade_scaler')
+
+        A file replaced on disk (e.g. by retrain_from_db.py) is reloaded.
+        Raises FileNotFoundError if the tenant has no such model.
+        """
+        key = (tenant, name)
+        path = self.path(tenant, name)
+        while True:
+            mtime = os.path.getmtime(path)
+            with self._lock:
+                cached = self._models.get(key)
+                if cached is not None and cached[0] == mtime:
+                    self._models.move_to_end(key)
+                    self._stats(tenant)['hits'] += 1
+                    return cached[2]
+                loading = self._loading.get(key)
+                if loading is None:
+                    loading = self._loading[key] = threading.Event()
+                    break
+            # Another request is loading this model; use its result
+            loading.wait()
+
+        try:
+            start = time.perf_counter()
+            model = joblib.load(path)
+            size = os.path.getsize(path)
+            elapsed = (time.perf_counter() - start) * 1000
+            with self._lock:
+                previous = self._models.pop(key, None)
+                if previous is not None:
+                    self.memory_used -= previous[1]
+                self._models[key] = (mtime, size, model)
+                self.memory_used += size
+                stats = self._stats(tenant)
+                stats['loads'] += 1
+                stats['load_ms'] += elapsed
+                evicted = self._evict(keep=key)
+        finally:
+            with self._lock:
+                self._loading.pop(key).set()
+
+        if self.on_evict is not None:
+            for evicted_key in evicted:
+                self.on_evict(evicted_key)
+        return model
+
+    def scaler(self, tenant):
+        """Tenant's grade scaler; tenants without one share the default scaler"""
+        if tenant != DEFAULT_TENANT and not self.has(tenant, SCALER):
+            tenant = DEFAULT_TENANT
+        return self.get(tenant, SCALER)
+
+    def _evict(self, keep):
+        """Drop least recently used models until under budget (caller holds the lock)"""
+        evicted = []
+        while self.memory_used > self.memory_budget and len(self._models) > 1:
+            key = next(iter(self._models))
+            if key == keep:
+                self._models.move_to_end(key)
+                key = next(iter(self._models))
+            _, size, _ = self._models.pop(key)
+            self.memory_used -= size
+            self._stats(key[0])['evictions'] += 1
+            evicted.append(key)
+        return evicted
+
+    def resident(self):
+        """Loaded models (and scalers) by (tenant, name), least recently used first"""
+        with self._lock:
+            return {key: entry[2] for key, entry in self._models.items()}
+
+    def stats(self):
+        with self._lock:
+            resident = {}
+            for tenant, name in self._models:
+                resident.setdefault(tenant, []).append(name)
+            return {
+                'memory_budget_mb': round(self.memory_budget / 1024 / 1024, 1),
+                'memory_used_mb': round(self.memory_used / 1024 / 1024, 2),
+                'models_loaded': len(self._models),
+                'tenants': {
+                    tenant: dict(stats, load_ms=round(stats['load_ms'], 1),
+                                 resident=resident.get(tenant, []))
+                    for tenant, stats in self.tenant_stats.items()
+                }
+            }
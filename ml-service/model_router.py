@@ -0,0 +1,93 @@
+"""
+Latency-budget model routing
+Picks the most accurate model whose measured single-prediction latency fits
+the caller's budget. Latencies are seeded from model_metrics.json (measured
+by train_all_models.py) and tracked live as an exponentially weighted
+moving average of served requests. Under overload every routed request
+gets the fallback model; what counts as overload is measured where
+requests are admitted (see routing_overloaded() in predict_script.py).
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+FALLBACK_MODEL = 'linear_regression'
+
+# Latency budget (ms) per quality tier; None means no limit
+QUALITY_TIERS = {
+    'fast': 10,
+    'balanced': 50,
+    'best': None
+}
+
+# Weight of the newest sample in the moving average
+EWMA_ALPHA = 0.2
+
+
+class ModelRouter:
+    """Live latency estimates shared by all requests"""
+
+    def __init__(self, metrics_path='model_metrics.json', overload_check=None):
+        self.metrics_path = metrics_path
+        # Callable returning True while the service is overloaded
+        self.overload_check = overload_check
+        self.latency_ms = {}
+        self.accuracy = {}
+        self._lock = threading.Lock()
+        self.reload_metrics()
+
+    def reload_metrics(self):
+        """Seed accuracy and latency from model_metrics.json"""
+        if not os.path.exists(self.metrics_path):
+            return
+        with open(self.metrics_path, 'r') as f:
+            metrics = json.load(f)
+        with self._lock:
+            for model_name, entry in metrics.items():
+                self.accuracy[model_name] = entry.get('r2_score', 0)
+                if 'latency_ms' in entry:
+                    self.latency_ms.setdefault(model_name, entry['latency_ms'])
+
+    def overloaded(self):
+        return self.overload_check is not None and bool(self.overload_check())
+
+    def choose(self, budget_ms=None, tier=None, available=None):
+        """
+        Return (model_name, reason) for a latency budget or quality tier
+
+        A tier is translated to its budget; an explicit budget wins. Models
+        without a latency estimate are only chosen when there is no budget.
+        """
+        if tier is not None and budget_ms is None:
+            budget_ms = QUALITY_TIERS[tier]
+        if self.overloaded():
+            return FALLBACK_MODEL, 'overloaded'
+
+        with self._lock:
+            candidates = sorted(available or self.accuracy, key=lambda m: -self.accuracy.get(m, 0))
+            latency = dict(self.latency_ms)
+
+        for model_name in candidates:
+            if budget_ms is None or latency.get(model_name, float('inf')) <= budget_ms:
+                return model_name, 'most_accurate_within_budget'
+        return FALLBACK_MODEL, 'no_model_within_budget'
+
+    def record(self, model_name, elapsed_ms):
+        with self._lock:
+            previous = self.latency_ms.get(model_name)
+            if previous is None:
+                self.latency_ms[model_name] = elapsed_ms
+            else:
+                self.latency_ms[model_name] = (1 - EWMA_ALPHA) * previous + EWMA_ALPHA * elapsed_ms
+
+    @contextmanager
+    def track(self, model_name):
+        """Record how long the prediction in the block took"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(model_name, (time.perf_counter() - start) * 1000)
@@ -1,70 +1,330 @@
-from flask import Flask,request,jsonify,send_file
+from flask import Flask,request,jsonify,send_file,Response,stream_with_context,g,has_request_context
 from flask_cors import CORS
 import sys
+import atexit
 import json
+import math
 import os
+import time
 import joblib
 import pandas as pd
 import numpy as np
 import shap
-import mysql.connector
 from generate_report import generate_student_report
+from database import get_db_connection
+from score_roster import score_roster, score_changed
+from class_analytics import get_class_analytics, invalidate_class_analytics
+from attendance_trends import student_trend, class_trend
+from cohort_index import cached_cohorts, cohort_status, get_cohort, set_cohort, update_cohort
+from feature_importance import IMPORTANCE_FILE, load_importance
+from feature_store import report_features
+from model_router import ModelRouter, QUALITY_TIERS
+from model_registry import ModelRegistry, DEFAULT_TENANT, MODEL_NAMES
+from explanation_jobs import ExplanationJobs
+from report_jobs import ReportJobs
+from admission import AdmissionControl
+from audit_log import AuditLog
+from shadow_mode import ShadowEvaluator
+from calibration import CALIBRATION_FILE, DEFAULT_COVERAGE, load_calibration, prediction_intervals, risk_probabilities, risk_confidence
+from counterfactual import TARGET_GRADES, check_student, feature_scales, search_counterfactuals
+from drift_monitor import DriftMonitor, build_reference, load_reference
+from scoring import FEATURE_NAMES, FEATURE_DEFAULTS, scale_predictions, risk_level_for, risk_levels
+from responses import FastJSONProvider, dumps, response_options, shape_response, wants
+from backtest import CHUNK_ROWS, backtest, load_frozen_metrics, tenant_models
+from memory_profile import memory_profile, model_memory_budget_mb, shap_background, process_memory, loaded_libraries, memory_report
 from datetime import datetime
 
 app = Flask(__name__)
+app.json = FastJSONProvider(app)  # orjson when installed, same output rules as Flask's encoder
 CORS(app)  # Allow Next.js API to call Flask
+admission = AdmissionControl(app)  # Per-endpoint concurrency limits and load shedding
 
 # Change working directory to ml-service folder so .pkl files are found
 os.chdir(os.path.dirname(os.path.abspath(__file__)))
 
-# Database configuration
-DB_CONFIG = {
-    'host': 'localhost',
-    'user': 'root',
-    'password': 'Nadaf@123',
-    'database': 'student_data'
-}
-
-def get_db_connection():
-    """Create MySQL connection"""
-    return mysql.connector.connect(**DB_CONFIG)
-
-# Load model and scalers
+# Load the scaler; the serving model itself comes from the registry below
+# so a model published by retrain_from_db.py is picked up without a restart
 try:
-  model=joblib.load('linear_regression_model.pkl')
   grade_scaler=joblib.load('grade_scaler.pkl')
+  if not os.path.exists('linear_regression_model.pkl'):
+    raise FileNotFoundError('linear_regression_model.pkl')
 except FileNotFoundError as e:
     print(json.dumps({'success':False, 'message':f'Model or scaler failed: {str(e)}'}))
     sys.exit()
 
-# Load X_train for SHAP explainer (with fallback)
+# MEMORY_PROFILE=low serves from a smaller worker (see memory_profile.py)
+MEMORY_PROFILE = memory_profile()
+
+# Load X_train for the SHAP background (with fallback)
 try:
   X_train = joblib.load('x_train.pkl')
-  shap_explainer = shap.LinearExplainer(model, X_train)
-  print("SHAP explainer initialized successfully")
+  explainer_background = shap_background(X_train, MEMORY_PROFILE)
+  print("SHAP background loaded successfully")
 except FileNotFoundError:
   X_train = None
-  shap_explainer = None
+  explainer_background = None
   print("Warning: x_train.pkl not found. SHAP explanations will be unavailable.")
   print("Run grade_prediction.py to generate x_train.pkl")
-def calculate_shap_explanation(input_df, final_grade, risk_level):
-  """Calculate SHAP values and generate human-readable explanations."""
-  if shap_explainer is None:
+
+# Per-unit cost of changing studytime/absences/G2 in counterfactual search
+counterfactual_scales = feature_scales(X_train)
+
+# Live input distribution vs the training data; built from X_train if
+# drift_reference.json has not been generated yet
+drift_reference = load_reference() or (build_reference(X_train) if X_train is not None else None)
+drift_monitor = DriftMonitor(drift_reference) if drift_reference else None
+
+if MEMORY_PROFILE == 'low':
+  X_train = None  # the scales and drift reference above are all that needed it
+
+def observe_drift(input_df):
+  """Count scored rows in the drift sketches; never fails a prediction."""
+  if drift_monitor is None:
+    return
+  try:
+    drift_monitor.observe(input_df)
+  except (TypeError, ValueError) as e:
+    print(f"Drift monitor skipped rows: {e}")
+
+# Candidate models staged in candidates/ score a sample of live traffic
+# in the background (SHADOW_SAMPLE_RATE=0 turns sampling off)
+shadow = ShadowEvaluator(grade_scaler, sample_rate=float(os.environ.get('SHADOW_SAMPLE_RATE', 0.1)))
+
+def shadow_prediction(model_name, input_df, final_grades):
+  """Offer a served prediction to the shadow candidate; never blocks or fails a prediction."""
+  try:
+    shadow.submit(model_name, input_df, final_grades)
+  except (TypeError, ValueError, KeyError) as e:
+    print(f"Shadow evaluation skipped rows: {e}")
+
+# Every served prediction, written behind the request in batched inserts
+audit_log = AuditLog.from_env(get_db_connection)
+atexit.register(audit_log.flush)
+
+# model_metrics.json mtime -> per-model metrics, for version lookups
+model_versions = {'mtime': None, 'metrics': {}}
+
+def model_version_for(model_name):
+  """Published version of a model from model_metrics.json (default v1.0)."""
+  try:
+    mtime = os.path.getmtime('model_metrics.json')
+  except OSError:
+    return 'v1.0'
+  if model_versions['mtime'] != mtime:
+    with open('model_metrics.json', 'r') as f:
+      model_versions['metrics'] = json.load(f)
+    model_versions['mtime'] = mtime
+  return model_versions['metrics'].get(model_name, {}).get('version', 'v1.0')
+
+# calibration.json mtime -> per-model conformal residuals
+calibration_cache = {'mtime': None, 'data': {}}
+
+def prediction_uncertainty(model_name, final_grades, max_marks):
+  """
+  Interval, risk-bucket probabilities and confidence for 0-20 grades.
+  Lookups into the precomputed residuals only; None if the model has no
+  calibration yet.
+  """
+  try:
+    mtime = os.path.getmtime(CALIBRATION_FILE)
+  except OSError:
+    return None
+  if calibration_cache['mtime'] != mtime:
+    calibration_cache['data'] = load_calibration()
+    calibration_cache['mtime'] = mtime
+  entry = calibration_cache['data'].get(model_name)
+  if entry is None:
     return None
   
-  feature_names = ['age', 'failures', 'absences', 'studytime', 'G1', 'G2']
-  feature_display_names = {
-    'age': 'Age',
-    'failures': 'Past Failures',
-    'absences': 'Absences',
-    'studytime': 'Study Time',
-    'G1': 'First Period Grade',
-    'G2': 'Second Period Grade'
+  final_grades = np.asarray(final_grades, dtype=float)
+  lower, upper = prediction_intervals(entry, final_grades)
+  probabilities = np.column_stack(risk_probabilities(entry, final_grades))
+  confidence = risk_confidence(entry, final_grades)
+  return [
+    {
+      'interval': {
+        'coverage': DEFAULT_COVERAGE,
+        'lower': f"{lo / 20 * max_marks:.2f}",
+        'upper': f"{hi / 20 * max_marks:.2f}"
+      },
+      'risk_probabilities': {level: round(float(p), 3) for level, p in zip(('High', 'Medium', 'Low'), row)},
+      'confidence': round(float(conf), 1)
+    }
+    for lo, hi, row, conf in zip(lower, upper, probabilities, confidence)
+  ]
+
+def audit_prediction(endpoint, model_name, student_data, result, latency_ms, student_id=None,
+                     tenant=DEFAULT_TENANT):
+  """Queue an audit record for a served prediction (no database work here)."""
+  explanation = result.get('explanation') or {}
+  audit_log.record({
+    'endpoint': endpoint,
+    'tenant': tenant,
+    'student_id': student_id,
+    'model_name': model_name,
+    'model_version': model_version_for(model_name),
+    'inputs': {f: student_data.get(f) for f in FEATURE_NAMES},
+    'predicted_grade': float(result['predicted_grade']),
+    'risk_level': result['risk_level'],
+    'latency_ms': round(latency_ms, 3),
+    'top_factors': [
+      {'factor': f['factor'], 'shap_value': f['shap_value'], 'impact': f['impact']}
+      for f in explanation.get('top_factors', [])[:3]
+    ]
+  })
+
+feature_display_names = {
+  'age': 'Age',
+  'failures': 'Past Failures',
+  'absences': 'Absences',
+  'studytime': 'Study Time',
+  'G1': 'First Period Grade',
+  'G2': 'Second Period Grade'
+}
+
+# student_id -> (feature tuple, explanation), refreshed by /score-changed so
+# reports for unchanged students skip SHAP work
+explanation_cache = {}
+
+# Model bundles per tenant (school), loaded lazily and evicted least recently
+# used past MODEL_MEMORY_BUDGET_MB; a file replaced by retrain_from_db.py is reloaded
+registry = ModelRegistry(memory_budget_mb=model_memory_budget_mb(MEMORY_PROFILE),
+                         on_evict=lambda key: model_explainers.pop(key, None))
+
+def get_model(model_name, tenant=DEFAULT_TENANT):
+  """Return the tenant's named model, loading it once per published file."""
+  return registry.get(tenant, model_name)
+
+def serving_model():
+  """The default linear_regression model, reloaded after retrain_from_db.py publishes one."""
+  return registry.get(DEFAULT_TENANT, 'linear_regression')
+
+def serving_explainer():
+  """SHAP explainer for serving_model(), rebuilt with it; None without a background."""
+  if explainer_background is None:
+    return None
+  return get_explainer('linear_regression', serving_model())
+
+def request_tenant(data=None):
+  """
+  Tenant of the current request: X-Tenant-ID header, ?tenant= or a
+  "tenant" body field. Raises ValueError for a malformed id.
+  """
+  tenant = (request.headers.get('X-Tenant-ID') or request.args.get('tenant')
+            or (data or {}).get('tenant') or DEFAULT_TENANT)
+  registry.tenant_dir(tenant)
+  return tenant
+
+def routing_overloaded():
+  """
+  Routed requests fall back to the fast model while other requests are
+  waiting for a slot in this request's admission lane, or while more
+  explanations are queued than the explanation workers can run.
+  """
+  lane = g.get('admission_lane') if has_request_context() else None
+  if lane is not None and lane.queued > 0:
+    return True
+  return explanation_jobs.pending > explanation_jobs.max_workers
+
+router = ModelRouter(overload_check=routing_overloaded)
+
+# (tenant, model_name) -> (model, explainer), rebuilt when get_model() reloads
+# a model and dropped when the registry evicts it
+model_explainers = {}
+
+# Default wait for an explanation before answering with a token instead;
+# kept under the Next.js proxy's 10 s timeout
+EXPLANATION_DEADLINE_MS = 5000
+explanation_jobs = ExplanationJobs(max_workers=2)
+
+def resolve_model(data, tenant=DEFAULT_TENANT):
+  """
+  Pick the model for a request body.
+  An explicit "model" wins; otherwise "latency_budget_ms" or "quality"
+  (fast | balanced | best) routes to the most accurate model that fits.
+  Returns (model_name, routing) where routing is None for explicit models.
+  Raises ValueError for an invalid budget or tier.
+  """
+  budget = data.get('latency_budget_ms')
+  tier = data.get('quality')
+  if 'model' in data or (budget is None and tier is None):
+    return data.get('model', 'linear_regression'), None
+
+  if tier is not None and tier not in QUALITY_TIERS:
+    raise ValueError(f'Invalid quality. Choose from: {list(QUALITY_TIERS)}')
+  if budget is not None:
+    if isinstance(budget, bool) or not isinstance(budget, (int, float)) or budget <= 0:
+      raise ValueError('latency_budget_ms must be a positive number')
+
+  available = registry.available(tenant)
+  model_name, reason = router.choose(budget, tier, available)
+  return model_name, {
+    'latency_budget_ms': budget,
+    'quality': tier,
+    'reason': reason,
+    'estimated_latency_ms': round(router.latency_ms.get(model_name, 0), 3)
   }
+
+def format_shap_explanation(shap_vals, input_row, final_grade, risk_level):
+  """Turn one row of SHAP values into the summary/top_factors explanation."""
+  # Build feature contributions list
+  feature_contributions = []
+  for i, feature in enumerate(FEATURE_NAMES):
+    shap_val = float(shap_vals[i])
+    input_value = float(input_row[feature])
+    
+    # Avoid division by zero
+    safe_grade = max(abs(final_grade), 0.001)
+    contribution_pct = (shap_val / safe_grade) * 100
+    
+    # Clamp contribution percentage to [-100%, +100%]
+    contribution_pct = max(-100, min(100, contribution_pct))
+    
+    feature_contributions.append({
+      'factor': feature_display_names.get(feature, feature.replace('_', ' ').title()),
+      'value': input_value,
+      'shap_value': round(shap_val, 3),
+      'impact': 'positive' if shap_val > 0 else 'negative',
+      'contribution_percentage': f"{contribution_pct:+.1f}%"
+    })
+  
+  # Sort by absolute SHAP value (most impactful first)
+  top_factors = sorted(
+    feature_contributions,
+    key=lambda x: abs(x['shap_value']),
+    reverse=True
+  )[:5]
+  
+  # Generate human-readable summary
+  risk_factors = [f for f in top_factors if f['impact'] == 'negative']
+  summary = f"{risk_level} Risk"
+  if risk_factors:
+    main_factors = ', '.join(
+      [f"{f['factor']} ({f['value']})" for f in risk_factors[:2]]
+    )
+    summary += f": Primary concerns are {main_factors}"
+  elif risk_level == "Low":
+    positive_factors = [f for f in top_factors if f['impact'] == 'positive'][:2]
+    if positive_factors:
+      main_factors = ', '.join(
+        [f"{f['factor']} ({f['value']})" for f in positive_factors]
+      )
+      summary += f": Strengths include {main_factors}"
+  
+  return {
+    'summary': summary,
+    'top_factors': top_factors
+  }
+
+def calculate_shap_explanation(input_df, final_grade, risk_level):
+  """Calculate SHAP values and generate human-readable explanations."""
+  explainer = serving_explainer()
+  if explainer is None:
+    return None
   
   try:
     # Calculate SHAP values
-    shap_values = shap_explainer.shap_values(input_df)
+    shap_values = explainer.shap_values(input_df)
     
     # Handle both 1D and 2D shap_values arrays
     if len(shap_values.shape) == 1:
@@ -72,91 +332,70 @@ def calculate_shap_explanation(input_df, final_grade, risk_level):
     else:
       shap_vals = shap_values[0]
     
-    # Build feature contributions list
-    feature_contributions = []
-    for i, feature in enumerate(feature_names):
-      shap_val = float(shap_vals[i])
-      input_value = float(input_df.iloc[0][feature])
-      
-      # Avoid division by zero
-      safe_grade = max(abs(final_grade), 0.001)
-      contribution_pct = (shap_val / safe_grade) * 100
-      
-      # Clamp contribution percentage to [-100%, +100%]
-      contribution_pct = max(-100, min(100, contribution_pct))
-      
-      feature_contributions.append({
-        'factor': feature_display_names.get(feature, feature.replace('_', ' ').title()),
-        'value': input_value,
-        'shap_value': round(shap_val, 3),
-        'impact': 'positive' if shap_val > 0 else 'negative',
-        'contribution_percentage': f"{contribution_pct:+.1f}%"
-      })
-    
-    # Sort by absolute SHAP value (most impactful first)
-    top_factors = sorted(
-      feature_contributions,
-      key=lambda x: abs(x['shap_value']),
-      reverse=True
-    )[:5]
-    
-    # Generate human-readable summary
-    risk_factors = [f for f in top_factors if f['impact'] == 'negative']
-    summary = f"{risk_level} Risk"
-    if risk_factors:
-      main_factors = ', '.join(
-        [f"{f['factor']} ({f['value']})" for f in risk_factors[:2]]
-      )
-      summary += f": Primary concerns are {main_factors}"
-    elif risk_level == "Low":
-      positive_factors = [f for f in top_factors if f['impact'] == 'positive'][:2]
-      if positive_factors:
-        main_factors = ', '.join(
-          [f"{f['factor']} ({f['value']})" for f in positive_factors]
-        )
-        summary += f": Strengths include {main_factors}"
-    
-    return {
-      'summary': summary,
-      'top_factors': top_factors
-    }
+    return format_shap_explanation(shap_vals, input_df.iloc[0], final_grade, risk_level)
   except Exception as e:
     print(f"SHAP calculation error: {e}")
     return None
 
+def explain_batch(features, final_grades, levels):
+  """SHAP explanations for many rows with a single shap_values() call."""
+  explainer = serving_explainer()
+  if explainer is None:
+    return [None] * len(features)
+  shap_values = np.asarray(explainer.shap_values(features)).reshape(len(features), -1)
+  return [
+    format_shap_explanation(shap_values[i], features.iloc[i], final_grades[i], levels[i])
+    for i in range(len(features))
+  ]
+
 
-def predict(input_data,max_marks):
+def cohort_rank(model_name, grade):
+  """Percentile of a 0-100 predicted grade in the model's cohort, or None until the index is built."""
+  index = get_cohort(model_name)
+  if index is None or not len(index):
+    return None
+  return {'percentile': index.percentile(grade), 'cohort_size': len(index)}
+
+def predict(input_data,max_marks,tenant=DEFAULT_TENANT,options=None):
+  """
+  Predict one student with the serving model. options (see
+  responses.response_options) can skip the explanation and the extras
+  the caller did not ask for.
+  """
+  options = options or {'explain': True, 'fields': None, 'compact': False}
   required_features=['age','failures','absences','studytime','G1','G2']
   try:
     if not all(key in input_data for key in required_features):
       missing_keys=[key for key in required_features if key not in input_data]
       return {'success': False, 'message': f'Missing required features: {missing_keys}'}
     input_df=pd.DataFrame([input_data],columns=required_features)
-    scaled_prediction=model.predict(input_df)
-    original_prediction = grade_scaler.inverse_transform(scaled_prediction.reshape(-1, 1))
+    # Other tenants' calibration, cohort and drift data are not kept
+    is_default = tenant == DEFAULT_TENANT
+    tenant_model = serving_model() if is_default else get_model('linear_regression', tenant)
+    tenant_scaler = grade_scaler if is_default else registry.scaler(tenant)
+    scaled_prediction=tenant_model.predict(input_df)
+    if is_default:
+      observe_drift(input_df)
     
     # FIX for 503% Bug: Clamp final_grade to valid range [0, 20]
     # The ML model (linear regression) can extrapolate beyond training bounds,
     # producing values outside the Portuguese grading scale (0-20).
     # Without clamping, values like 100.6 would become (100.6/20)*100 = 503%
-    raw_grade = original_prediction[0][0]
-    final_grade = max(0, min(20, raw_grade))
-    
-    # Scale to the requested max_marks (typically 100)
-    predicted_grade_on_new_scale = (final_grade / 20) * max_marks
-    
-    # Additional validation: ensure percentage never exceeds 100%
-    predicted_grade_on_new_scale = min(predicted_grade_on_new_scale, max_marks)
-    
-    if final_grade < 10:
-      risk_level = "High"
-    elif final_grade < 14:
-      risk_level = "Medium"
-    else:
-      risk_level = "Low"
+    # scale_predictions() also caps the rescaled grade at max_marks.
+    final_grades, predicted_grades = scale_predictions(scaled_prediction, tenant_scaler, max_marks)
+    final_grade = final_grades[0]
+    if is_default:
+      shadow_prediction('linear_regression', input_df, final_grades)
+    predicted_grade_on_new_scale = predicted_grades[0]
+    risk_level = risk_level_for(final_grade)
     
     # Calculate SHAP explanation
-    explanation = calculate_shap_explanation(input_df, final_grade, risk_level)
+    if not options['explain']:
+      explanation = None
+    elif is_default:
+      explanation = calculate_shap_explanation(input_df, final_grade, risk_level)
+    else:
+      explanation = explain_with_model('linear_regression', tenant_model, input_df, final_grade, risk_level, tenant)
     
     result = {
       'success': True,
@@ -164,14 +403,42 @@ def predict(input_data,max_marks):
       'risk_level': risk_level,
     }
     
+    want_uncertainty = is_default and wants(options, 'interval', 'risk_probabilities', 'confidence')
+    uncertainty = prediction_uncertainty('linear_regression', final_grades, max_marks) if want_uncertainty else None
+    if uncertainty:
+      result.update(uncertainty[0])
+    
     if explanation:
       result['explanation'] = explanation
     
+    # Cohort grades are stored on the 0-100 scale
+    cohort = cohort_rank('linear_regression', final_grade * 5) if is_default and wants(options, 'cohort') else None
+    if cohort:
+      result['cohort'] = cohort
+    
     return result
   except Exception as e:
     print(f"PRediction error: {e}")
     return {'success':False,'message':str(e)}
 
+def predict_batch(selected_model, rows, max_marks, scaler=None, compact=False):
+  """Score many feature dicts with one model.predict() call (no SHAP).
+  compact returns grades as numbers rather than 2-decimal strings."""
+  input_df = pd.DataFrame(rows, columns=FEATURE_NAMES).astype(float)
+  if scaler is None:
+    observe_drift(input_df)
+  final_grades, predicted_grades = scale_predictions(selected_model.predict(input_df), scaler or grade_scaler, max_marks)
+  levels = risk_levels(final_grades).tolist()
+  if compact:
+    return [
+      {'predicted_grade': grade, 'risk_level': level}
+      for grade, level in zip(np.round(predicted_grades, 2).tolist(), levels)
+    ]
+  return [
+    {'predicted_grade': f"{grade:.2f}", 'risk_level': level}
+    for grade, level in zip(predicted_grades, levels)
+  ]
+
 @app.route('/predict', methods=['POST'])
 def predict_endpoint():
   """Recieves student data and returns grade prediction and risk level."""
@@ -181,11 +448,22 @@ def predict_endpoint():
   if 'student_data' not in data or 'max_marks' not in data:
         return jsonify({'success': False, 'message': 'Missing student_data or max_marks in request'}), 400
     
+  try:
+    tenant = request_tenant(data)
+    options = response_options(data, request.args)
+  except ValueError as e:
+    return jsonify({'success': False, 'message': str(e)}), 400
+  if not registry.has(tenant, 'linear_regression'):
+    return jsonify({'success': False, 'message': f'No models for tenant {tenant}'}), 404
+    
   student_data=data['student_data']
   max_marks=data['max_marks']
-  result =predict(student_data,max_marks)
+  start = time.perf_counter()
+  result =predict(student_data,max_marks,tenant,options)
   if result.get('success'):
-    return jsonify(result)
+    audit_prediction('predict', 'linear_regression', student_data, result,
+                     (time.perf_counter() - start) * 1000, data.get('student_id'), tenant)
+    return jsonify(shape_response(result, options))
   else:
     return jsonify(result),500
 
@@ -210,6 +488,85 @@ def get_model_metrics():
         return jsonify({'error': str(e)}), 500
 
 
+def get_explainer(model_name, selected_model, tenant=DEFAULT_TENANT):
+    """SHAP explainer for a loaded model, built once per model object"""
+    cached = model_explainers.get((tenant, model_name))
+    if cached is None or cached[0] is not selected_model:
+        if model_name == 'linear_regression':
+            explainer = shap.LinearExplainer(selected_model, explainer_background)
+        else:
+            explainer = shap.Explainer(selected_model, explainer_background)
+        cached = (selected_model, explainer)
+        model_explainers[(tenant, model_name)] = cached
+    return cached[1]
+
+
+def explain_with_model(model_name, selected_model, input_df, final_grade, risk_level, tenant=DEFAULT_TENANT):
+    """
+    SHAP explanation for one prediction of any model
+    
+    Runs on the explanation worker pool; never raises, returning a
+    fallback explanation instead.
+    """
+    try:
+        shap_values = get_explainer(model_name, selected_model, tenant).shap_values(input_df)
+
+        # Handle both 1D and 2D shap_values arrays
+        if len(shap_values.shape) == 1:
+            shap_vals = shap_values
+        else:
+            shap_vals = shap_values[0]
+
+        feature_contributions = []
+        for i, feature in enumerate(FEATURE_NAMES):
+            shap_val = float(shap_vals[i])
+            feature_value = float(input_df.iloc[0][feature])
+
+            base_value = max(abs(final_grade), 0.1)
+            contribution_pct = (shap_val / base_value) * 100
+            contribution_pct = max(-100, min(100, contribution_pct))
+            impact = 'positive' if shap_val > 0 else 'negative'
+
+            descriptions = {
+                'age': f"Age {int(feature_value)} years",
+                'studytime': f"Study time level {int(feature_value)}/4",
+                'failures': f"{int(feature_value)} previous failures" if feature_value > 0 else "No previous failures",
+                'absences': f"{int(feature_value)} absences" + (" (high)" if feature_value > 10 else " (acceptable)" if feature_value > 5 else " (excellent)"),
+                'G1': f"Period 1 grade: {feature_value}/20",
+                'G2': f"Period 2 grade: {feature_value}/20"
+            }
+
+            feature_contributions.append({
+                'factor': feature_display_names.get(feature, feature.replace('_', ' ').title()),
+                'value': feature_value,
+                'shap_value': round(shap_val, 3),
+                'impact': impact,
+                'contribution_percentage': f"{contribution_pct:+.1f}%",
+                'description': descriptions.get(feature, f"Value: {feature_value}")
+            })
+
+        top_factors = sorted(feature_contributions, key=lambda x: abs(x['shap_value']), reverse=True)[:5]
+
+        negative_factors = [f for f in top_factors if f['impact'] == 'negative']
+        summary = f"{risk_level} Risk"
+        if negative_factors:
+            concerns = ', '.join([f"{f['factor']} ({f['value']})" for f in negative_factors[:2]])
+            summary += f": Primary concerns are {concerns}"
+
+        explanation = {
+            'summary': summary,
+            'top_factors': top_factors
+        }
+    except Exception as e:
+        print(f"SHAP calculation failed: {str(e)}")
+        explanation = {
+            'summary': f"{risk_level} Risk",
+            'top_factors': [],
+            'error': 'Feature importance calculation unavailable'
+        }
+    return explanation
+
+
 @app.route('/predict-with-model', methods=['POST'])
 def predict_with_model():
     """
@@ -220,29 +577,39 @@ def predict_with_model():
         "max_marks": 100,
         "model": "linear_regression" | "random_forest" | "xgboost"
     }
+    Instead of "model", "latency_budget_ms" or "quality" lets the service
+    route to the most accurate model that fits (see resolve_model()).
+    "explanation_deadline_ms" (default 5000) bounds the wait for SHAP; a
+    late explanation is replaced by "explanation_token" for /explanations.
+    "explain": false skips SHAP, "fields" keeps only the listed top-level
+    keys and "format": "compact" returns numbers instead of strings.
     """
     try:
+        start = time.perf_counter()
         data = request.json
         
         # Get model selection (default to linear_regression)
-        model_name = data.get('model', 'linear_regression')
+        try:
+            tenant = request_tenant(data)
+            options = response_options(data, request.args)
+            model_name, routing = resolve_model(data, tenant)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         # Validate model name
-        valid_models = ['linear_regression', 'random_forest', 'xgboost']
-        if model_name not in valid_models:
+        if model_name not in MODEL_NAMES:
             return jsonify({
-                'error': f'Invalid model. Choose from: {valid_models}'
+                'error': f'Invalid model. Choose from: {MODEL_NAMES}'
             }), 400
         
         # Load selected model
-        model_filename = f'{model_name}_model.pkl'
-        
-        if not os.path.exists(model_filename):
+        if not registry.has(tenant, model_name):
             return jsonify({
                 'error': f'Model {model_name} not found. Run train_all_models.py first.'
             }), 404
         
-        selected_model = joblib.load(model_filename)
+        selected_model = get_model(model_name, tenant)
+        tenant_scaler = registry.scaler(tenant)
         
         # Make prediction
         student_data = data.get('student_data', {})
@@ -261,14 +628,19 @@ def predict_with_model():
         input_df = pd.DataFrame(input_array, columns=feature_names)
         
         # Predict (scaled)
-        scaled_prediction = selected_model.predict(input_df)
+        with router.track(model_name):
+            scaled_prediction = selected_model.predict(input_df)
+        if tenant == DEFAULT_TENANT:
+            observe_drift(input_df)
         
         # Inverse transform to get grade on 0-20 scale
-        original_prediction = grade_scaler.inverse_transform(scaled_prediction.reshape(-1, 1))
+        original_prediction = tenant_scaler.inverse_transform(scaled_prediction.reshape(-1, 1))
         final_grade = original_prediction[0][0]
         
         # Clamp to valid range
         final_grade = max(0, min(20, final_grade))
+        if tenant == DEFAULT_TENANT:
+            shadow_prediction(model_name, input_df, [final_grade])
         
         # Scale to max_marks
         predicted_grade_on_new_scale = (final_grade / 20) * max_marks
@@ -282,91 +654,154 @@ def predict_with_model():
         else:
             risk_level = "Low"
         
-        # SHAP explanation
+        # SHAP explanation, bounded by the caller's deadline. If it is not
+        # ready in time, return the prediction now with a token the client
+        # can poll at /explanations/<token>.
         try:
-            if model_name == 'linear_regression':
-                explainer = shap.LinearExplainer(selected_model, X_train)
-            else:
-                explainer = shap.Explainer(selected_model, X_train)
-            shap_values = explainer.shap_values(input_df)
-            
-            # Handle both 1D and 2D shap_values arrays
-            if len(shap_values.shape) == 1:
-                shap_vals = shap_values
-            else:
-                shap_vals = shap_values[0]
-            
-            feature_display_names = {
-                'age': 'Age',
-                'failures': 'Past Failures',
-                'absences': 'Absences',
-                'studytime': 'Study Time',
-                'G1': 'First Period Grade',
-                'G2': 'Second Period Grade'
-            }
-            
-            feature_contributions = []
-            for i, feature in enumerate(feature_names):
-                shap_val = float(shap_vals[i])
-                feature_value = float(input_df.iloc[0][feature])
-                
-                base_value = max(abs(final_grade), 0.1)
-                contribution_pct = (shap_val / base_value) * 100
-                contribution_pct = max(-100, min(100, contribution_pct))
-                impact = 'positive' if shap_val > 0 else 'negative'
-                
-                descriptions = {
-                    'age': f"Age {int(feature_value)} years",
-                    'studytime': f"Study time level {int(feature_value)}/4",
-                    'failures': f"{int(feature_value)} previous failures" if feature_value > 0 else "No previous failures",
-                    'absences': f"{int(feature_value)} absences" + (" (high)" if feature_value > 10 else " (acceptable)" if feature_value > 5 else " (excellent)"),
-                    'G1': f"Period 1 grade: {feature_value}/20",
-                    'G2': f"Period 2 grade: {feature_value}/20"
+            deadline = max(float(data.get('explanation_deadline_ms', EXPLANATION_DEADLINE_MS)), 0) / 1000
+        except (TypeError, ValueError):
+            return jsonify({'error': 'explanation_deadline_ms must be a number'}), 400
+        if not options['explain']:
+            explanation_fields = {}
+        else:
+            token = explanation_jobs.submit(explain_with_model, model_name, selected_model,
+                                            input_df, final_grade, risk_level, tenant)
+            if token is None:
+                explanation = {
+                    'summary': f"{risk_level} Risk",
+                    'top_factors': [],
+                    'error': 'Explanation queue is full, try again later'
                 }
-                
-                feature_contributions.append({
-                    'factor': feature_display_names.get(feature, feature.replace('_', ' ').title()),
-                    'value': feature_value,
-                    'shap_value': round(shap_val, 3),
-                    'impact': impact,
-                    'contribution_percentage': f"{contribution_pct:+.1f}%",
-                    'description': descriptions.get(feature, f"Value: {feature_value}")
-                })
-            
-            top_factors = sorted(feature_contributions, key=lambda x: abs(x['shap_value']), reverse=True)[:5]
-            
-            negative_factors = [f for f in top_factors if f['impact'] == 'negative']
-            summary = f"{risk_level} Risk"
-            if negative_factors:
-                concerns = ', '.join([f"{f['factor']} ({f['value']})" for f in negative_factors[:2]])
-                summary += f": Primary concerns are {concerns}"
-            
-            explanation = {
-                'summary': summary,
-                'top_factors': top_factors
-            }
-        except Exception as e:
-            print(f"SHAP calculation failed: {str(e)}")
-            explanation = {
-                'summary': f"{risk_level} Risk",
-                'top_factors': [],
-                'error': 'Feature importance calculation unavailable'
-            }
+            else:
+                explanation = explanation_jobs.wait(token, deadline)
+            explanation_fields = ({'explanation': explanation} if explanation is not None else
+                                  {'explanation_token': token, 'explanation_status': 'pending'})
         
-        # Return response
-        return jsonify({
+        result = {
             'success': True,
             'predicted_grade': f"{predicted_grade_on_new_scale:.2f}",
             'risk_level': risk_level,
-            'explanation': explanation,
+            **explanation_fields,
             'model_used': model_name,
-            'model_version': 'v1.0'
+            'model_version': model_version_for(model_name),
+            **({'routing': routing} if routing else {})
+        }
+        want_uncertainty = tenant == DEFAULT_TENANT and wants(options, 'interval', 'risk_probabilities', 'confidence')
+        uncertainty = prediction_uncertainty(model_name, [final_grade], max_marks) if want_uncertainty else None
+        if uncertainty:
+            result.update(uncertainty[0])
+        audit_prediction('predict-with-model', model_name, student_data, result,
+                         (time.perf_counter() - start) * 1000, data.get('student_id'), tenant)
+        
+        # Return response
+        return jsonify(shape_response(result, options)), 200
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/predict-consensus', methods=['POST'])
+def predict_consensus():
+    """
+    Score one student with every available model in a single request
+    
+    Request body:
+    {
+        "student_data": {...},
+        "max_marks": 100,
+        "models": ["linear_regression", "random_forest", "xgboost"]  (optional)
+    }
+    
+    Returns each model's grade, risk and latency, the mean-grade consensus
+    with its risk vote, and how far the models disagree.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        try:
+            tenant = request_tenant(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        model_names = data.get('models') or MODEL_NAMES
+        invalid = [m for m in model_names if m not in MODEL_NAMES]
+        if invalid:
+            return jsonify({'error': f'Invalid model. Choose from: {MODEL_NAMES}'}), 400
+        model_names = [m for m in model_names if registry.has(tenant, m)]
+        if not model_names:
+            return jsonify({'error': 'No trained models found. Run train_all_models.py first.'}), 404
+        
+        # Parse and validate the input once for all models
+        student_data = data.get('student_data', {})
+        try:
+            max_marks = float(data.get('max_marks', 100))
+            features = [float(student_data.get(f, FEATURE_DEFAULTS[f])) for f in FEATURE_NAMES]
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Features and max_marks must be numeric'}), 400
+        input_df = pd.DataFrame([features], columns=FEATURE_NAMES)
+        if tenant == DEFAULT_TENANT:
+            observe_drift(input_df)
+        tenant_scaler = registry.scaler(tenant)
+        
+        # Single-row predicts are sub-millisecond to a few ms each, so they run
+        # back to back: a thread pool measured slower than sequential here.
+        start = time.perf_counter()
+        predictions = {}
+        final_grades = []
+        for model_name in model_names:
+            model_start = time.perf_counter()
+            final, predicted = scale_predictions(get_model(model_name, tenant).predict(input_df), tenant_scaler, max_marks)
+            final_grades.append(final[0])
+            predictions[model_name] = {
+                'predicted_grade': f"{predicted[0]:.2f}",
+                'risk_level': risk_level_for(final[0]),
+                'latency_ms': round((time.perf_counter() - model_start) * 1000, 3)
+            }
+            audit_prediction('predict-consensus', model_name, student_data, predictions[model_name],
+                             predictions[model_name]['latency_ms'], data.get('student_id'), tenant)
+        
+        final_grades = np.array(final_grades)
+        consensus_final = float(final_grades.mean())
+        votes = pd.Series([p['risk_level'] for p in predictions.values()]).value_counts()
+        on_scale = final_grades / 20 * max_marks
+        
+        return jsonify({
+            'success': True,
+            'predictions': predictions,
+            'consensus': {
+                'predicted_grade': f"{min(consensus_final / 20 * max_marks, max_marks):.2f}",
+                'risk_level': risk_level_for(consensus_final),
+                'risk_votes': {level: int(n) for level, n in votes.items()},
+                'unanimous': len(votes) == 1
+            },
+            'disagreement': {
+                'std': round(float(on_scale.std()), 2),
+                'range': round(float(on_scale.max() - on_scale.min()), 2)
+            },
+            'models_used': model_names,
+            'total_ms': round((time.perf_counter() - start) * 1000, 3)
         }), 200
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/explanations/<token>', methods=['GET'])
+def get_explanation(token):
+    """
+    Fetch an explanation that missed its deadline in /predict-with-model
+    
+    Returns 200 with the explanation when done, 202 while it is still
+    running and 404 for unknown or expired tokens.
+    """
+    status, result = explanation_jobs.status(token)
+    if status == 'unknown':
+        return jsonify({'error': 'Unknown or expired explanation token'}), 404
+    if status == 'pending':
+        return jsonify({'success': True, 'status': 'pending'}), 202
+    if status == 'failed':
+        return jsonify({'success': False, 'status': 'failed', 'error': result}), 500
+    return jsonify({'success': True, 'status': 'done', 'explanation': result}), 200
+
+
 @app.route('/simulate', methods=['POST'])
 def simulate():
     """
@@ -386,23 +821,27 @@ def simulate():
         "max_marks": 100,
         "model": "random_forest"
     }
+    "latency_budget_ms" or "quality" may replace "model", as in
+    predict-with-model.
     """
     try:
         # Reuse predict-with-model logic
         data = request.json
-        model_name = data.get('model', 'linear_regression')
+        try:
+            tenant = request_tenant(data)
+            model_name, routing = resolve_model(data, tenant)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         # Validate
-        valid_models = ['linear_regression', 'random_forest', 'xgboost']
-        if model_name not in valid_models:
-            return jsonify({'error': f'Invalid model. Choose from: {valid_models}'}), 400
+        if model_name not in MODEL_NAMES:
+            return jsonify({'error': f'Invalid model. Choose from: {MODEL_NAMES}'}), 400
         
         # Load model
-        model_filename = f'{model_name}_model.pkl'
-        if not os.path.exists(model_filename):
+        if not registry.has(tenant, model_name):
             return jsonify({'error': f'Model {model_name} not found'}), 404
         
-        selected_model = joblib.load(model_filename)
+        selected_model = get_model(model_name, tenant)
         
         # Make prediction
         student_data = data.get('student_data', {})
@@ -420,8 +859,9 @@ def simulate():
         input_df = pd.DataFrame(input_array, columns=feature_names)
         
         # Predict
-        scaled_prediction = selected_model.predict(input_df)
-        original_prediction = grade_scaler.inverse_transform(scaled_prediction.reshape(-1, 1))
+        with router.track(model_name):
+            scaled_prediction = selected_model.predict(input_df)
+        original_prediction = registry.scaler(tenant).inverse_transform(scaled_prediction.reshape(-1, 1))
         final_grade = max(0, min(20, original_prediction[0][0]))
         predicted_grade_on_new_scale = (final_grade / 20) * max_marks
         predicted_grade_on_new_scale = min(predicted_grade_on_new_scale, max_marks)
@@ -435,120 +875,523 @@ def simulate():
             'predicted_grade': f"{predicted_grade_on_new_scale:.2f}",
             'risk_level': risk_level,
             'is_simulation': True,
-            'model_used': model_name
+            'model_used': model_name,
+            **({'routing': routing} if routing else {})
         }), 200
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
-@app.route('/generate-report/<student_id>', methods=['GET'])
-def generate_report_endpoint(student_id):
+@app.route('/counterfactual', methods=['POST'])
+def counterfactual_endpoint():
     """
-    Generate PDF report for a specific student
+    Smallest changes to study time, absences and G2 that reach a risk level
     
-    URL: GET /generate-report/st1 (or any student ID string)
-    Returns: PDF file download
+    Request body:
+    {
+        "student_data": {...},
+        "target_risk": "Low" | "Medium",   (default "Low")
+        "max_marks": 100,
+        "model": "random_forest",          (or latency_budget_ms / quality)
+        "limit": 5
+    }
+    
+    Returns up to limit changes ranked by cost, each with its predicted
+    grade and risk, plus how many candidates were scored.
     """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
+        data = request.get_json(silent=True) or {}
+        try:
+            tenant = request_tenant(data)
+            model_name, routing = resolve_model(data, tenant)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        # Fetch student data
-        cursor.execute("""
-            SELECT id, name, email, age, study_hours as studytime, failures, absences 
-            FROM students 
-            WHERE id = %s
-        """, (student_id,))
+        if model_name not in MODEL_NAMES:
+            return jsonify({'error': f'Invalid model. Choose from: {MODEL_NAMES}'}), 400
+        if not registry.has(tenant, model_name):
+            return jsonify({'error': f'Model {model_name} not found'}), 404
         
-        student = cursor.fetchone()
+        target_risk = data.get('target_risk', 'Low')
+        if target_risk not in TARGET_GRADES:
+            return jsonify({'error': f'Invalid target_risk. Choose from: {list(TARGET_GRADES)}'}), 400
+        try:
+            student_data = {f: float(v) for f, v in data.get('student_data', {}).items() if f in FEATURE_NAMES}
+            max_marks = float(data.get('max_marks', 100))
+            limit = min(max(int(data.get('limit', 5)), 1), 20)
+        except (TypeError, ValueError, OverflowError):
+            return jsonify({'error': 'student_data, max_marks and limit must be numeric'}), 400
+        # NaN, infinite or out-of-range inputs would fail or blow up the search grid
+        try:
+            check_student(student_data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if not (math.isfinite(max_marks) and max_marks > 0):
+            return jsonify({'error': 'max_marks must be a positive number'}), 400
         
-        if not student:
-            return jsonify({'error': f'Student {student_id} not found'}), 404
+        result = search_counterfactuals(get_model(model_name, tenant), registry.scaler(tenant), student_data, target_risk,
+                                        counterfactual_scales, limit=limit, max_marks=max_marks)
+        return jsonify({
+            'success': True,
+            **result,
+            'model_used': model_name,
+            **({'routing': routing} if routing else {})
+        }), 200
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/predict-stream', methods=['POST'])
+def predict_stream():
+    """
+    Streaming batch prediction over newline-delimited JSON
+    
+    Request body: one student per line, e.g.
+        {"id": "st1", "age": 16, "failures": 0, "absences": 2, "studytime": 2, "G1": 12, "G2": 13}
+    Query params: model, max_marks (default 100), chunk_size (default 500),
+    format (full | compact: grades as numbers instead of strings)
+    
+    Rows are read lazily from the request stream and scored chunk_size at a
+    time; each chunk's results are written back as NDJSON as soon as it is
+    scored, so memory stays constant regardless of cohort size. Output lines
+    keep input order and carry the input line number (and id, if given).
+    """
+    model_name = request.args.get('model', 'linear_regression')
+    if model_name not in MODEL_NAMES:
+        return jsonify({'error': f'Invalid model. Choose from: {MODEL_NAMES}'}), 400
+    
+    try:
+        tenant = request_tenant()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if not registry.has(tenant, model_name):
+        return jsonify({'error': f'Model {model_name} not found'}), 404
+    
+    try:
+        max_marks = float(request.args.get('max_marks', 100))
+        chunk_size = max(1, int(request.args.get('chunk_size', 500)))
+    except ValueError:
+        return jsonify({'error': 'max_marks and chunk_size must be numbers'}), 400
+    try:
+        compact = response_options({}, request.args)['compact']
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    selected_model = get_model(model_name, tenant)
+    # Default-tenant rows also feed the drift monitor
+    tenant_scaler = None if tenant == DEFAULT_TENANT else registry.scaler(tenant)
+    
+    def flush(pending):
+        rows = [entry['row'] for entry in pending if 'row' in entry]
+        scored = iter(predict_batch(selected_model, rows, max_marks, tenant_scaler, compact)) if rows else iter(())
+        for entry in pending:
+            if 'row' in entry:
+                result = {'line': entry['line'], 'success': True, **next(scored)}
+                if entry['id'] is not None:
+                    result['id'] = entry['id']
+            else:
+                result = {'line': entry['line'], 'success': False, 'message': entry['error']}
+            yield dumps(result) + '\n'
+    
+    def generate():
+        pending = []
+        for line_number, line in enumerate(request.stream, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                row = None
+                pending.append({'line': line_number, 'error': f'Invalid JSON: {e}'})
+            
+            if row is not None:
+                missing = [key for key in FEATURE_NAMES if key not in row]
+                if missing:
+                    pending.append({'line': line_number, 'error': f'Missing required features: {missing}'})
+                else:
+                    try:
+                        features = {key: float(row[key]) for key in FEATURE_NAMES}
+                        pending.append({'line': line_number, 'row': features, 'id': row.get('id')})
+                    except (TypeError, ValueError):
+                        pending.append({'line': line_number, 'error': 'Features must be numeric'})
+            
+            if len(pending) >= chunk_size:
+                yield from flush(pending)
+                pending = []
+        yield from flush(pending)
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
+@app.route('/score-roster', methods=['POST'])
+def score_roster_endpoint():
+    """
+    Score every student and store the results in the predictions table
+    
+    Request body (optional):
+    {
+        "model": "linear_regression" | "random_forest" | "xgboost"
+    }
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        model_name = data.get('model', 'linear_regression')
         
-        # Fetch grades
-        cursor.execute("""
-            SELECT subject, score, max_marks, grade, date
-            FROM grades
-            WHERE student_id = %s
-            ORDER BY date DESC
-        """, (student_id,))
+        if model_name not in MODEL_NAMES:
+            return jsonify({'error': f'Invalid model. Choose from: {MODEL_NAMES}'}), 400
         
-        grades = cursor.fetchall()
+        if not os.path.exists(f'{model_name}_model.pkl'):
+            return jsonify({'error': f'Model {model_name} not found'}), 404
         
-        # Ensure max_marks has a default
-        for g in grades:
-            if not g.get('max_marks'):
-                g['max_marks'] = 20
-        
-        # Get prediction
-        g1_score = grades[0]['score'] if len(grades) > 0 else 10
-        g2_score = grades[1]['score'] if len(grades) > 1 else 10
-        
-        # Ensure student fields have defaults
-        age = student.get('age') or 16
-        failures = student.get('failures') or 0
-        absences = student.get('absences') or 0
-        studytime = student.get('studytime') or 2
-        
-        # Load model and make prediction
-        scaled_prediction = model.predict(np.array([[
-            age,
-            failures,
-            absences,
-            studytime,
-            g1_score,
-            g2_score
-        ]]))
-        
-        original_prediction = grade_scaler.inverse_transform(scaled_prediction.reshape(-1, 1))
-        final_grade = max(0, min(20, original_prediction[0][0]))
-        predicted_grade_on_new_scale = (final_grade / 20) * 100
+        summary = score_roster(model_name,
+                               on_scored=lambda ids, grades: set_cohort(model_name, ids, grades))
+        invalidate_class_analytics()
+        return jsonify({'success': True, **summary}), 200
+    
+    except Exception as e:
+        print(f"Roster scoring error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/score-changed', methods=['POST'])
+def score_changed_endpoint():
+    """
+    Re-score and re-explain only students changed since the last pass
+    
+    Reads the student_changes log written by the grade/student routes,
+    updates their stored predictions in one batch and refreshes their
+    cached explanations. Cost scales with the number of changed students.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        model_name = data.get('model', 'linear_regression')
         
-        risk_level = "High" if final_grade < 10 else "Medium" if final_grade < 14 else "Low"
+        if model_name not in MODEL_NAMES:
+            return jsonify({'error': f'Invalid model. Choose from: {MODEL_NAMES}'}), 400
         
-        # Calculate SHAP explanation
-        feature_names = ['age', 'failures', 'absences', 'studytime', 'G1', 'G2']
-        input_df = pd.DataFrame([[
-            age,
-            failures,
-            absences,
-            studytime,
-            g1_score,
-            g2_score
-        ]], columns=feature_names)
+        # Cached explanations come from the serving (linear) explainer
+        explain = explain_batch if model_name == 'linear_regression' else None
+        scored = {}
+        summary = score_changed(model_name, explain=explain,
+                                on_scored=lambda ids, grades: scored.update(zip(ids, grades.tolist())))
+        if summary['students']:
+            invalidate_class_analytics()
+            # Logged students that no longer exist were deleted
+            removed = [s for s in summary['students'] if s not in scored]
+            update_cohort(model_name, scored, removed)
         
-        explanation = calculate_shap_explanation(input_df, final_grade, risk_level)
+        explanations = summary.pop('explanations', {})
+        for student_id in summary['students']:
+            explanation_cache.pop(student_id, None)
+        for student_id, (features, explanation) in explanations.items():
+            if explanation is not None:
+                explanation_cache[student_id] = (features, explanation)
         
-        prediction_data = {
-            'predicted_grade': f"{predicted_grade_on_new_scale:.2f}",
-            'risk_level': risk_level,
+        return jsonify({'success': True, **summary}), 200
+    
+    except Exception as e:
+        print(f"Changed-student scoring error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
+# Parsed feature_importance.json, reloaded only when the file changes
+importance_cache = {'mtime': None, 'data': {}}
+
+@app.route('/feature-importance', methods=['GET'])
+def feature_importance_endpoint():
+    """
+    Precomputed global feature importance for one model
+    
+    Query params: model (default linear_regression). Serves mean |SHAP|
+    per feature and dependence-curve samples written at training time;
+    no explainer runs here. Responses are cacheable and carry an ETag
+    that changes when the models are retrained.
+    """
+    model_name = request.args.get('model', 'linear_regression')
+    if model_name not in MODEL_NAMES:
+        return jsonify({'error': f'Invalid model. Choose from: {MODEL_NAMES}'}), 400
+
+    if not os.path.exists(IMPORTANCE_FILE):
+        return jsonify({'error': 'Feature importance not found. Run train_all_models.py first.'}), 404
+
+    mtime = os.path.getmtime(IMPORTANCE_FILE)
+    if importance_cache['mtime'] != mtime:
+        importance_cache.update(mtime=mtime, data=load_importance())
+
+    importance = importance_cache['data'].get(model_name)
+    if importance is None:
+        return jsonify({'error': f'No feature importance for {model_name}'}), 404
+
+    response = jsonify({'success': True, **importance})
+    response.set_etag(f'{model_name}-{int(mtime)}')
+    response.cache_control.public = True
+    response.cache_control.max_age = 3600
+    return response.make_conditional(request)
+
+
+@app.route('/class-analytics', methods=['GET'])
+def class_analytics_endpoint():
+    """
+    Class-wide statistics in one small payload
+    
+    Returns overall and per-subject averages, the latest-prediction risk
+    distribution, a 10-point predicted-grade histogram and the at-risk
+    count. Aggregates run in SQL and are cached until grades, students or
+    predictions change.
+    """
+    try:
+        payload, cached = get_class_analytics()
+        return jsonify({'success': True, 'cached': cached, **payload}), 200
+    except Exception as e:
+        print(f"Class analytics error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
+# Largest k for /cohort: the response lists 2 * k students
+MAX_COHORT_K = 100
+
+
+@app.route('/cohort', methods=['GET'])
+def cohort_endpoint():
+    """
+    Cohort ranking from the sorted per-model grade index
+    
+    Query params: model (default linear_regression), k (default 10, at
+    most MAX_COHORT_K) and optionally student_id. Returns the k most at-risk and k highest
+    predicted students and, with student_id, that student's percentile.
+    503 with Retry-After while the index is still being built.
+    """
+    model_name = request.args.get('model', 'linear_regression')
+    k = request.args.get('k', 10, type=int)
+    student_id = request.args.get('student_id')
+
+    if model_name not in MODEL_NAMES:
+        return jsonify({'error': f'Invalid model. Choose from: {MODEL_NAMES}'}), 400
+    if k < 1 or k > MAX_COHORT_K:
+        return jsonify({'error': f'k must be between 1 and {MAX_COHORT_K}'}), 400
+
+    index = get_cohort(model_name)
+    if index is None:
+        # Being built in the background (or backing off after a failed build)
+        status = cohort_status(model_name)
+        response = jsonify(dict(status, error='Cohort index is not available yet, please retry'))
+        response.headers['Retry-After'] = str(max(1, int(status.get('retry_in', 5))))
+        return response, 503
+
+    try:
+        result = {
+            'success': True,
+            'model_used': model_name,
+            'cohort_size': len(index),
+            'at_risk': index.bottom(k),
+            'top': index.top(k)
         }
-        
-        if explanation:
-            prediction_data['explanation'] = explanation
-        else:
-            prediction_data['explanation'] = {
-                'summary': f"{risk_level} Risk",
-                'top_factors': []
+        if student_id is not None:
+            if student_id not in index.by_id:
+                return jsonify({'error': 'Student not found in cohort'}), 404
+            grade = index.by_id[student_id]
+            result['student'] = {
+                'student_id': student_id,
+                'predicted_grade': round(grade, 2),
+                'percentile': index.percentile(grade)
             }
+        return jsonify(result), 200
+    except Exception as e:
+        print(f"Cohort lookup error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/attendance-trend/student/<student_id>', methods=['GET'])
+def student_attendance_trend(student_id):
+    """
+    Weekly attendance rate and predicted grade for one student
+    
+    Query params: weeks (default 8), model (default linear_regression).
+    Reads the student_weekly_stats buckets, so the cost is O(weeks)
+    regardless of how many grades the student has.
+    """
+    weeks = request.args.get('weeks', 8, type=int)
+    model_name = request.args.get('model', 'linear_regression')
+    if model_name not in MODEL_NAMES:
+        return jsonify({'error': f'Invalid model. Choose from: {MODEL_NAMES}'}), 400
+    if weeks < 1:
+        return jsonify({'error': 'weeks must be at least 1'}), 400
+
+    try:
+        selected_model = get_model(model_name)
+        conn = get_db_connection()
+        try:
+            cursor = conn.cursor(dictionary=True)
+            trend = student_trend(cursor, selected_model, grade_scaler, student_id, weeks)
+            cursor.close()
+        finally:
+            conn.close()
+
+        if trend is None:
+            return jsonify({'error': 'Student not found'}), 404
+        return jsonify(trend), 200
+    except Exception as e:
+        print(f"Attendance trend error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/attendance-trend/class', methods=['GET'])
+def class_attendance_trend():
+    """
+    Weekly attendance rate and predicted grade for the average student
+    
+    Query params: weeks (default 8). Reads the class_weekly_stats buckets.
+    """
+    weeks = request.args.get('weeks', 8, type=int)
+    if weeks < 1:
+        return jsonify({'error': 'weeks must be at least 1'}), 400
+
+    try:
+        conn = get_db_connection()
+        try:
+            cursor = conn.cursor(dictionary=True)
+            trend = class_trend(cursor, serving_model(), grade_scaler, weeks)
+            cursor.close()
+        finally:
+            conn.close()
+        return jsonify(trend), 200
+    except Exception as e:
+        print(f"Class attendance trend error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
+# Student profile plus its materialized feature row (f_* columns, NULL
+# until the row exists; see feature_store.py)
+REPORT_STUDENT_QUERY = """
+    SELECT s.id, s.name, s.email, s.age, s.study_hours as studytime, s.failures, s.absences,
+           f.age AS f_age, f.failures AS f_failures, f.absences AS f_absences,
+           f.studytime AS f_studytime, f.g1 AS f_G1, f.g2 AS f_G2
+    FROM students s
+    LEFT JOIN student_features f ON f.student_id = s.id
+    WHERE s.id = %s
+"""
+
+REPORT_GRADES_QUERY = """
+    SELECT subject, score, max_marks, grade, date
+    FROM grades
+    WHERE student_id = %s
+    ORDER BY date DESC
+"""
+
+
+def fetch_report_data(student_id):
+    """Return (student, grades) for a report; raises LookupError for unknown students"""
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(REPORT_STUDENT_QUERY, (student_id,))
+        student = cursor.fetchone()
         
-        # Prepare student data for report with proper defaults
-        report_student_data = {
-            'id': student['id'],
-            'name': student.get('name', 'Unknown Student'),
-            'email': student.get('email', 'N/A'),
-            'age': age,
-            'studytime': studytime,
-            'failures': failures,
-            'absences': absences
-        }
-        
-        # Generate PDF
-        pdf_buffer = generate_student_report(report_student_data, grades, prediction_data)
+        if not student:
+            raise LookupError(f'Student {student_id} not found')
         
+        cursor.execute(REPORT_GRADES_QUERY, (student_id,))
+        grades = cursor.fetchall()
         cursor.close()
+    finally:
         conn.close()
+    return student, grades
+
+
+def prepare_report(student_id, student, grades, progress=None):
+    """
+    Predict and explain for a report
+    
+    Returns the (student_data, grades, prediction_data) arguments of
+    generate_student_report().
+    """
+    progress = progress or (lambda stage: None)
+    
+    # Ensure max_marks has a default
+    for g in grades:
+        if not g.get('max_marks'):
+            g['max_marks'] = 20
+    
+    # Get prediction
+    progress('predicting')
+    features = report_features(student, grades)
+    input_df = pd.DataFrame([features], columns=FEATURE_NAMES)
+    
+    scaled_prediction = serving_model().predict(input_df)
+    
+    original_prediction = grade_scaler.inverse_transform(scaled_prediction.reshape(-1, 1))
+    final_grade = max(0, min(20, original_prediction[0][0]))
+    predicted_grade_on_new_scale = (final_grade / 20) * 100
+    
+    risk_level = "High" if final_grade < 10 else "Medium" if final_grade < 14 else "Low"
+    
+    # Calculate SHAP explanation
+    progress('explaining')
+    cached = explanation_cache.get(student_id)
+    if cached and cached[0] == tuple(input_df.iloc[0].astype(float)):
+        explanation = cached[1]
+    else:
+        explanation = calculate_shap_explanation(input_df, final_grade, risk_level)
+    
+    prediction_data = {
+        'predicted_grade': f"{predicted_grade_on_new_scale:.2f}",
+        'risk_level': risk_level,
+        'explanation': explanation or {
+            'summary': f"{risk_level} Risk",
+            'top_factors': []
+        }
+    }
+    
+    # Prepare student data for report with proper defaults
+    report_student_data = {
+        'id': student['id'],
+        'name': student.get('name', 'Unknown Student'),
+        'email': student.get('email', 'N/A'),
+        'age': features['age'],
+        'studytime': features['studytime'],
+        'failures': features['failures'],
+        'absences': features['absences']
+    }
+    return report_student_data, grades, prediction_data
+
+
+def build_student_report(student_id, progress=None):
+    """
+    Fetch a student, predict, explain and render their PDF report
+    
+    progress, if given, is called with each stage name (see
+    report_jobs.STAGE_PROGRESS). Raises LookupError for unknown students.
+    Returns a BytesIO with the PDF.
+    """
+    progress = progress or (lambda stage: None)
+    progress('fetching')
+    student, grades = fetch_report_data(student_id)
+    report_args = prepare_report(student_id, student, grades, progress)
+    
+    # Generate PDF
+    progress('rendering')
+    return generate_student_report(*report_args)
+
+
+report_jobs = ReportJobs(build_student_report, max_workers=2)
+
+
+@app.route('/generate-report/<student_id>', methods=['GET'])
+def generate_report_endpoint(student_id):
+    """
+    Generate PDF report for a specific student
+    
+    URL: GET /generate-report/st1 (or any student ID string)
+    Returns: PDF file download
+    
+    Blocks until the PDF is rendered; prefer POST /reports for bulk or
+    interactive use.
+    """
+    try:
+        pdf_buffer = build_student_report(student_id)
         
         # Return PDF as download
         return send_file(
@@ -558,11 +1401,211 @@ def generate_report_endpoint(student_id):
             download_name=f'student_{student_id}_report.pdf'
         )
     
+    except LookupError as e:
+        return jsonify({'error': str(e)}), 404
     except Exception as e:
         print(f"Report generation error: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/reports', methods=['POST'])
+def submit_report_job():
+    """
+    Queue a PDF report and return immediately
+    
+    Request body: {"student_id": "st1"}
+    Returns 202 with the job; poll GET /reports/<job_id> and download the
+    PDF from GET /reports/<job_id>/download once status is "done".
+    """
+    data = request.get_json(silent=True) or {}
+    student_id = data.get('student_id')
+    if not student_id:
+        return jsonify({'error': 'Missing student_id'}), 400
+    
+    job, created = report_jobs.submit(str(student_id))
+    if job is None:
+        response = jsonify({'error': 'Report queue is full, try again later'})
+        response.headers['Retry-After'] = '30'
+        return response, 503
+    
+    return jsonify({'success': True, 'created': created, **job}), 202
+
+
+@app.route('/reports/<job_id>', methods=['GET'])
+def report_job_status(job_id):
+    """Status and progress (0-100) of a report job"""
+    job = report_jobs.status(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown or expired report job'}), 404
+    return jsonify({'success': True, **job}), 200
+
+
+@app.route('/reports/<job_id>/download', methods=['GET'])
+def download_report(job_id):
+    """The finished PDF of a report job (409 until it is done)"""
+    job = report_jobs.status(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown or expired report job'}), 404
+    if job['status'] != 'done':
+        return jsonify({'error': f"Report is {job['status']}", 'status': job['status']}), 409
+    if not os.path.exists(report_jobs.path(job_id)):
+        return jsonify({'error': 'Unknown or expired report job'}), 404
+    
+    return send_file(
+        os.path.abspath(report_jobs.path(job_id)),
+        mimetype='application/pdf',
+        as_attachment=True,
+        download_name=f"student_{job['student_id']}_report.pdf"
+    )
+
+
+@app.route('/admission-stats', methods=['GET'])
+def admission_stats():
+    """
+    Load-shedding counters
+    
+    Per lane: concurrency limit, in-flight and queued requests, admitted
+    and rejected counts and the longest queue wait. Also reports the
+    background report and explanation queues and the audit log buffer.
+    """
+    return jsonify({
+        'success': True,
+        'lanes': admission.stats(),
+        'report_jobs': report_jobs.queue_depth(),
+        'explanation_jobs': {'pending': explanation_jobs.pending},
+        'audit_log': audit_log.stats()
+    }), 200
+
+
+@app.route('/shadow', methods=['GET'])
+def shadow_stats():
+    """
+    Candidate vs serving model on sampled live traffic
+    
+    Per staged candidate: holdout metrics from staging, samples compared,
+    risk-bucket agreement rate and flips (served->candidate), grade deltas
+    on the 0-20 scale and candidate latency per row. Queue depth and
+    dropped samples show whether the worker keeps up.
+    """
+    return jsonify(dict(shadow.stats(), success=True)), 200
+
+
+@app.route('/model-registry', methods=['GET'])
+def model_registry_stats():
+    """
+    Per-tenant model cache counters
+    
+    Memory budget and estimated use, plus loads, hits, evictions, total
+    load time and resident models for each tenant seen so far.
+    """
+    return jsonify(dict(registry.stats(), success=True)), 200
+
+
+@app.route('/memory', methods=['GET'])
+def memory_stats():
+    """
+    Worker memory by component
+    
+    Estimated KB held by each model, the SHAP background, each SHAP
+    explainer and the in-process caches, next to the process RSS and PSS.
+    Objects shared by two components are charged to the first one listed
+    (an explainer is charged only for what it adds to its model and the
+    background). What RSS has beyond the components is mostly the
+    interpreter and the imported libraries.
+    """
+    models = {'serving/linear_regression': serving_model(), 'serving/grade_scaler': grade_scaler}
+    models.update({f'{tenant}/{name}': loaded for (tenant, name), loaded in registry.resident().items()})
+    explainers = {'serving/linear_regression': serving_explainer()}
+    explainers.update({f'{tenant}/{name}': explainer for (tenant, name), (_, explainer) in list(model_explainers.items())})
+    components = memory_report({
+        'models': models,
+        'background': {'shap_background': explainer_background, 'x_train': X_train},
+        'explainers': explainers,
+        'caches': {
+            'explanation_cache': explanation_cache,
+            'cohort_index': cached_cohorts(),
+            'calibration': calibration_cache,
+            'feature_importance': importance_cache,
+            'drift_monitor': drift_monitor,
+            'shadow': shadow,
+            'audit_log': audit_log,
+            'explanation_jobs': explanation_jobs,
+            'report_jobs': report_jobs
+        }
+    })
+    process = process_memory()
+    accounted_mb = round(sum(group['total_mb'] for group in components.values()), 2)
+    return jsonify({
+        'success': True,
+        'profile': MEMORY_PROFILE,
+        'process': dict(process, accounted_mb=accounted_mb,
+                        unaccounted_mb=round(process['rss_mb'] - accounted_mb, 1) if process['rss_mb'] is not None else None),
+        'components': components,
+        'libraries': loaded_libraries()
+    }), 200
+
+
+@app.route('/backtest', methods=['POST'])
+def backtest_endpoint():
+    """
+    Evaluate every model of the tenant on a labelled CSV
+    
+    Request body: the CSV itself (text/csv) or a multipart upload in a
+    "file" field, in the UCI student format (student-mat.csv,
+    student-por.csv) or any comma/semicolon CSV with the six features and
+    G3. Query params: chunk_size (default 5000), tenant.
+    
+    The upload is read chunk by chunk and each chunk is scored by all
+    models in parallel. Per model: R², MAE, RMSE and mean error on the
+    0-20 scale, risk-bucket confusion matrix and accuracy, predict latency
+    per row and, for the default models, the R² from model_metrics.json.
+    Very large files are better run offline with backtest.py.
+    """
+    try:
+        tenant = request_tenant()
+        chunk_size = int(request.args.get('chunk_size', CHUNK_ROWS))
+        if chunk_size < 1:
+            raise ValueError('chunk_size must be a positive integer')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if request.files:
+        if 'file' not in request.files:
+            return jsonify({'error': 'Upload the CSV in a "file" field'}), 400
+        source = request.files['file'].stream
+    else:
+        source = request.stream
+    
+    try:
+        models, tenant_scaler = tenant_models(registry, tenant)
+    except FileNotFoundError as e:
+        return jsonify({'error': f'Model or scaler not found: {e}'}), 404
+    if not models:
+        return jsonify({'error': f'No models found for tenant {tenant}'}), 404
+    
+    try:
+        report = backtest(source, models, tenant_scaler, chunk_size=chunk_size,
+                          frozen_metrics=load_frozen_metrics() if tenant == DEFAULT_TENANT else None)
+    except (ValueError, pd.errors.ParserError, UnicodeDecodeError) as e:
+        return jsonify({'error': f'Invalid CSV: {e}'}), 400
+    return jsonify(dict(report, success=True, tenant=tenant)), 200
+
+
+@app.route('/drift', methods=['GET'])
+def drift_endpoint():
+    """
+    Feature drift of live inputs against the training data
+    
+    Per feature: PSI and binned KS statistic over the last one to two
+    windows of scored rows, with a stable/moderate/significant status.
+    Recomputed at most once a minute; ?refresh=true forces it.
+    """
+    if drift_monitor is None:
+        return jsonify({'error': 'No drift reference. Run train_all_models.py first.'}), 404
+    refresh = request.args.get('refresh', 'false').lower() == 'true'
+    return jsonify(dict(drift_monitor.report(force=refresh), success=True)), 200
+
+
 if __name__ == '__main__':
     print("="*60)
     print("STUDENT GRADE PREDICTION API")
@@ -570,9 +1613,29 @@ if __name__ == '__main__':
     print("\nAvailable endpoints:")
     print("  POST   /predict              - Original prediction endpoint")
     print("  POST   /predict-with-model   - Predict with model selection")
+    print("  GET    /explanations/<token> - Explanation that missed its deadline")
     print("  POST   /simulate             - What-If simulation")
+    print("  POST   /predict-consensus    - All models in one request with consensus")
+    print("  POST   /counterfactual       - Smallest changes that reach a target risk level")
+    print("  POST   /predict-stream       - Streaming NDJSON batch prediction")
+    print("  POST   /score-roster         - Score all students into predictions table")
+    print("  POST   /score-changed        - Re-score only students changed since last pass")
     print("  GET    /model-metrics        - Get all model metrics")
+    print("  GET    /feature-importance   - Precomputed global feature importance")
+    print("  GET    /class-analytics      - Cached class statistics")
+    print("  GET    /cohort               - Percentile rank and top/bottom-k students")
+    print("  GET    /attendance-trend/student/<id> - Weekly attendance and grade trend")
+    print("  GET    /attendance-trend/class - Class-wide weekly trend")
     print("  GET    /generate-report/<id>  - Generate PDF report")
+    print("  POST   /reports              - Queue a PDF report job")
+    print("  GET    /reports/<job_id>     - Report job status")
+    print("  GET    /reports/<job_id>/download - Download a finished report")
+    print("  GET    /admission-stats      - Queue depth and load-shedding counters")
+    print("  GET    /drift                - Feature drift (PSI/KS) against training data")
+    print("  GET    /model-registry       - Per-tenant model loads, hits and evictions")
+    print("  GET    /shadow               - Candidate model agreement on sampled live traffic")
+    print("  GET    /memory               - Memory held by models, explainers, background and caches")
+    print("  POST   /backtest             - Evaluate every model on an uploaded labelled CSV")
     print("\nStarting Flask server...")
     print("="*60)
     
@@ -0,0 +1,227 @@
+"""
+Asynchronous PDF report jobs
+Reports are rendered by a small in-process worker pool so web workers stay
+free for predictions during report storms. Each job is a JSON record in
+reports/<job_id>.json next to its finished PDF, reports/<job_id>.pdf, so
+any gunicorn worker sharing the directory can report on and serve a job
+another worker rendered. Files are deleted once they are older than the
+time-to-live, whichever worker notices first.
+
+A worker rewrites the records of its queued and running jobs at least
+every stale_after / 4 seconds (updated_at). A queued or running job whose
+record is older than stale_after belongs to a worker that died, and is
+marked failed so the student can resubmit.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+REPORT_DIR = 'reports'
+
+JOB_ID = re.compile(r'^[0-9a-f]{32}$')
+
+# Rough share of the work done when each stage starts
+STAGE_PROGRESS = {
+    'queued': 0,
+    'fetching': 10,
+    'predicting': 30,
+    'explaining': 50,
+    'rendering': 75,
+    'done': 100
+}
+
+
+class ReportJobs:
+    """
+    Bounded report job queue, with job state kept on disk
+
+    render(student_id, progress) must return a BytesIO with the PDF, call
+    progress(stage) as it goes and raise LookupError for unknown students.
+    """
+
+    def __init__(self, render, max_workers=2, max_queued=50, ttl=3600, stale_after=120,
+                 report_dir=REPORT_DIR):
+        self.render = render
+        self.max_queued = max_queued
+        self.ttl = ttl
+        self.stale_after = stale_after
+        self.report_dir = report_dir
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='report')
+        self._lock = threading.Lock()
+        # Queued and running jobs owned by this worker, kept fresh by the heartbeat
+        self._active = set()
+        self._heartbeat = None
+
+        # Other workers' jobs live here too: only expired files are removed
+        os.makedirs(report_dir, exist_ok=True)
+        self.sweep()
+
+    def submit(self, student_id):
+        """
+        Queue a report and return (job, created)
+
+        A queued or running job for the same student, in any worker, is
+        reused rather than rendering the same PDF twice. Returns
+        (None, False) when the shared queue is full. Jobs left behind by a
+        dead worker are failed first, so they neither block a resubmit nor
+        count toward max_queued.
+        """
+        self.sweep()
+        with self._lock:
+            active = [job for job in self._live_records() if job['status'] in ('queued', 'running')]
+            for job in active:
+                if job['student_id'] == student_id:
+                    return job, False
+            if len(active) >= self.max_queued:
+                return None, False
+
+            job = {
+                'job_id': uuid.uuid4().hex,
+                'student_id': student_id,
+                'status': 'queued',
+                'stage': 'queued',
+                'progress': 0,
+                'created_at': time.time(),
+                'finished_at': None,
+                'expires_at': None,
+                'error': None
+            }
+            self._write(job)
+            self._active.add(job['job_id'])
+            if self._heartbeat is None:
+                self._heartbeat = threading.Thread(target=self._beat, name='report-heartbeat', daemon=True)
+                self._heartbeat.start()
+        self.pool.submit(self._run, job['job_id'], student_id)
+        return dict(job), True
+
+    def _beat(self):
+        while True:
+            time.sleep(self.stale_after / 4)
+            with self._lock:
+                job_ids = list(self._active)
+            for job_id in job_ids:
+                self._update(job_id)
+
+    def _is_stale(self, job):
+        updated_at = job.get('updated_at', job['created_at'])
+        return job['status'] in ('queued', 'running') and updated_at <= time.time() - self.stale_after
+
+    def _expire_if_stale(self, job):
+        """Mark a job abandoned by a dead worker failed; call with self._lock held"""
+        if self._is_stale(job):
+            now = time.time()
+            job.update(status='failed', error='Report worker stopped; please resubmit',
+                       finished_at=now, expires_at=now + self.ttl)
+            self._write(job)
+        return job
+
+    def _live_records(self):
+        """All records, with abandoned jobs marked failed; call with self._lock held"""
+        for job in self._records():
+            yield self._expire_if_stale(job)
+
+    def _record_path(self, job_id):
+        return os.path.join(self.report_dir, f'{job_id}.json')
+
+    def _write(self, job):
+        job['updated_at'] = time.time()
+        path = self._record_path(job['job_id'])
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(job, f)
+        os.replace(tmp_path, path)
+
+    def _read(self, job_id):
+        try:
+            with open(self._record_path(job_id), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _records(self):
+        for name in os.listdir(self.report_dir):
+            if name.endswith('.json'):
+                job = self._read(name[:-len('.json')])
+                if job is not None:
+                    yield job
+
+    def _update(self, job_id, **fields):
+        # Only the worker running a job writes its record
+        with self._lock:
+            job = self._read(job_id)
+            if job is not None:
+                job.update(fields)
+                self._write(job)
+
+    def _run(self, job_id, student_id):
+        self._update(job_id, status='running')
+
+        def progress(stage):
+            self._update(job_id, stage=stage, progress=STAGE_PROGRESS[stage])
+
+        try:
+            pdf_buffer = self.render(student_id, progress)
+            path = self.path(job_id)
+            tmp_path = f'{path}.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(pdf_buffer.getvalue())
+            os.replace(tmp_path, path)
+            now = time.time()
+            self._update(job_id, status='done', stage='done', progress=100,
+                         finished_at=now, expires_at=now + self.ttl)
+        except LookupError as e:
+            self._fail(job_id, str(e))
+        except Exception as e:
+            print(f"Report job {job_id} failed: {str(e)}")
+            self._fail(job_id, str(e))
+        finally:
+            with self._lock:
+                self._active.discard(job_id)
+
+    def _fail(self, job_id, error):
+        now = time.time()
+        self._update(job_id, status='failed', error=error, finished_at=now, expires_at=now + self.ttl)
+
+    def path(self, job_id):
+        return os.path.join(self.report_dir, f'{job_id}.pdf')
+
+    def status(self, job_id):
+        """Return the job record, or None if unknown or expired"""
+        if not JOB_ID.match(job_id):
+            return None
+        with self._lock:
+            job = self._read(job_id)
+            if job is not None:
+                job = self._expire_if_stale(job)
+        if job is None or (job['expires_at'] is not None and job['expires_at'] <= time.time()):
+            return None
+        return job
+
+    def queue_depth(self):
+        with self._lock:
+            jobs = list(self._live_records())
+        return {
+            'queued': sum(1 for j in jobs if j['status'] == 'queued'),
+            'running': sum(1 for j in jobs if j['status'] == 'running')
+        }
+
+    def sweep(self):
+        """
+        Delete records, PDFs and partial files older than the TTL
+
+        A running job rewrites its record at every stage, so only finished
+        jobs and jobs whose worker died ever get this old.
+        """
+        cutoff = time.time() - self.ttl
+        for name in os.listdir(self.report_dir):
+            path = os.path.join(self.report_dir, name)
+            try:
+                if os.path.getmtime(path) <= cutoff:
+                    os.remove(path)
+            except OSError:
+                pass  # another worker removed it first
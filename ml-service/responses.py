@@ -0,0 +1,125 @@
+"""
+Response shaping and JSON encoding for the prediction endpoints
+Callers that only need grade and risk can skip the SHAP explanation
+(explain=false), keep only some top-level fields (fields=...) and ask for
+plain numbers instead of display strings (format=compact). Responses are
+encoded with orjson when it is installed, falling back to the standard
+library encoder with identical output rules otherwise.
+"""
+
+import json
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional: the stdlib encoder is used instead
+    orjson = None
+
+RESPONSE_FORMATS = ('full', 'compact')
+
+# Keys that are always returned, whatever fields asks for
+ALWAYS_RETURNED = ('success',)
+
+if orjson is not None:
+    # Dates go through Flask's default() so they keep Flask's HTTP-date format
+    _ORJSON_OPTIONS = (orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS |
+                       orjson.OPT_PASSTHROUGH_DATETIME)
+
+
+def dumps(obj, default=None, sort_keys=False):
+    """Compact JSON text for obj"""
+    if orjson is None:
+        return json.dumps(obj, default=default, sort_keys=sort_keys, separators=(',', ':'))
+    options = _ORJSON_OPTIONS | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+    return orjson.dumps(obj, default=default, option=options).decode()
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson (same key order and date format as the default)"""
+
+    def dumps(self, obj, **kwargs):
+        # Pretty-printed (debug) output keeps the stdlib encoder
+        if orjson is None or kwargs.get('indent') is not None:
+            return super().dumps(obj, **kwargs)
+        return dumps(obj, default=self.default, sort_keys=kwargs.get('sort_keys', self.sort_keys))
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+
+def _flag(value, name):
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.lower() in ('true', '1', 'false', '0'):
+        return value.lower() in ('true', '1')
+    raise ValueError(f'{name} must be true or false')
+
+
+def response_options(data, args):
+    """
+    explain, fields and format from the request body, else the query string
+
+    Returns {'explain': bool, 'fields': set or None, 'compact': bool}.
+    Raises ValueError for malformed values.
+    """
+    def option(name):
+        return data[name] if name in data else args.get(name)
+
+    explain = option('explain')
+    explain = True if explain is None else _flag(explain, 'explain')
+
+    fields = option('fields')
+    if isinstance(fields, str):
+        fields = [f.strip() for f in fields.split(',') if f.strip()]
+    if fields is not None and (not isinstance(fields, list) or not all(isinstance(f, str) for f in fields)):
+        raise ValueError('fields must be a list or comma-separated string of field names')
+
+    response_format = option('format') or 'full'
+    if response_format not in RESPONSE_FORMATS:
+        raise ValueError(f'format must be one of {list(RESPONSE_FORMATS)}')
+
+    fields = set(fields) if fields is not None else None
+    return {
+        # Asking for fields without the explanation also skips computing it
+        'explain': explain and (fields is None or 'explanation' in fields),
+        'fields': fields,
+        'compact': response_format == 'compact'
+    }
+
+
+def wants(options, *names):
+    """True if any of names would appear in the response"""
+    return options['fields'] is None or any(name in options['fields'] for name in names)
+
+
+def _number(text):
+    return float(text.rstrip('%')) if isinstance(text, str) else text
+
+
+def compact(result):
+    """Copy of a prediction result with numeric strings turned into numbers"""
+    result = dict(result)
+    if 'predicted_grade' in result:
+        result['predicted_grade'] = _number(result['predicted_grade'])
+    if isinstance(result.get('interval'), dict):
+        result['interval'] = {k: _number(v) for k, v in result['interval'].items()}
+    explanation = result.get('explanation')
+    if isinstance(explanation, dict) and explanation.get('top_factors'):
+        result['explanation'] = dict(explanation, top_factors=[
+            dict(f, contribution_percentage=_number(f['contribution_percentage']))
+            if 'contribution_percentage' in f else f
+            for f in explanation['top_factors']
+        ])
+    return result
+
+
+def shape_response(result, options):
+    """Apply fields and format to a successful prediction result"""
+    if options['compact']:
+        result = compact(result)
+    if options['fields'] is not None:
+        result = {k: v for k, v in result.items() if k in options['fields'] or k in ALWAYS_RETURNED}
+    return result
@@ -0,0 +1,337 @@
+"""
+Incremental retraining from the live students/grades tables
+Streams labelled rows from MySQL, updates each model on a window of the
+most recent rows and publishes the candidate only when it beats the
+serving model on a holdout set. With
+--shadow, better candidates are staged in candidates/ instead, where the
+service scores them against live traffic (shadow_mode.py) before anyone
+publishes them.
+
+Usage: python retrain_from_db.py [--chunk-size 500] [--window 5000] [--dry-run | --shadow]
+"""
+
+import argparse
+import json
+import heapq
+import os
+import zlib
+from datetime import datetime
+from itertools import groupby
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.metrics import mean_absolute_error, r2_score
+from sklearn.model_selection import train_test_split
+from xgboost import XGBRegressor
+
+from database import get_db_connection
+from feature_importance import refresh_importance
+from calibration import calibrate, save_calibration
+from shadow_mode import stage_candidate
+from scoring import FEATURE_NAMES, build_feature_row, grade_on_20_scale
+
+MODEL_IDS = ['linear_regression', 'random_forest', 'xgboost']
+STATE_FILE = 'retrain_state.json'
+METRICS_FILE = 'model_metrics.json'
+
+# Every student's grade history, oldest grade last; the window is cut
+# from it by grade date while streaming
+LABELLED_ROWS_QUERY = """
+    SELECT s.id, s.age, s.study_hours AS studytime, s.failures, s.absences,
+           g.score, g.max_marks, g.date, g.created_at
+    FROM students s
+    JOIN grades g ON g.student_id = s.id
+    ORDER BY s.id, g.date DESC, g.id DESC
+"""
+
+NEWEST_GRADE_QUERY = "SELECT MAX(created_at) AS newest FROM grades"
+
+
+def load_state():
+    """Return the watermark of the last successful run"""
+    if not os.path.exists(STATE_FILE):
+        return {'last_run': '1970-01-01 00:00:00'}
+    with open(STATE_FILE, 'r') as f:
+        return json.load(f)
+
+
+def save_state(state):
+    with open(STATE_FILE, 'w') as f:
+        json.dump(state, f, indent=2)
+
+
+def newest_grade():
+    """created_at of the most recently entered grade, or None if there are none"""
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(NEWEST_GRADE_QUERY)
+        newest = cursor.fetchone()['newest']
+        return str(newest) if newest is not None else None
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def stream_student_histories(chunk_size=500):
+    """
+    Yield (student, grades) pairs from an unbuffered cursor
+
+    Rows are pulled with fetchmany() so only one chunk lives in memory at
+    a time. The query is ordered by student, so each student's grades are
+    contiguous and can be grouped without a second pass.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True, buffered=False)
+    try:
+        cursor.execute(LABELLED_ROWS_QUERY)
+
+        def rows():
+            while True:
+                chunk = cursor.fetchmany(chunk_size)
+                if not chunk:
+                    return
+                yield from chunk
+
+        for _, student_rows in groupby(rows(), key=lambda r: r['id']):
+            grades = list(student_rows)
+            yield grades[0], grades
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def labelled_rows(student, grades):
+    """
+    Turn one grade history into (features, G3) training rows
+
+    Each grade with at least two earlier grades becomes a label, and the
+    features are built from the earlier history exactly as
+    generate_report_endpoint() builds them for scoring.
+    """
+    for i in range(len(grades) - 2):
+        features = build_feature_row(student, grades[i + 1:])
+        yield features, grade_on_20_scale(grades[i])
+
+
+class RecentWindow:
+    """The size most recent labelled rows by grade date, kept in a bounded heap"""
+
+    def __init__(self, size):
+        self.size = size
+        self._heap = []
+        self._seen = 0
+
+    def add(self, date, row):
+        # seen breaks date ties, so rows themselves are never compared
+        self._seen += 1
+        item = (date, self._seen, row)
+        if len(self._heap) < self.size:
+            heapq.heappush(self._heap, item)
+        elif item[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, item)
+
+    def rows(self):
+        """Rows oldest first"""
+        return [row for _, _, row in sorted(self._heap, key=lambda item: item[:2])]
+
+    def __len__(self):
+        return len(self._heap)
+
+
+def in_holdout(student_id, holdout_pct=20):
+    """Stable holdout assignment so a student never moves between splits"""
+    return zlib.crc32(str(student_id).encode()) % 100 < holdout_pct
+
+
+def load_base_training_set(grade_scaler, dataset_path='student-mat.csv'):
+    """Recreate the static 80% training split used by train_all_models.py"""
+    df = pd.read_csv(dataset_path, sep=';')
+    y_scaled = grade_scaler.transform(df[['G3']].values.reshape(-1, 1))
+    X_train, _, y_train, _ = train_test_split(
+        df[FEATURE_NAMES], y_scaled, test_size=0.2, random_state=42
+    )
+    return X_train.astype(float).reset_index(drop=True), y_train.ravel()
+
+
+def fit_candidate(model_id, current, X_base, y_base, X_window, y_window, boost_rounds):
+    """
+    Build a candidate from the serving model
+
+    XGBoost continues boosting from the current booster on the new window.
+    The other models are refit on the static training set plus the window.
+    """
+    if model_id == 'xgboost':
+        params = current.get_params()
+        params['n_estimators'] = boost_rounds
+        candidate = XGBRegressor(**params)
+        candidate.fit(X_window, y_window, xgb_model=current.get_booster())
+        return candidate
+
+    candidate = clone(current)
+    X_fit = pd.concat([X_base, X_window], ignore_index=True)
+    y_fit = np.concatenate([y_base, y_window])
+    candidate.fit(X_fit, y_fit)
+    return candidate
+
+
+def bump_version(version):
+    """v1.0 -> v1.1"""
+    major, minor = version.lstrip('v').split('.')
+    return f"v{major}.{int(minor) + 1}"
+
+
+def publish(model_id, candidate, metrics, holdout_scores):
+    """Atomically replace the served model file and record its version"""
+    model_filename = f'{model_id}_model.pkl'
+    tmp_filename = f'{model_filename}.tmp'
+    joblib.dump(candidate, tmp_filename)
+    os.replace(tmp_filename, model_filename)
+
+    entry = metrics.setdefault(model_id, {})
+    entry['version'] = bump_version(entry.get('version', 'v1.0'))
+    entry['holdout_mae'] = round(float(holdout_scores['mae']), 4)
+    entry['holdout_r2'] = round(float(holdout_scores['r2']), 4)
+    entry['updated_at'] = datetime.now().isoformat(timespec='seconds')
+    return entry['version']
+
+
+def retrain_from_db(chunk_size=500, window=5000, boost_rounds=20,
+                    min_holdout=10, since=None, dry_run=False, shadow=False):
+    """
+    Refit on the most recent labelled rows and publish improved models
+
+    The training window and the holdout each hold the window most recent
+    labelled rows by grade date, from all students. The watermark only
+    decides whether any grade arrived since the last run; older rows stay
+    in the window until newer ones push them out. shadow stages improved
+    models for shadow evaluation instead; like dry_run it leaves the
+    serving files and the watermark alone.
+    """
+    print("="*60)
+    print("INCREMENTAL RETRAINING FROM LIVE GRADES")
+    print("="*60)
+
+    state = load_state()
+    since = since or state['last_run']
+    newest = newest_grade()
+    if newest is None or newest <= since:
+        print(f"\nNo grades entered since {since}. Nothing published.")
+        return {}
+    print(f"\n1. Streaming grade histories for the {window} most recent labelled rows...")
+
+    grade_scaler = joblib.load('grade_scaler.pkl')
+    X_base, y_base = load_base_training_set(grade_scaler)
+    train_window = RecentWindow(window)
+    holdout = RecentWindow(window)
+
+    for student, grades in stream_student_histories(chunk_size):
+        target = holdout if in_holdout(student['id']) else train_window
+        # labelled_rows() yields one row per grade, newest first
+        for grade, row in zip(grades, labelled_rows(student, grades)):
+            target.add(grade['date'], row)
+
+    print(f"   Training window: {len(train_window)} rows")
+    print(f"   Holdout:         {len(holdout)} rows")
+
+    if not train_window or len(holdout) < min_holdout:
+        print("\nNot enough new labelled data to retrain. Nothing published.")
+        return {}
+
+    def to_xy(rows):
+        X = pd.DataFrame([r[0] for r in rows], columns=FEATURE_NAMES).astype(float)
+        y = grade_scaler.transform(np.array([[r[1]] for r in rows])).ravel()
+        return X, y
+
+    X_window, y_window = to_xy(train_window.rows())
+    X_holdout, y_holdout = to_xy(holdout.rows())
+
+    with open(METRICS_FILE, 'r') as f:
+        metrics = json.load(f)
+
+    print("\n2. Updating models...")
+    print("-"*60)
+    published = {}
+    calibrations = {}
+
+    for model_id in MODEL_IDS:
+        model_filename = f'{model_id}_model.pkl'
+        if not os.path.exists(model_filename):
+            print(f"\n   Skipping {model_id}: {model_filename} not found")
+            continue
+
+        current = joblib.load(model_filename)
+        candidate = fit_candidate(model_id, current, X_base, y_base,
+                                  X_window, y_window, boost_rounds)
+
+        current_pred = current.predict(X_holdout)
+        candidate_pred = candidate.predict(X_holdout)
+        current_mae = mean_absolute_error(y_holdout, current_pred)
+        candidate_mae = mean_absolute_error(y_holdout, candidate_pred)
+
+        print(f"\n   {model_id}")
+        print(f"   Holdout MAE: current {current_mae:.4f} | candidate {candidate_mae:.4f}")
+
+        if candidate_mae >= current_mae:
+            print("   Kept current model")
+            continue
+
+        if dry_run:
+            print("   Candidate is better (dry run, not published)")
+            continue
+
+        if shadow:
+            stage_candidate(model_id, candidate, {
+                'mae': candidate_mae,
+                'r2': r2_score(y_holdout, candidate_pred),
+                'serving_mae': current_mae
+            })
+            published[model_id] = 'shadow'
+            print("   Staged for shadow evaluation")
+            continue
+
+        version = publish(model_id, candidate, metrics, {
+            'mae': candidate_mae,
+            'r2': r2_score(y_holdout, candidate_pred)
+        })
+        published[model_id] = version
+        # The holdout was never fitted on, so it doubles as calibration data
+        calibrations[model_id] = calibrate(model_id, candidate, X_holdout, y_holdout, grade_scaler)
+        print(f"   Published {version}")
+
+    if not (dry_run or shadow):
+        with open(METRICS_FILE, 'w') as f:
+            json.dump(metrics, f, indent=2)
+        state['last_run'] = newest
+        save_state(state)
+        if published:
+            refresh_importance(list(published))
+            save_calibration(calibrations)
+
+    print("\n" + "="*60)
+    print(f"Published: {published or 'none'}")
+    print("="*60)
+    return published
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Retrain models from live MySQL grades')
+    parser.add_argument('--chunk-size', type=int, default=500, help='rows per fetchmany() call')
+    parser.add_argument('--window', type=int, default=5000, help='most recent labelled rows (by grade date) to refit on')
+    parser.add_argument('--boost-rounds', type=int, default=20, help='extra XGBoost rounds per run')
+    parser.add_argument('--since', help='override the stored watermark (YYYY-MM-DD HH:MM:SS)')
+    parser.add_argument('--dry-run', action='store_true', help='evaluate without publishing')
+    parser.add_argument('--shadow', action='store_true',
+                        help='stage better models in candidates/ for shadow evaluation instead of publishing')
+    args = parser.parse_args()
+
+    retrain_from_db(
+        chunk_size=args.chunk_size,
+        window=args.window,
+        boost_rounds=args.boost_rounds,
+        since=args.since,
+        dry_run=args.dry_run,
+        shadow=args.shadow
+    )
@@ -0,0 +1,260 @@
+"""
+Roster-wide risk scoring job
+Scores every student in one vectorized pass and bulk-upserts the results
+into the predictions table that the dashboard reads. Feature rows come from the materialized
+student_features table (feature_store.py). With --changed-only, only
+students recorded in the student_changes log since the last pass have
+their feature rows refreshed and are re-scored, so a refresh costs
+O(changes) rather than O(roster). Each model keeps its own watermark, so
+a pass with one model never hides changes from another.
+
+Usage: python score_roster.py [--model linear_regression] [--changed-only]
+"""
+
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+from itertools import groupby
+
+import joblib
+import pandas as pd
+
+from database import get_db_connection
+from calibration import load_calibration, risk_confidence
+from feature_store import fetch_materialized, refresh_features
+from scoring import FEATURE_NAMES, build_feature_row, scale_predictions, risk_levels
+
+# Each student with at most their two most recent grades (G1, G2)
+ROSTER_QUERY = """
+    SELECT s.id, s.age, s.study_hours AS studytime, s.failures, s.absences,
+           g.score, g.max_marks
+    FROM students s
+    LEFT JOIN (
+        SELECT student_id, score, max_marks,
+               ROW_NUMBER() OVER (PARTITION BY student_id ORDER BY date DESC, id DESC) AS rn
+        FROM grades
+    ) g ON g.student_id = s.id AND g.rn <= 2
+    {where}
+    ORDER BY s.id, g.rn
+"""
+
+STATE_FILE = 'score_state.json'
+
+# Students touched since the last pass, written by the Next.js grade and
+# student routes (app/lib/changeLog.ts)
+CHANGED_STUDENTS_QUERY = """
+    SELECT student_id, MAX(id) AS last_change
+    FROM student_changes
+    WHERE id > %s
+    GROUP BY student_id
+"""
+
+# One row per student per run; rerunning within the same second overwrites
+# via the (student_id, created_at) unique key.
+UPSERT_PREDICTION = """
+    INSERT INTO predictions (student_id, predicted_grade, risk_level, confidence, model_version, created_at)
+    VALUES (%s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        predicted_grade = VALUES(predicted_grade),
+        risk_level = VALUES(risk_level),
+        confidence = VALUES(confidence),
+        model_version = VALUES(model_version)
+"""
+
+
+def model_version(model_name, metrics_path='model_metrics.json'):
+    """Version recorded by retrain_from_db.py, v1.0 for the original models"""
+    if not os.path.exists(metrics_path):
+        return 'v1.0'
+    with open(metrics_path, 'r') as f:
+        return json.load(f).get(model_name, {}).get('version', 'v1.0')
+
+
+def fetch_feature_rows(cursor, student_ids=None):
+    """Derive (student_ids, features DataFrame) from the grade history of the requested students"""
+    if student_ids is None:
+        cursor.execute(ROSTER_QUERY.format(where=''))
+    else:
+        placeholders = ', '.join(['%s'] * len(student_ids))
+        cursor.execute(ROSTER_QUERY.format(where=f'WHERE s.id IN ({placeholders})'),
+                       tuple(student_ids))
+
+    ids, rows = [], []
+    for student_id, student_rows in groupby(cursor.fetchall(), key=lambda r: r['id']):
+        student_rows = list(student_rows)
+        grades = [r for r in student_rows if r['score'] is not None]
+        ids.append(student_id)
+        rows.append(build_feature_row(student_rows[0], grades))
+    return ids, pd.DataFrame(rows, columns=FEATURE_NAMES).astype(float)
+
+
+def load_feature_rows(cursor, student_ids=None):
+    """
+    Return (student_ids, features DataFrame) from the materialized table
+
+    Students without a stored row yet (e.g. added before the table was
+    backfilled) are derived from their grades instead.
+    """
+    ids, features, missing = fetch_materialized(cursor, student_ids)
+    if missing:
+        derived_ids, derived = fetch_feature_rows(cursor, missing)
+        ids = ids + derived_ids
+        features = pd.concat([features, derived], ignore_index=True)
+    return ids, features
+
+
+def score_students(model, grade_scaler, features, max_marks=100):
+    """Vectorized (final_grades, predicted_grades, risk_levels) for every row of features"""
+    final_grades, predicted_grades = scale_predictions(model.predict(features), grade_scaler, max_marks)
+    return final_grades, predicted_grades, risk_levels(final_grades)
+
+
+def upsert_predictions(conn, records, batch_size=1000):
+    """Write (student_id, grade, risk, confidence, version, created_at) tuples with executemany()"""
+    cursor = conn.cursor()
+    try:
+        for i in range(0, len(records), batch_size):
+            cursor.executemany(UPSERT_PREDICTION, records[i:i + batch_size])
+        conn.commit()
+    finally:
+        cursor.close()
+
+
+def score_roster(model_name='linear_regression', student_ids=None, batch_size=1000, explain=None,
+                 on_scored=None):
+    """
+    Score the roster (or only student_ids) and store the results
+
+    explain, if given, is called as explain(features, final_grades, levels)
+    and must return one explanation per row; they are returned under
+    'explanations' keyed by student id. on_scored, if given, is called as
+    on_scored(ids, predicted_grades) once the results are stored.
+
+    Returns a summary dict with counts per risk level and timings.
+    """
+    start = time.perf_counter()
+    model = joblib.load(f'{model_name}_model.pkl')
+    grade_scaler = joblib.load('grade_scaler.pkl')
+    version = model_version(model_name)
+    calibration = load_calibration().get(model_name)
+
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor(dictionary=True)
+        ids, features = load_feature_rows(cursor, student_ids)
+        cursor.close()
+
+        if not ids:
+            return {'scored': 0, 'risk_counts': {}, 'model_used': model_name}
+
+        final_grades, predicted_grades, levels = score_students(model, grade_scaler, features)
+        # Confidence stays NULL for models without calibration residuals
+        confidences = (risk_confidence(calibration, final_grades) if calibration
+                       else [None] * len(ids))
+        scored_at = datetime.now().replace(microsecond=0)
+        records = [
+            (student_id, round(float(grade), 2), str(level),
+             None if conf is None else round(float(conf), 2), version, scored_at)
+            for student_id, grade, level, conf in zip(ids, predicted_grades, levels, confidences)
+        ]
+        upsert_predictions(conn, records, batch_size)
+    finally:
+        conn.close()
+
+    if on_scored is not None:
+        on_scored(ids, predicted_grades)
+
+    risk_counts = pd.Series(levels).value_counts().to_dict()
+    summary = {
+        'scored': len(ids),
+        'risk_counts': {k: int(v) for k, v in risk_counts.items()},
+        'model_used': model_name,
+        'model_version': version,
+        'scored_at': scored_at.isoformat(),
+        'seconds': round(time.perf_counter() - start, 3)
+    }
+    if explain is not None:
+        summary['explanations'] = {
+            student_id: (tuple(features.iloc[i]), explanation)
+            for i, (student_id, explanation) in enumerate(
+                zip(ids, explain(features, final_grades, levels)))
+        }
+    return summary
+
+
+def load_state():
+    """Return {model_name: id of the last change log entry scored with it}"""
+    if not os.path.exists(STATE_FILE):
+        return {}
+    with open(STATE_FILE, 'r') as f:
+        state = json.load(f)
+    # Older files hold one shared watermark, which may belong to any model:
+    # start every model over rather than skip changes it never scored
+    if 'last_change_id' in state:
+        return {}
+    return state
+
+
+def save_state(state):
+    with open(STATE_FILE, 'w') as f:
+        json.dump(state, f, indent=2)
+
+
+def changed_students(since_change_id):
+    """
+    Return ({student_id: last_change_id}) for changes after since_change_id
+
+    The feature rows of those students are refreshed first, so scoring
+    sees every logged change even if the write path's refresh failed.
+    """
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(CHANGED_STUDENTS_QUERY, (since_change_id,))
+        changes = {row['student_id']: row['last_change'] for row in cursor.fetchall()}
+        cursor.close()
+        refresh_features(conn, sorted(changes))
+    finally:
+        conn.close()
+    return changes
+
+
+def score_changed(model_name='linear_regression', batch_size=1000, explain=None, on_scored=None):
+    """
+    Re-score only students changed since the last pass
+
+    The model's watermark advances only after the upsert succeeds, so a
+    failed pass is retried in full next time.
+    """
+    changes = changed_students(load_state().get(model_name, 0))
+    if not changes:
+        return {'scored': 0, 'risk_counts': {}, 'model_used': model_name, 'students': []}
+
+    student_ids = sorted(changes)
+    summary = score_roster(model_name, student_ids, batch_size, explain, on_scored)
+    summary['students'] = student_ids
+
+    # Re-read, so a pass with another model that finished meanwhile keeps its watermark
+    state = load_state()
+    state[model_name] = max(changes.values())
+    save_state(state)
+    return summary
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Score every student and store predictions')
+    parser.add_argument('--model', default='linear_regression',
+                        choices=['linear_regression', 'random_forest', 'xgboost'])
+    parser.add_argument('--batch-size', type=int, default=1000, help='rows per executemany() call')
+    parser.add_argument('--changed-only', action='store_true',
+                        help='only re-score students changed since the last pass')
+    args = parser.parse_args()
+
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    if args.changed_only:
+        summary = score_changed(args.model, batch_size=args.batch_size)
+    else:
+        summary = score_roster(args.model, batch_size=args.batch_size)
+    print(json.dumps(summary, indent=2))
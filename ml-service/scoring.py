@@ -0,0 +1,77 @@
+"""
+Feature and scoring helpers shared by the Flask service and offline jobs
+"""
+
+import numpy as np
+
+FEATURE_NAMES = ['age', 'failures', 'absences', 'studytime', 'G1', 'G2']
+
+# Defaults used when a student row or grade history is incomplete. Also
+# hand-copied into app/lib/studentFeatures.ts; tests/test_feature_store.py
+# fails if the two drift apart.
+FEATURE_DEFAULTS = {
+    'age': 16,
+    'failures': 0,
+    'absences': 0,
+    'studytime': 2,
+    'G1': 10,
+    'G2': 10
+}
+
+
+def grade_on_20_scale(grade):
+    """Convert a grades-table row to the 0-20 scale the models were trained on"""
+    max_marks = float(grade.get('max_marks') or 20)
+    return float(grade['score']) / max_marks * 20
+
+
+def build_feature_row(student, grades):
+    """
+    Build the six-feature row for a student
+
+    Args:
+        student: dict with age, failures, absences, studytime (may be NULL)
+        grades: list of grade records ordered by date DESC
+
+    Returns:
+        dict keyed by FEATURE_NAMES. G1/G2 are the two most recent grades.
+    """
+    return {
+        'age': student.get('age') or FEATURE_DEFAULTS['age'],
+        'failures': student.get('failures') or FEATURE_DEFAULTS['failures'],
+        'absences': student.get('absences') or FEATURE_DEFAULTS['absences'],
+        'studytime': student.get('studytime') or FEATURE_DEFAULTS['studytime'],
+        'G1': grade_on_20_scale(grades[0]) if len(grades) > 0 else FEATURE_DEFAULTS['G1'],
+        'G2': grade_on_20_scale(grades[1]) if len(grades) > 1 else FEATURE_DEFAULTS['G2']
+    }
+
+
+def risk_level_for(final_grade):
+    """Risk bucket for a grade on the 0-20 scale"""
+    if final_grade < 10:
+        return "High"
+    elif final_grade < 14:
+        return "Medium"
+    return "Low"
+
+
+def scale_predictions(scaled_prediction, grade_scaler, max_marks=100):
+    """
+    Vectorized version of the scaling rules in predict()
+
+    Returns (final_grades, predicted_grades): grades clamped to the 0-20
+    scale and the same grades rescaled to max_marks.
+    """
+    original = grade_scaler.inverse_transform(np.asarray(scaled_prediction).reshape(-1, 1)).ravel()
+    final_grades = np.clip(original, 0, 20)
+    predicted_grades = np.minimum((final_grades / 20) * max_marks, max_marks)
+    return final_grades, predicted_grades
+
+
+def risk_levels(final_grades):
+    """Vectorized risk_level_for() over an array of 0-20 grades"""
+    return np.select(
+        [final_grades < 10, final_grades < 14],
+        ["High", "Medium"],
+        default="Low"
+    )
@@ -0,0 +1,224 @@
+"""
+Shadow evaluation of candidate models on live traffic
+A retrained model staged in candidates/ (retrain_from_db.py --shadow) is
+loaded next to the serving model. A sample of served predictions is copied
+onto a bounded queue. A background worker scores each sample with the
+candidate and aggregates agreement, grade deltas, risk-bucket flips and
+candidate latency in memory. Serving only does a non-blocking put: when
+the queue is full the sample is dropped and counted, so a slow candidate
+never adds request latency.
+"""
+
+import json
+import os
+import queue
+import random
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from scoring import FEATURE_NAMES, risk_levels
+
+CANDIDATE_DIR = 'candidates'
+CANDIDATE_INFO = 'candidates.json'
+
+# Grade deltas (0-20 scale) and latencies kept for percentiles, per model
+RECENT_SAMPLES = 5000
+
+
+def stage_candidate(model_id, candidate, holdout_scores, candidate_dir=CANDIDATE_DIR):
+    """Write a candidate model for shadow evaluation (the serving file is untouched)"""
+    os.makedirs(candidate_dir, exist_ok=True)
+    model_filename = os.path.join(candidate_dir, f'{model_id}_model.pkl')
+    tmp_filename = f'{model_filename}.tmp'
+    joblib.dump(candidate, tmp_filename)
+    os.replace(tmp_filename, model_filename)
+
+    info = load_candidate_info(candidate_dir)
+    info[model_id] = {
+        'holdout_mae': round(float(holdout_scores['mae']), 4),
+        'holdout_r2': round(float(holdout_scores['r2']), 4),
+        'serving_holdout_mae': round(float(holdout_scores['serving_mae']), 4),
+        'staged_at': datetime.now().isoformat(timespec='seconds')
+    }
+    with open(os.path.join(candidate_dir, CANDIDATE_INFO), 'w') as f:
+        json.dump(info, f, indent=2)
+
+
+def load_candidate_info(candidate_dir=CANDIDATE_DIR):
+    path = os.path.join(candidate_dir, CANDIDATE_INFO)
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+class ModelShadowStats:
+    """Running comparison of one candidate against the served predictions"""
+
+    def __init__(self):
+        self.compared = 0
+        self.agreements = 0
+        self.flips = Counter()
+        self.delta_sum = 0.0
+        self.abs_delta_sum = 0.0
+        self.max_abs_delta = 0.0
+        self.recent_abs_deltas = deque(maxlen=RECENT_SAMPLES)
+        self.recent_latency_ms = deque(maxlen=RECENT_SAMPLES)
+
+    def add(self, served, candidate, latency_ms):
+        deltas = candidate - served
+        served_levels = risk_levels(served)
+        candidate_levels = risk_levels(candidate)
+        same = served_levels == candidate_levels
+        self.compared += len(deltas)
+        self.agreements += int(same.sum())
+        self.flips.update(f'{a}->{b}' for a, b in zip(served_levels[~same], candidate_levels[~same]))
+        self.delta_sum += float(deltas.sum())
+        self.abs_delta_sum += float(np.abs(deltas).sum())
+        self.max_abs_delta = max(self.max_abs_delta, float(np.abs(deltas).max()))
+        self.recent_abs_deltas.extend(np.abs(deltas).tolist())
+        self.recent_latency_ms.extend([latency_ms] * len(deltas))
+
+    def summary(self):
+        if not self.compared:
+            return {'compared': 0}
+        abs_deltas = np.asarray(self.recent_abs_deltas)
+        latency = np.asarray(self.recent_latency_ms)
+        return {
+            'compared': self.compared,
+            'agreement_rate': round(self.agreements / self.compared, 4),
+            'risk_flips': dict(self.flips),
+            'mean_delta': round(self.delta_sum / self.compared, 4),
+            'mean_abs_delta': round(self.abs_delta_sum / self.compared, 4),
+            'p95_abs_delta': round(float(np.percentile(abs_deltas, 95)), 4),
+            'max_abs_delta': round(self.max_abs_delta, 4),
+            'candidate_latency_ms': {
+                'mean': round(float(latency.mean()), 3),
+                'p95': round(float(np.percentile(latency, 95)), 3)
+            }
+        }
+
+
+class ShadowEvaluator:
+    """Samples served predictions onto a bounded queue scored by a background worker"""
+
+    def __init__(self, grade_scaler, candidate_dir=CANDIDATE_DIR, sample_rate=0.1,
+                 capacity=1000, batch_size=64):
+        self.grade_scaler = grade_scaler
+        self.candidate_dir = candidate_dir
+        self.sample_rate = sample_rate
+        self.batch_size = batch_size
+        self._queue = queue.Queue(maxsize=capacity)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._candidates = {}  # model_name -> (mtime, model)
+        self.models = {}
+        self.sampled = 0
+        self.dropped = 0
+        self.errors = 0
+        self.last_error = None
+
+    def candidate_path(self, model_name):
+        return os.path.join(self.candidate_dir, f'{model_name}_model.pkl')
+
+    def submit(self, model_name, input_df, served_grades):
+        """
+        Maybe queue a served prediction for shadow scoring
+
+        input_df holds the scored feature rows and served_grades their
+        served grades on the 0-20 scale. Never blocks.
+        """
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return False
+        if not os.path.exists(self.candidate_path(model_name)):
+            return False
+        item = (model_name, input_df[FEATURE_NAMES].to_numpy(dtype=float),
+                np.asarray(served_grades, dtype=float))
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+        with self._lock:
+            self.sampled += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='shadow-eval', daemon=True)
+                self._thread.start()
+        return True
+
+    def _candidate(self, model_name):
+        """Candidate model, reloaded when a new one is staged"""
+        path = self.candidate_path(model_name)
+        mtime = os.path.getmtime(path)
+        cached = self._candidates.get(model_name)
+        if cached is None or cached[0] != mtime:
+            cached = (mtime, joblib.load(path))
+            self._candidates[model_name] = cached
+            # A new candidate starts a new comparison
+            with self._lock:
+                self.models[model_name] = ModelShadowStats()
+        return cached[1]
+
+    def _run(self):
+        while True:
+            self.drain(block=True)
+
+    def drain(self, block=False):
+        """Score up to batch_size queued samples, one predict() per model; returns samples scored"""
+        items = []
+        try:
+            items.append(self._queue.get(block=block))
+            while len(items) < self.batch_size:
+                items.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        if not items:
+            return 0
+
+        by_model = {}
+        for model_name, rows, served in items:
+            by_model.setdefault(model_name, []).append((rows, served))
+        for model_name, samples in by_model.items():
+            try:
+                self._score(model_name, samples)
+            except Exception as e:
+                with self._lock:
+                    self.errors += 1
+                    self.last_error = str(e)
+        return len(items)
+
+    def _score(self, model_name, samples):
+        candidate = self._candidate(model_name)
+        X = pd.DataFrame(np.vstack([rows for rows, _ in samples]), columns=FEATURE_NAMES)
+        served = np.concatenate([s for _, s in samples])
+        start = time.perf_counter()
+        scaled = candidate.predict(X)
+        latency_ms = (time.perf_counter() - start) * 1000 / len(X)
+        grades = np.clip(self.grade_scaler.inverse_transform(np.asarray(scaled).reshape(-1, 1)).ravel(), 0, 20)
+        with self._lock:
+            self.models.setdefault(model_name, ModelShadowStats()).add(served, grades, latency_ms)
+
+    def stats(self):
+        info = load_candidate_info(self.candidate_dir)
+        with self._lock:
+            models = {name: stats.summary() for name, stats in self.models.items()}
+            return {
+                'sample_rate': self.sample_rate,
+                'queue_depth': self._queue.qsize(),
+                'capacity': self._queue.maxsize,
+                'sampled': self.sampled,
+                'dropped': self.dropped,
+                'errors': self.errors,
+                'last_error': self.last_error,
+                'candidates': {
+                    name: dict(info.get(name, {}), **models.get(name, {'compared': 0}))
+                    for name in sorted(set(info) | set(models))
+                }
+            }
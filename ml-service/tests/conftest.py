@@ -0,0 +1,9 @@
+"""
+Shared pytest setup for the ML service tests
+"""
+
+import os
+
+# predict_script builds its audit log at import time; keep served
+# predictions out of MySQL and out of ml-service/audit_fallback.db
+os.environ.setdefault('AUDIT_SINK', 'none')
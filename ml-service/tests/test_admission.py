@@ -0,0 +1,110 @@
+"""
+Unit tests for admission control and load shedding
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Change working directory to ml-service so .pkl files are found
+os.chdir(os.path.dirname(os.path.abspath(os.path.join(__file__, '..'))))
+
+import json
+import re
+import threading
+import time
+
+from flask import Flask
+
+import predict_script
+from admission import AdmissionControl, Lane, default_lanes
+
+
+class TestLane:
+
+    def test_sheds_when_queue_is_full(self):
+        lane = Lane('test', max_concurrent=1, max_queue=0, max_wait=1.0)
+        assert lane.acquire()
+        assert not lane.acquire()
+        lane.release()
+        assert lane.acquire()
+        assert lane.stats()['rejected'] == 1
+
+    def test_queued_request_gives_up_after_max_wait(self):
+        lane = Lane('test', max_concurrent=1, max_queue=1, max_wait=0.05)
+        assert lane.acquire()
+        start = time.perf_counter()
+        assert not lane.acquire()
+        assert time.perf_counter() - start < 1
+        assert lane.stats()['queue_depth'] == 0
+
+    def test_queued_request_gets_released_slot(self):
+        lane = Lane('test', max_concurrent=1, max_queue=1, max_wait=5)
+        assert lane.acquire()
+        threading.Timer(0.05, lane.release).start()
+        assert lane.acquire()
+        assert lane.stats()['max_wait_ms'] > 0
+
+
+class TestAdmissionHooks:
+
+    def make_app(self):
+        app = Flask(__name__)
+        release = threading.Event()
+        entered = threading.Event()
+
+        @app.route('/slow')
+        def slow():
+            entered.set()
+            release.wait(5)
+            return 'done'
+
+        @app.route('/fast')
+        def fast():
+            return 'ok'
+
+        control = AdmissionControl(app, lanes={'heavy': Lane('heavy', 1, 0, 0.1)},
+                                   endpoint_lanes={'slow': 'heavy'})
+        return app, control, release, entered
+
+    def test_excess_load_gets_503_and_other_lanes_unaffected(self):
+        app, control, release, entered = self.make_app()
+        worker = threading.Thread(target=lambda: app.test_client().get('/slow'))
+        worker.start()
+        entered.wait(5)
+
+        client = app.test_client()
+        shed = client.get('/slow')
+        assert shed.status_code == 503
+        assert shed.headers['Retry-After'] == '1'
+        assert client.get('/fast').status_code == 200
+
+        release.set()
+        worker.join(5)
+        stats = control.stats()['heavy']
+        assert stats['in_flight'] == 0
+        assert (stats['admitted'], stats['rejected']) == (1, 1)
+
+    def test_service_exposes_counters(self):
+        client = predict_script.app.test_client()
+        data = client.get('/admission-stats').get_json()
+        assert set(data['lanes']) == {'predict', 'explain', 'heavy'}
+        assert 'queued' in data['report_jobs']
+
+
+class TestDeployment:
+    """gunicorn must run enough threads per worker for the lanes to fill"""
+
+    def start_commands(self):
+        with open('Procfile', 'r') as f:
+            procfile = f.read().split('web:', 1)[1].strip()
+        with open('railway.json', 'r') as f:
+            railway = json.load(f)['deploy']['startCommand']
+        return [procfile, railway]
+
+    def test_threaded_workers_sized_to_lanes(self):
+        slots = sum(lane.max_concurrent for lane in default_lanes().values())
+        for command in self.start_commands():
+            assert '--worker-class gthread' in command
+            threads = int(re.search(r'--threads (\d+)', command).group(1))
+            assert threads > slots
@@ -0,0 +1,70 @@
+"""
+Tests for the ASGI serving mode (database replaced by an in-memory stand-in)
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Change working directory to ml-service so .pkl files are found
+os.chdir(os.path.dirname(os.path.abspath(os.path.join(__file__, '..'))))
+
+import datetime
+
+import pytest
+from starlette.testclient import TestClient
+
+import predict_script
+from asgi_app import LocalDatabase, create_app
+
+STUDENT = {'id': 'st1', 'name': 'Test Student', 'email': 'st1@example.com',
+           'age': 16, 'studytime': 2, 'failures': 0, 'absences': 3}
+GRADES = [{'subject': 'Math', 'score': 72, 'max_marks': 100, 'grade': 'B',
+           'date': datetime.date(2025, 1, 6)}]
+
+
+@pytest.fixture(scope='module')
+def client():
+    app = create_app(LocalDatabase({'st1': STUDENT}, {'st1': GRADES}), process_workers=1)
+    with TestClient(app) as client:
+        yield client
+
+
+class TestAsgiApp:
+
+    @pytest.mark.parametrize('body,query,headers', [
+        ({'max_marks': 100}, '', {}),
+        ({'max_marks': 100, 'explain': False}, '?fields=predicted_grade,risk_level&format=compact', {}),
+        ({'max_marks': 100}, '', {'X-Tenant-ID': 'no_such_school'}),
+        ({'max_marks': 100, 'format': 'xml'}, '', {}),
+        ({}, '', {}),
+    ])
+    def test_predict_same_in_both_modes(self, client, monkeypatch, body, query, headers):
+        audited = []
+        monkeypatch.setattr(predict_script.audit_log, 'record', audited.append)
+        body = dict(body, student_data={'age': 16, 'failures': 0, 'absences': 2, 'studytime': 2,
+                                        'G1': 12, 'G2': 13})
+
+        asgi = client.post(f'/predict{query}', json=body, headers=headers)
+        wsgi = predict_script.app.test_client().post(f'/predict{query}', json=body, headers=headers)
+
+        assert asgi.status_code == wsgi.status_code
+        assert asgi.json() == wsgi.get_json()
+        # Both served predictions were audited
+        assert len(audited) == (2 if wsgi.status_code == 200 else 0)
+
+    def test_report_is_pdf(self, client):
+        response = client.get('/generate-report/st1')
+        assert response.status_code == 200
+        assert response.headers['content-type'] == 'application/pdf'
+        assert response.content.startswith(b'%PDF')
+
+    def test_unknown_student(self, client):
+        response = client.get('/generate-report/nope')
+        assert response.status_code == 404
+        assert 'not found' in response.json()['error']
+
+    def test_other_endpoints_served_by_flask(self, client):
+        response = client.get('/model-metrics')
+        assert response.status_code == 200
+        assert 'linear_regression' in response.json()
@@ -0,0 +1,165 @@
+"""
+Unit tests for the weekly attendance trend snapshots (database access is faked)
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.chdir(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from datetime import timedelta
+
+import joblib
+import pandas as pd
+
+import attendance_trends
+
+
+class FakeCursor:
+    """Serves one canned result per query string"""
+
+    def __init__(self, results):
+        self.results = results
+
+    def execute(self, sql, params=None):
+        self.current = self.results[sql]
+        self.params = params
+
+    def fetchone(self):
+        return self.current[0] if self.current else None
+
+    def fetchall(self):
+        return self.current
+
+
+def weeks_ago(n):
+    return attendance_trends.current_week() - timedelta(weeks=n)
+
+
+STUDENT = {'id': 1, 'age': 17, 'studytime': 2, 'failures': 1, 'absences': 6}
+
+BUCKETS = [
+    {'week_start': weeks_ago(3), 'absences': 1, 'grade_count': 1, 'last_grade': 12.0, 'prev_grade': None},
+    {'week_start': weeks_ago(1), 'absences': 2, 'grade_count': 2, 'last_grade': 15.0, 'prev_grade': 14.0},
+    {'week_start': weeks_ago(0), 'absences': 3, 'grade_count': 0, 'last_grade': None, 'prev_grade': None},
+]
+
+
+class TestStudentSnapshots:
+    """Test per-week feature reconstruction from the buckets"""
+
+    def test_quiet_weeks_are_filled(self):
+        frame = attendance_trends.weekly_frame(BUCKETS, ['last_grade', 'prev_grade'])
+        assert len(frame) == 4
+        assert frame['absences'].tolist() == [1, 0, 2, 3]
+
+    def test_cumulative_absences_end_at_current_total(self):
+        frame = attendance_trends.weekly_frame(BUCKETS, ['last_grade', 'prev_grade'])
+        snapshots = attendance_trends.student_snapshots(STUDENT, frame)
+        assert snapshots['absences'].tolist() == [1, 1, 3, 6]
+
+    def test_grades_carry_forward(self):
+        frame = attendance_trends.weekly_frame(BUCKETS, ['last_grade', 'prev_grade'])
+        snapshots = attendance_trends.student_snapshots(STUDENT, frame)
+        assert snapshots['G1'].tolist() == [12, 12, 15, 15]
+        # Same-week earlier grade wins over the previous week's grade
+        assert snapshots['G2'].tolist() == [10, 10, 14, 14]
+
+    def test_lookback_bucket_seeds_the_window(self):
+        # For a two-week window the query returns the current week plus the
+        # graded week-3 bucket from before the window
+        frame = attendance_trends.weekly_frame([BUCKETS[0], BUCKETS[2]], ['last_grade', 'prev_grade'])
+        snapshots = attendance_trends.student_snapshots(STUDENT, frame).tail(2)
+        assert snapshots['G1'].tolist() == [12, 12]
+        assert snapshots['absences'].tolist() == [3, 6]
+
+
+class TestStudentTrend:
+    """Test the scored trend payload"""
+
+    def setup_method(self):
+        self.model = joblib.load('linear_regression_model.pkl')
+        self.grade_scaler = joblib.load('grade_scaler.pkl')
+
+    def test_trend_shape(self):
+        cursor = FakeCursor({
+            attendance_trends.STUDENT_QUERY: [STUDENT],
+            attendance_trends.STUDENT_BUCKETS_QUERY: BUCKETS,
+        })
+        trend = attendance_trends.student_trend(cursor, self.model, self.grade_scaler, 1, weeks=3)
+        assert trend['weeks'] == ['Week 1', 'Week 2', 'Week 3']
+        assert trend['attendance_rate'] == [100.0, 60.0, 40.0]
+        assert all(0 <= g <= 100 for g in trend['predicted_grades'])
+
+    def test_unknown_student(self):
+        cursor = FakeCursor({attendance_trends.STUDENT_QUERY: []})
+        assert attendance_trends.student_trend(cursor, self.model, self.grade_scaler, 99) is None
+
+    def test_no_buckets_gives_current_week(self):
+        cursor = FakeCursor({
+            attendance_trends.STUDENT_QUERY: [STUDENT],
+            attendance_trends.STUDENT_BUCKETS_QUERY: [],
+        })
+        trend = attendance_trends.student_trend(cursor, self.model, self.grade_scaler, 1)
+        assert trend['week_start'] == [pd.Timestamp(attendance_trends.current_week()).strftime('%Y-%m-%d')]
+
+    def test_class_trend(self):
+        cursor = FakeCursor({
+            attendance_trends.CLASS_PROFILE_QUERY: [
+                {'students': 2, 'age': 16.5, 'failures': 0.5, 'studytime': 2, 'absences': 10}
+            ],
+            attendance_trends.CLASS_BUCKETS_QUERY: [
+                {'week_start': weeks_ago(1), 'absences': 4, 'grade_count': 2, 'grade_sum': 26.0},
+                {'week_start': weeks_ago(0), 'absences': 2, 'grade_count': 0, 'grade_sum': 0.0},
+            ],
+        })
+        trend = attendance_trends.class_trend(cursor, self.model, self.grade_scaler)
+        assert trend['attendance_rate'] == [60.0, 80.0]
+        assert len(trend['predicted_grades']) == 2
+
+    def test_reads_only_the_window_and_grade_lookback(self):
+        cursor = FakeCursor({
+            attendance_trends.STUDENT_QUERY: [STUDENT],
+            attendance_trends.STUDENT_BUCKETS_QUERY: BUCKETS,
+        })
+        attendance_trends.student_trend(cursor, self.model, self.grade_scaler, 1, weeks=2)
+        assert cursor.params == (1, 2, 1, weeks_ago(1), attendance_trends.GRADE_LOOKBACK)
+        assert 'LIMIT' in attendance_trends.STUDENT_BUCKETS_QUERY
+
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def cursor(self, dictionary=False):
+        return self._cursor
+
+    def close(self):
+        pass
+
+
+class TestStudentTrendEndpoint:
+    """Test that /attendance-trend/student serves models from the registry"""
+
+    def test_models_are_not_reloaded_per_request(self, monkeypatch):
+        import predict_script
+
+        cursor = FakeCursor({
+            attendance_trends.STUDENT_QUERY: [STUDENT],
+            attendance_trends.STUDENT_BUCKETS_QUERY: BUCKETS,
+        })
+        cursor.close = lambda: None
+        monkeypatch.setattr(predict_script, 'get_db_connection', lambda: FakeConnection(cursor))
+        client = predict_script.app.test_client()
+
+        for name in ('linear_regression', 'random_forest'):
+            predict_script.get_model(name)
+
+        def no_load(path):
+            raise AssertionError(f'{path} loaded per request')
+
+        monkeypatch.setattr(predict_script.joblib, 'load', no_load)
+        for name in ('linear_regression', 'random_forest'):
+            response = client.get(f'/attendance-trend/student/1?weeks=3&model={name}')
+            assert response.status_code == 200
+            assert len(response.get_json()['predicted_grades']) == 3
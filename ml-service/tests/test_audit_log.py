@@ -0,0 +1,174 @@
+"""
+Unit tests for the write-behind prediction audit log (sinks are in-memory
+or a temporary SQLite file)
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Change working directory to ml-service so .pkl files are found
+os.chdir(os.path.dirname(os.path.abspath(os.path.join(__file__, '..'))))
+
+import shutil
+import sqlite3
+import time
+
+import pytest
+
+import predict_script
+from audit_log import AuditLog, MySQLSink, NullSink, SQLiteSink
+
+
+class ListSink:
+
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+
+    def write(self, rows):
+        if self.fail:
+            raise ConnectionError('MySQL unavailable')
+        self.batches.append(rows)
+
+
+def make_record(i=0):
+    return {
+        'endpoint': 'predict', 'student_id': f'st{i}', 'model_name': 'linear_regression',
+        'model_version': 'v1.0', 'inputs': {'absences': i}, 'predicted_grade': 70.0,
+        'risk_level': 'Low', 'latency_ms': 1.5, 'top_factors': []
+    }
+
+
+class TestAuditLog:
+
+    def test_flush_writes_in_batches(self):
+        sink = ListSink()
+        log = AuditLog(sink, batch_size=4, flush_interval=60)
+        for i in range(10):
+            log.record(make_record(i))
+        log.flush()
+        assert sum(len(b) for b in sink.batches) == 10
+        assert max(len(b) for b in sink.batches) == 4
+        assert log.stats()['flushed'] == 10
+
+    def test_full_batch_wakes_flusher(self):
+        sink = ListSink()
+        log = AuditLog(sink, batch_size=5, flush_interval=60)
+        for i in range(5):
+            log.record(make_record(i))
+        deadline = time.time() + 5
+        while log.stats()['flushed'] < 5:
+            assert time.time() < deadline, 'flusher never ran'
+            time.sleep(0.01)
+
+    def test_oldest_records_dropped_when_full(self):
+        sink = ListSink()
+        log = AuditLog(sink, capacity=3, batch_size=100, flush_interval=60)
+        for i in range(5):
+            log.record(make_record(i))
+        assert log.stats()['dropped'] == 2
+        log.flush()
+        assert [row[3] for row in sink.batches[0]] == ['st2', 'st3', 'st4']
+
+    def test_falls_back_to_sqlite(self, tmp_path):
+        path = str(tmp_path / 'audit.db')
+        log = AuditLog(ListSink(fail=True), fallback=SQLiteSink(path), flush_interval=60)
+        log.record(make_record(7))
+        log.flush()
+
+        stats = log.stats()
+        assert (stats['flushed'], stats['fallback_rows']) == (0, 1)
+        assert 'unavailable' in stats['last_error']
+        with sqlite3.connect(path) as conn:
+            assert conn.execute('SELECT student_id, inputs FROM prediction_audit').fetchall() == \
+                [('st7', '{"absences": 7}')]
+
+    def test_bad_record_does_not_stop_the_flusher(self):
+        sink = ListSink()
+        log = AuditLog(sink, batch_size=3, flush_interval=60)
+        bad = make_record(1)
+        bad['inputs'] = {'absences': object()}  # not JSON serialisable
+        for record in (make_record(0), bad, make_record(2)):
+            log.record(record)
+
+        deadline = time.time() + 5
+        while log.stats()['flushed'] < 2:
+            assert time.time() < deadline, 'flusher never ran'
+            time.sleep(0.01)
+        stats = log.stats()
+        assert stats['failed_rows'] == 1 and 'Bad audit record' in stats['last_error']
+
+        # The same flusher thread keeps draining later batches
+        for i in range(3, 6):
+            log.record(make_record(i))
+        while log.stats()['flushed'] < 5:
+            assert time.time() < deadline, 'flusher died'
+            time.sleep(0.01)
+        assert [row[3] for batch in sink.batches for row in batch] == ['st0', 'st2', 'st3', 'st4', 'st5']
+
+    def test_sink_from_env(self, monkeypatch, tmp_path):
+        path = str(tmp_path / 'fallback.db')
+        monkeypatch.setenv('AUDIT_SINK', 'mysql')
+        monkeypatch.setenv('AUDIT_FALLBACK_FILE', path)
+        log = AuditLog.from_env(lambda: None)
+        assert isinstance(log.sink, MySQLSink) and log.fallback.path == path
+
+        monkeypatch.setenv('AUDIT_SINK', 'none')
+        log = AuditLog.from_env(lambda: None)
+        assert isinstance(log.sink, NullSink) and log.fallback is None
+
+    def test_suite_writes_no_audit_rows(self):
+        assert isinstance(predict_script.audit_log.sink, NullSink)
+
+
+class TestPredictionAudit:
+
+    @pytest.fixture
+    def sink(self, monkeypatch):
+        sink = ListSink()
+        monkeypatch.setattr(predict_script, 'audit_log', AuditLog(sink, flush_interval=60))
+        return sink
+
+    def test_served_prediction_is_recorded(self, sink):
+        client = predict_script.app.test_client()
+        response = client.post('/predict', json={
+            'student_data': {'age': 16, 'failures': 0, 'absences': 2, 'studytime': 2, 'G1': 12, 'G2': 13},
+            'max_marks': 100, 'student_id': 'st1'
+        })
+        assert response.status_code == 200
+        assert sink.batches == []  # nothing written on the request path
+
+        predict_script.audit_log.flush()
+        (row,) = sink.batches[0]
+        assert row[1:5] == ('predict', 'default', 'st1', 'linear_regression')
+        assert row[7] == float(response.get_json()['predicted_grade'])
+
+    def test_response_and_audit_share_model_version(self, sink):
+        client = predict_script.app.test_client()
+        data = client.post('/predict-with-model', json={
+            'student_data': {'age': 16, 'failures': 0, 'absences': 2, 'studytime': 2, 'G1': 12, 'G2': 13},
+            'max_marks': 100, 'model': 'xgboost', 'explain': False
+        }).get_json()
+
+        predict_script.audit_log.flush()
+        (row,) = sink.batches[0]
+        assert data['model_version'] == predict_script.model_version_for('xgboost')
+        assert row[4:6] == ('xgboost', data['model_version'])
+
+    def test_tenant_is_recorded(self, sink, tmp_path, monkeypatch):
+        school = tmp_path / 'school_a'
+        school.mkdir()
+        shutil.copy('linear_regression_model.pkl', school / 'linear_regression_model.pkl')
+        monkeypatch.setattr(predict_script.registry, 'tenants_dir', str(tmp_path))
+
+        client = predict_script.app.test_client()
+        response = client.post('/predict', headers={'X-Tenant-ID': 'school_a'}, json={
+            'student_data': {'age': 16, 'failures': 0, 'absences': 2, 'studytime': 2, 'G1': 12, 'G2': 13},
+            'max_marks': 100, 'explain': False
+        })
+        assert response.status_code == 200
+
+        predict_script.audit_log.flush()
+        (row,) = sink.batches[0]
+        assert row[1:3] == ('predict', 'school_a')
@@ -0,0 +1,135 @@
+"""
+Unit tests for the offline backtest (CLI module and /backtest endpoint)
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Change working directory to ml-service so .pkl files are found
+os.chdir(os.path.dirname(os.path.abspath(os.path.join(__file__, '..'))))
+
+import io
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+
+import predict_script
+from backtest import backtest, read_chunks
+from scoring import FEATURE_NAMES, FEATURE_DEFAULTS, scale_predictions, risk_levels
+
+MODEL_NAMES = ['linear_regression', 'random_forest', 'xgboost']
+
+
+@pytest.fixture(scope='module')
+def models():
+    return {name: joblib.load(f'{name}_model.pkl') for name in MODEL_NAMES}
+
+
+@pytest.fixture(scope='module')
+def grade_scaler():
+    return joblib.load('grade_scaler.pkl')
+
+
+@pytest.fixture(scope='module')
+def dataset():
+    return pd.read_csv('student-mat.csv', sep=';')
+
+
+class TestBacktest:
+
+    def test_metrics_match_sklearn(self, models, grade_scaler, dataset):
+        report = backtest('student-mat.csv', models, grade_scaler, chunk_size=64)
+
+        X = dataset[FEATURE_NAMES].astype(float)
+        actual = dataset['G3'].to_numpy(dtype=float)
+        for name, model in models.items():
+            predicted, _ = scale_predictions(model.predict(X), grade_scaler)
+            summary = report['models'][name]
+            assert summary['rows'] == len(dataset)
+            assert summary['r2_score'] == pytest.approx(r2_score(actual, predicted), abs=1e-4)
+            assert summary['mae'] == pytest.approx(mean_absolute_error(actual, predicted), abs=1e-4)
+            assert summary['rmse'] == pytest.approx(np.sqrt(mean_squared_error(actual, predicted)), abs=1e-4)
+
+            confusion = pd.crosstab(risk_levels(actual), risk_levels(predicted))
+            for bucket, row in summary['risk_confusion'].items():
+                for predicted_bucket, count in row.items():
+                    assert count == confusion.get(predicted_bucket, {}).get(bucket, 0)
+            assert summary['latency_ms_per_row'] > 0
+        assert report['chunks'] == 7
+
+    def test_chunk_size_does_not_change_results(self, models, grade_scaler):
+        one = backtest('student-mat.csv', models, grade_scaler, chunk_size=10000)
+        many = backtest('student-mat.csv', models, grade_scaler, chunk_size=7)
+        for name in MODEL_NAMES:
+            for metric in ('r2_score', 'mae', 'rmse', 'risk_confusion'):
+                assert one['models'][name][metric] == many['models'][name][metric]
+
+    def test_comma_separated_export(self, models, grade_scaler, dataset, tmp_path):
+        path = tmp_path / 'export.csv'
+        dataset.to_csv(path, index=False)
+
+        from_export = backtest(str(path), models, grade_scaler)
+        from_uci = backtest('student-mat.csv', models, grade_scaler)
+        assert from_export['rows'] == from_uci['rows']
+        for name in MODEL_NAMES:
+            for metric in ('r2_score', 'mae', 'risk_confusion'):
+                assert from_export['models'][name][metric] == from_uci['models'][name][metric]
+
+    def test_unlabelled_rows_skipped_and_gaps_defaulted(self, tmp_path):
+        path = tmp_path / 'gaps.csv'
+        path.write_text('school;age;failures;absences;studytime;G1;G2;G3\n'
+                        '"GP";17;0;4;2;"12";"13";14\n'
+                        '"GP";;1;;3;8;9;\n'
+                        '"MS";16;;2;;10;"11";"10"\n')
+        chunks = list(read_chunks(str(path)))
+
+        features, labels, skipped = chunks[0]
+        assert skipped == 1
+        assert labels.tolist() == [14.0, 10.0]
+        assert features.iloc[1]['failures'] == FEATURE_DEFAULTS['failures']
+        assert features.iloc[1]['studytime'] == FEATURE_DEFAULTS['studytime']
+
+    def test_missing_columns(self, tmp_path):
+        path = tmp_path / 'no_label.csv'
+        path.write_text('age,failures,absences,studytime,G1,G2\n16,0,2,2,12,13\n')
+        with pytest.raises(ValueError, match='G3'):
+            list(read_chunks(str(path)))
+
+
+class TestBacktestEndpoint:
+
+    @pytest.fixture
+    def client(self):
+        return predict_script.app.test_client()
+
+    def test_csv_body(self, client):
+        with open('student-mat.csv', 'rb') as f:
+            response = client.post('/backtest?chunk_size=100', data=f.read(), content_type='text/csv')
+        data = response.get_json()
+
+        assert response.status_code == 200
+        assert data['rows'] == 395
+        assert data['chunks'] == 4
+        assert set(data['models']) == set(MODEL_NAMES)
+        assert 'trained_r2' in data['models']['xgboost']
+
+    def test_multipart_upload(self, client):
+        with open('student-mat.csv', 'rb') as f:
+            upload = io.BytesIO(f.read())
+        response = client.post('/backtest', data={'file': (upload, 'student-por.csv')},
+                               content_type='multipart/form-data')
+        assert response.status_code == 200
+        assert response.get_json()['rows'] == 395
+
+    @pytest.mark.parametrize('body,query', [
+        (b'', ''),
+        (b'age,failures\n16,0\n', ''),
+        (b'age;failures;absences;studytime;G1;G2;G3\n16;0;2;2;12;13;14\n', '?chunk_size=0'),
+    ])
+    def test_bad_input_is_400(self, client, body, query):
+        response = client.post(f'/backtest{query}', data=body, content_type='text/csv')
+        assert response.status_code == 400
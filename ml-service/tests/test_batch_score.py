@@ -0,0 +1,91 @@
+"""
+Unit tests for vectorized scoring and the offline batch scorer
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Change working directory to ml-service so .pkl files are found
+os.chdir(os.path.dirname(os.path.abspath(os.path.join(__file__, '..'))))
+
+import json
+import numpy as np
+import pandas as pd
+import joblib
+import pytest
+
+from scoring import scale_predictions, risk_levels, risk_level_for
+from batch_score import batch_score, new_progress, read_chunks, top_factors
+
+
+class TestVectorizedScoring:
+    """Vectorized helpers must follow the same rules as predict()"""
+
+    def test_risk_levels_match_scalar_rule(self):
+        grades = np.array([0, 9.99, 10, 13.99, 14, 20])
+        assert list(risk_levels(grades)) == [risk_level_for(g) for g in grades]
+
+    def test_scaled_grades_are_clamped(self):
+        grade_scaler = joblib.load('grade_scaler.pkl')
+        final_grades, predicted = scale_predictions(np.array([-1.0, 0.5, 5.0]), grade_scaler, 100)
+        assert final_grades.min() >= 0 and final_grades.max() <= 20
+        assert predicted.max() <= 100
+
+    def test_top_factors_ordered_by_magnitude(self):
+        shap_values = np.array([[0.1, -0.5, 0.0, 0.2, 0.0, 0.3]])
+        assert top_factors(shap_values, 2) == ['failures:-0.500;G2:+0.300']
+
+
+class TestBatchScore:
+    """End-to-end runs of the chunked scorer"""
+
+    def test_resume_matches_uninterrupted_run(self, tmp_path):
+        students = pd.read_csv('student-mat.csv', sep=';').head(50)
+        input_path = str(tmp_path / 'students.csv')
+        students.to_csv(input_path, index=False)
+
+        full_path = str(tmp_path / 'full.csv')
+        batch_score(input_path, full_path, chunk_size=20, workers=1)
+
+        # Simulate a crash after the first chunk plus a partially written second one
+        partial_path = str(tmp_path / 'partial.csv')
+        batch_score(input_path, partial_path, chunk_size=20, workers=1)
+        with open(full_path, 'rb') as f:
+            lines = f.readlines()
+        with open(partial_path, 'wb') as f:
+            f.writelines(lines[:21] + lines[21:25])
+        with open(f'{partial_path}.progress', 'w') as f:
+            json.dump({**new_progress(input_path, 'linear_regression', 100, False, 3),
+                       'rows_done': 20, 'bytes_written': sum(len(l) for l in lines[:21])}, f)
+
+        batch_score(input_path, partial_path, chunk_size=20, workers=1, resume=True)
+
+        full = pd.read_csv(full_path)
+        resumed = pd.read_csv(partial_path)
+        assert len(full) == 50
+        pd.testing.assert_frame_equal(full, resumed)
+
+    def test_resume_refuses_another_runs_progress(self, tmp_path):
+        input_path = str(tmp_path / 'students.csv')
+        pd.read_csv('student-mat.csv', sep=';').head(10).to_csv(input_path, index=False)
+        output_path = str(tmp_path / 'scored.csv')
+        with open(f'{output_path}.progress', 'w') as f:
+            json.dump({**new_progress(input_path, 'xgboost', 100, False, 3),
+                       'rows_done': 5, 'bytes_written': 0}, f)
+
+        with pytest.raises(SystemExit, match='model_name'):
+            batch_score(input_path, output_path, workers=1, resume=True)
+        with pytest.raises(SystemExit, match='input_path'):
+            batch_score(str(tmp_path / 'other.csv'), output_path, model_name='xgboost',
+                        workers=1, resume=True)
+
+    def test_csv_resume_skips_scored_rows(self, tmp_path):
+        input_path = str(tmp_path / 'students.csv')
+        students = pd.read_csv('student-mat.csv', sep=';').head(25)
+        students.to_csv(input_path, index=False)
+
+        chunks = list(read_chunks(input_path, chunk_size=10, skip_rows=12))
+        assert [len(c) for c in chunks] == [10, 3]
+        pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True),
+                                      students.iloc[12:].reset_index(drop=True))
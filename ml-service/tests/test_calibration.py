@@ -0,0 +1,77 @@
+"""
+Unit tests for conformal prediction intervals and risk probabilities
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Change working directory to ml-service so .pkl files are found
+os.chdir(os.path.dirname(os.path.abspath(os.path.join(__file__, '..'))))
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.model_selection import train_test_split
+
+import predict_script
+from calibration import (calibrate, conformal_quantile, load_calibration, prediction_intervals,
+                         risk_confidence, risk_probabilities)
+from scoring import FEATURE_NAMES
+
+STUDENT = {'age': 16, 'failures': 0, 'absences': 2, 'studytime': 2, 'G1': 12, 'G2': 13}
+
+
+@pytest.fixture(scope='module')
+def test_split():
+    df = pd.read_csv('student-mat.csv', sep=';')
+    grade_scaler = joblib.load('grade_scaler.pkl')
+    y_scaled = grade_scaler.transform(df[['G3']].values.reshape(-1, 1))
+    _, X_test, _, y_test = train_test_split(df[FEATURE_NAMES], y_scaled, test_size=0.2, random_state=42)
+    return X_test, y_test, grade_scaler
+
+
+class TestConformal:
+
+    def test_quantile_uses_finite_sample_rank(self):
+        # ceil(11 * 0.8) = 9th smallest of 1..10
+        assert conformal_quantile(np.arange(1, 11), 0.8) == 9
+        assert conformal_quantile(np.arange(1, 11), 0.95) == 10
+
+    def test_interval_covers_calibration_rows(self, test_split):
+        X_test, y_test, grade_scaler = test_split
+        model = joblib.load('random_forest_model.pkl')
+        entry = calibrate('random_forest', model, X_test, y_test, grade_scaler)
+        predicted = np.clip(grade_scaler.inverse_transform(model.predict(X_test).reshape(-1, 1)).ravel(), 0, 20)
+        actual = grade_scaler.inverse_transform(y_test).ravel()
+
+        lower, upper = prediction_intervals(entry, predicted)
+        assert np.mean((actual >= lower) & (actual <= upper)) >= 0.9
+        assert len(set(np.round(upper - lower, 4))) > 1  # width varies with tree spread
+
+    def test_risk_probabilities_sum_to_one(self):
+        entry = {'residuals': [-3.0, -1.0, 0.0, 1.0, 3.0]}
+        high, medium, low = risk_probabilities(entry, np.array([9.5, 12.0, 18.0]))
+        assert np.allclose(high + medium + low, 1)
+        assert high[0] > low[0] and low[2] == 1
+        # 12 + residual lands in Medium (10-14) for 3 of the 5 residuals
+        assert risk_confidence(entry, np.array([12.0]))[0] == pytest.approx(60)
+
+
+class TestServedUncertainty:
+
+    def test_predict_returns_interval_and_confidence(self):
+        result = predict_script.predict(STUDENT, 100)
+        interval = result['interval']
+        assert float(interval['lower']) <= float(result['predicted_grade']) <= float(interval['upper'])
+        assert sum(result['risk_probabilities'].values()) == pytest.approx(1, abs=0.01)
+        assert result['confidence'] == pytest.approx(result['risk_probabilities'][result['risk_level']] * 100,
+                                                     abs=0.1)
+
+    def test_every_model_is_calibrated(self):
+        client = predict_script.app.test_client()
+        for model in load_calibration():
+            data = client.post('/predict-with-model', json={'student_data': STUDENT, 'max_marks': 100,
+                                                           'model': model}).get_json()
+            assert 0 <= data['confidence'] <= 100
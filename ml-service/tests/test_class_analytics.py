@@ -0,0 +1,72 @@
+"""
+Unit tests for the cached class analytics (database access is faked)
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import class_analytics
+
+
+class FakeConnection:
+    """Serves one canned result per executed query, in order"""
+
+    def __init__(self, results):
+        self.results = results
+        self.queries = []
+
+    def cursor(self, dictionary=False):
+        return self
+
+    def execute(self, sql, params=None):
+        self.queries.append(sql)
+        self.current = self.results[sql]
+
+    def fetchone(self):
+        return self.current[0]
+
+    def fetchall(self):
+        return self.current
+
+    def close(self):
+        pass
+
+
+def make_connection(last_change=1):
+    return FakeConnection({
+        class_analytics.VERSION_QUERY: [{'last_change': last_change, 'last_prediction': 3, 'last_grade': 7}],
+        class_analytics.OVERALL_QUERY: [{'total_students': 3, 'class_average': 82.29, 'total_grades': 7}],
+        class_analytics.SUBJECT_QUERY: [{'subject': 'Math', 'average_score': 82.67, 'student_count': 3,
+                                         'highest_score': 95, 'lowest_score': 65}],
+        class_analytics.LATEST_PREDICTIONS_QUERY: [
+            {'risk_level': 'Low', 'grade_bin': 8, 'count': 1},
+            {'risk_level': 'Low', 'grade_bin': 9, 'count': 1},
+            {'risk_level': 'Medium', 'grade_bin': 6, 'count': 1}
+        ]
+    })
+
+
+class TestClassAnalytics:
+
+    def setup_method(self):
+        class_analytics.invalidate_class_analytics()
+
+    def test_payload_aggregates(self, monkeypatch):
+        monkeypatch.setattr(class_analytics, 'get_db_connection', make_connection)
+        payload, cached = class_analytics.get_class_analytics()
+
+        assert cached is False
+        assert payload['overall']['at_risk_count'] == 1
+        assert payload['overall']['class_average'] == 82.29
+        histogram = {b['bin']: b['count'] for b in payload['predicted_grade_histogram']}
+        assert histogram['60-70'] == 1 and histogram['90-100'] == 1
+        assert sum(histogram.values()) == 3
+
+    def test_cached_until_data_changes(self, monkeypatch):
+        monkeypatch.setattr(class_analytics, 'get_db_connection', make_connection)
+        class_analytics.get_class_analytics()
+        assert class_analytics.get_class_analytics()[1] is True
+
+        monkeypatch.setattr(class_analytics, 'get_db_connection', lambda: make_connection(last_change=2))
+        assert class_analytics.get_class_analytics()[1] is False
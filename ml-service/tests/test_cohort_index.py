@@ -0,0 +1,170 @@
+"""
+Unit tests for the sorted cohort percentile index
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Change working directory to ml-service so .pkl files are found
+os.chdir(os.path.dirname(os.path.abspath(os.path.join(__file__, '..'))))
+
+import threading
+import time
+
+import pytest
+
+import cohort_index
+from cohort_index import CohortIndex
+
+
+def make_index():
+    return CohortIndex(['a', 'b', 'c', 'd'], [70.0, 40.0, 85.0, 70.0])
+
+
+class TestCohortIndex:
+
+    def test_sorted_on_build(self):
+        index = make_index()
+        assert index.grades == [40.0, 70.0, 70.0, 85.0]
+        assert index.ids == ['b', 'a', 'd', 'c']
+
+    def test_percentile_counts_ties_as_half(self):
+        index = make_index()
+        assert index.percentile(70.0) == 50.0
+        assert index.percentile(10.0) == 0.0
+        assert index.percentile(99.0) == 100.0
+        assert CohortIndex().percentile(50.0) is None
+
+    def test_top_and_bottom(self):
+        index = make_index()
+        assert [e['student_id'] for e in index.bottom(2)] == ['b', 'a']
+        assert [e['student_id'] for e in index.top(2)] == ['c', 'd']
+        assert index.bottom(1)[0]['risk_level'] == 'High'
+        assert len(index.top(10)) == 4
+
+    def test_update_moves_and_removes(self):
+        index = make_index()
+        index.update({'d': 30.0, 'e': 90.0}, removed=['c'])
+        assert index.ids == ['d', 'b', 'a', 'e']
+        assert index.grades == [30.0, 40.0, 70.0, 90.0]
+        assert 'c' not in index.by_id
+
+
+class TestCohortRegistry:
+
+    def test_update_before_build_is_ignored(self, monkeypatch):
+        monkeypatch.setattr(cohort_index, '_indexes', {})
+        cohort_index.update_cohort('xgboost', {'a': 50.0})
+        assert 'xgboost' not in cohort_index._indexes
+
+    def test_update_replaces_snapshot(self, monkeypatch):
+        monkeypatch.setattr(cohort_index, '_indexes', {})
+        cohort_index.set_cohort('xgboost', ['a', 'b'], [60.0, 20.0])
+        before = cohort_index.get_cohort('xgboost')
+        cohort_index.update_cohort('xgboost', {'a': 10.0})
+
+        assert before.ids == ['b', 'a']
+        assert cohort_index.get_cohort('xgboost').ids == ['a', 'b']
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, 'cohort build did not finish'
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def empty_registry(monkeypatch):
+    monkeypatch.setattr(cohort_index, '_indexes', {})
+    monkeypatch.setattr(cohort_index, '_building', set())
+    monkeypatch.setattr(cohort_index, '_failures', {})
+
+
+class TestBackgroundBuild:
+
+    def test_lookup_never_builds_on_caller(self, empty_registry, monkeypatch):
+        release = threading.Event()
+        calls = []
+
+        def slow_build(model_name):
+            calls.append(model_name)
+            release.wait(5)
+            return CohortIndex(['a'], [50.0])
+        monkeypatch.setattr(cohort_index, 'build_cohort', slow_build)
+
+        # Concurrent first lookups return at once and start a single build
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cohort_index.get_cohort('xgboost')))
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(1)
+        assert results == [None] * 8
+        assert cohort_index.cohort_status('xgboost') == {'state': 'building'}
+
+        release.set()
+        wait_for(lambda: cohort_index.get_cohort('xgboost') is not None)
+        assert calls == ['xgboost']
+
+    def test_failed_build_backs_off(self, empty_registry, monkeypatch):
+        calls = []
+
+        def failing_build(model_name):
+            calls.append(model_name)
+            raise ConnectionError('MySQL down')
+        monkeypatch.setattr(cohort_index, 'build_cohort', failing_build)
+
+        cohort_index.get_cohort('xgboost')
+        wait_for(lambda: 'xgboost' in cohort_index._failures)
+        for _ in range(5):
+            assert cohort_index.get_cohort('xgboost') is None
+        assert calls == ['xgboost']
+
+        status = cohort_index.cohort_status('xgboost')
+        assert status['state'] == 'failed' and status['error'] == 'MySQL down'
+        assert 0 < status['retry_in'] <= cohort_index.WARM_RETRY_SECONDS
+
+        # Once the backoff has passed the build is retried
+        count, failed_at, error = cohort_index._failures['xgboost']
+        cohort_index._failures['xgboost'] = (count, failed_at - cohort_index.WARM_RETRY_SECONDS, error)
+        cohort_index.get_cohort('xgboost')
+        wait_for(lambda: len(calls) == 2)
+
+    def test_roster_pass_clears_failure(self, empty_registry):
+        cohort_index._failures['xgboost'] = (3, time.monotonic(), 'MySQL down')
+        cohort_index.set_cohort('xgboost', ['a'], [50.0])
+        assert cohort_index.cohort_status('xgboost') == {'state': 'ready'}
+
+    def test_predict_without_database_connects_once(self, empty_registry, monkeypatch):
+        import predict_script
+
+        calls = []
+
+        def failing_build(model_name):
+            calls.append(model_name)
+            raise ConnectionError('MySQL down')
+        monkeypatch.setattr(cohort_index, 'build_cohort', failing_build)
+
+        student = {'age': 16, 'failures': 0, 'absences': 2, 'studytime': 2, 'G1': 12, 'G2': 13}
+        client = predict_script.app.test_client()
+        for _ in range(3):
+            data = client.post('/predict', json={'student_data': student, 'max_marks': 100}).get_json()
+            assert data['success'] and 'cohort' not in data
+            wait_for(lambda: not cohort_index._building)
+        assert calls == ['linear_regression']
+
+        response = client.get('/cohort')
+        assert response.status_code == 503
+        assert response.headers['Retry-After']
+
+    def test_k_is_bounded(self):
+        import predict_script
+
+        client = predict_script.app.test_client()
+        for k in (0, predict_script.MAX_COHORT_K + 1, 10 ** 9):
+            response = client.get(f'/cohort?k={k}')
+            assert response.status_code == 400
+            assert 'between 1 and' in response.get_json()['error']
@@ -0,0 +1,104 @@
+"""
+Unit tests for the vectorized counterfactual search
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Change working directory to ml-service so .pkl files are found
+os.chdir(os.path.dirname(os.path.abspath(os.path.join(__file__, '..'))))
+
+import time
+
+import joblib
+import numpy as np
+import pytest
+
+import predict_script
+from counterfactual import MAX_ABSENCES, candidate_values, check_student, dominated, search_counterfactuals
+
+AT_RISK = {'age': 17, 'failures': 1, 'absences': 20, 'studytime': 1, 'G1': 7, 'G2': 6}
+
+
+class LinearGradeModel:
+    """Scaled grade = (G2 + 2 * studytime - absences / 5) / 20"""
+
+    def predict(self, X):
+        return ((X['G2'] + 2 * X['studytime'] - X['absences'] / 5) / 20).to_numpy()
+
+
+@pytest.fixture(scope='module')
+def grade_scaler():
+    return joblib.load('grade_scaler.pkl')
+
+
+class TestSearch:
+
+    def test_domains_only_move_in_improving_direction(self):
+        values = candidate_values({'studytime': 3, 'absences': 2, 'G2': 19})
+        assert sorted(set(values[:, 0])) == [3, 4]
+        assert sorted(set(values[:, 1])) == [0, 1, 2]
+        assert sorted(set(values[:, 2])) == [19, 20]
+
+    def test_dominated_rows(self):
+        found = [np.array([1, 0, 2])]
+        assert list(dominated(np.array([[1, 0, 2], [1, 1, 3], [0, 5, 5]]), found)) == [True, True, False]
+
+    def test_answers_reach_target_and_are_minimal(self, grade_scaler):
+        scales = {'studytime': 1.0, 'absences': 5.0, 'G2': 1.0}
+        result = search_counterfactuals(LinearGradeModel(), grade_scaler, AT_RISK, 'Medium', scales)
+        answers = result['counterfactuals']
+        assert answers and all(a['risk_level'] in ('Medium', 'Low') for a in answers)
+        assert [a['cost'] for a in answers] == sorted(a['cost'] for a in answers)
+
+        deltas = [np.array([abs(a['changes'].get(f, {'from': 0, 'to': 0})['to'] -
+                                a['changes'].get(f, {'from': 0, 'to': 0})['from'])
+                            for f in ('studytime', 'absences', 'G2')]) for a in answers]
+        for i, d in enumerate(deltas):
+            assert not dominated(d[None, :], deltas[:i] + deltas[i + 1:])[0]
+        assert result['evaluated'] < result['search_space']
+
+    def test_student_already_at_target(self, grade_scaler):
+        strong = dict(AT_RISK, G2=19, studytime=4, absences=0)
+        result = search_counterfactuals(LinearGradeModel(), grade_scaler, strong, 'Low')
+        assert result['already_at_target'] and result['counterfactuals'] == []
+
+
+class TestCounterfactualEndpoint:
+
+    @pytest.mark.parametrize('model', ['linear_regression', 'random_forest', 'xgboost'])
+    def test_every_model_answers_quickly(self, model):
+        client = predict_script.app.test_client()
+        start = time.perf_counter()
+        response = client.post('/counterfactual', json={'student_data': AT_RISK, 'target_risk': 'Medium',
+                                                        'model': model})
+        assert time.perf_counter() - start < 1
+        data = response.get_json()
+        assert response.status_code == 200
+        assert data['current']['risk_level'] == 'High'
+        assert data['counterfactuals'][0]['risk_level'] in ('Medium', 'Low')
+
+    def test_invalid_target(self):
+        client = predict_script.app.test_client()
+        response = client.post('/counterfactual', json={'student_data': AT_RISK, 'target_risk': 'High'})
+        assert response.status_code == 400
+
+    @pytest.mark.parametrize('change', [
+        {'absences': 10 ** 9}, {'absences': MAX_ABSENCES + 1}, {'absences': 'nan'},
+        {'G2': 'inf'}, {'studytime': -1}, {'age': float('nan')},
+    ])
+    def test_unsafe_inputs_are_400(self, change):
+        client = predict_script.app.test_client()
+        response = client.post('/counterfactual', json={'student_data': dict(AT_RISK, **change)})
+        assert response.status_code == 400
+
+    def test_non_positive_max_marks(self):
+        client = predict_script.app.test_client()
+        response = client.post('/counterfactual', json={'student_data': AT_RISK, 'max_marks': 0})
+        assert response.status_code == 400
+
+    def test_largest_absences_search_stays_bounded(self):
+        current = dict(AT_RISK, absences=MAX_ABSENCES)
+        check_student(current)
+        assert len(candidate_values(current)) == 4 * (MAX_ABSENCES + 1) * 15
@@ -0,0 +1,93 @@
+"""
+Unit tests for the streaming feature-drift monitor
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Change working directory to ml-service so .pkl files are found
+os.chdir(os.path.dirname(os.path.abspath(os.path.join(__file__, '..'))))
+
+import joblib
+import numpy as np
+import pytest
+
+import predict_script
+from drift_monitor import DriftMonitor, bin_edges, build_reference
+
+
+@pytest.fixture(scope='module')
+def X_train():
+    return joblib.load('x_train.pkl')
+
+
+@pytest.fixture
+def monitor(X_train):
+    return DriftMonitor(build_reference(X_train), min_samples=10)
+
+
+class TestReference:
+
+    def test_discrete_features_get_one_bin_per_value(self):
+        assert list(bin_edges(np.array([0, 0, 1, 3, 3]))) == [0.5, 2.0]
+
+    def test_proportions_sum_to_one(self, X_train):
+        reference = build_reference(X_train)
+        for feature in reference['features'].values():
+            assert len(feature['proportions']) == len(feature['edges']) + 1
+            assert sum(feature['proportions']) == pytest.approx(1, abs=1e-4)
+
+
+class TestDriftMonitor:
+
+    def test_training_data_is_stable(self, monitor, X_train):
+        monitor.observe(X_train)
+        report = monitor.report()
+        assert report['samples'] == len(X_train)
+        assert report['drifted_features'] == []
+        assert all(f['psi'] < 0.01 for f in report['features'].values())
+
+    def test_shifted_feature_is_flagged(self, monitor, X_train):
+        shifted = X_train.copy()
+        shifted['absences'] = shifted['absences'] + 20
+        monitor.observe(shifted)
+        report = monitor.report()
+        assert report['drifted_features'] == ['absences']
+        assert report['features']['absences']['ks'] > 0.5
+
+    def test_memory_does_not_grow_with_rows(self, monitor, X_train):
+        sizes = [c.size for c in monitor._current]
+        for _ in range(20):
+            monitor.observe(X_train)
+        assert [c.size for c in monitor._current] == sizes
+        assert monitor.observed == 20 * len(X_train)
+
+    def test_too_few_samples(self, monitor, X_train):
+        monitor.observe(X_train.head(3))
+        assert monitor.report()['features']['age']['status'] == 'insufficient_data'
+
+    def test_report_is_cached_within_interval(self, monitor, X_train):
+        first = monitor.report()
+        monitor.observe(X_train)
+        assert monitor.report() is first
+        assert monitor.report(force=True)['samples'] == len(X_train)
+
+    def test_old_windows_age_out(self, monitor, X_train):
+        monitor.observe(X_train)
+        monitor._window_start -= 3 * monitor.window
+        assert monitor.report(force=True)['samples'] == 0
+
+
+class TestDriftEndpoint:
+
+    def test_predictions_are_counted(self):
+        client = predict_script.app.test_client()
+        before = predict_script.drift_monitor.observed
+        client.post('/predict', json={'student_data': {'age': 16, 'failures': 0, 'absences': 2,
+                                                       'studytime': 2, 'G1': 12, 'G2': 13},
+                                      'max_marks': 100})
+        data = client.get('/drift?refresh=true').get_json()
+        assert data['success']
+        assert data['observed_total'] == before + 1
+        assert set(data['features']) == {'age', 'failures', 'absences', 'studytime', 'G1', 'G2'}
@@ -0,0 +1,282 @@
+"""
+Integration tests for the Flask endpoints (no database required)
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Change working directory to ml-service so .pkl files are found
+os.chdir(os.path.dirname(os.path.abspath(os.path.join(__file__, '..'))))
+
+import json
+import threading
+
+import numpy as np
+import pytest
+
+import predict_script
+
+
+STUDENT = {'age': 16, 'failures': 0, 'absences': 2, 'studytime': 2, 'G1': 12, 'G2': 13}
+
+
+@pytest.fixture
+def client():
+    return predict_script.app.test_client()
+
+
+class TestPredictStream:
+    """Test the NDJSON streaming endpoint"""
+
+    def test_results_match_single_predictions(self, client):
+        body = '\n'.join(json.dumps(dict(STUDENT, id=i, G2=10 + i)) for i in range(5))
+        response = client.post('/predict-stream?chunk_size=2', data=body,
+                               content_type='application/x-ndjson')
+
+        assert response.status_code == 200
+        lines = [json.loads(l) for l in response.data.decode().splitlines()]
+        assert [l['id'] for l in lines] == list(range(5))
+
+        single = predict_script.predict(dict(STUDENT, G2=12), 100)
+        assert lines[2]['predicted_grade'] == single['predicted_grade']
+        assert lines[2]['risk_level'] == single['risk_level']
+
+    def test_bad_rows_are_reported_in_order(self, client):
+        body = '\n'.join([json.dumps(STUDENT), '{not json', json.dumps({'age': 16})])
+        response = client.post('/predict-stream', data=body, content_type='application/x-ndjson')
+
+        lines = [json.loads(l) for l in response.data.decode().splitlines()]
+        assert [l['success'] for l in lines] == [True, False, False]
+        assert [l['line'] for l in lines] == [1, 2, 3]
+
+
+class TestFeatureImportance:
+    """Test the precomputed global importance endpoint"""
+
+    def test_serves_stored_importance(self, client):
+        response = client.get('/feature-importance?model=xgboost')
+
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['model'] == 'xgboost'
+        assert {f['feature_name'] for f in data['factors']} == set(predict_script.FEATURE_NAMES)
+        assert set(data['dependence']) == set(predict_script.FEATURE_NAMES)
+        assert response.cache_control.max_age == 3600
+
+    def test_etag_revalidation(self, client):
+        etag = client.get('/feature-importance').headers['ETag']
+        response = client.get('/feature-importance', headers={'If-None-Match': etag})
+        assert response.status_code == 304
+
+    def test_invalid_model(self, client):
+        assert client.get('/feature-importance?model=svm').status_code == 400
+
+
+class TestPredictConsensus:
+    """Test the all-models consensus endpoint"""
+
+    def test_scores_every_model(self, client):
+        response = client.post('/predict-consensus', json={'student_data': STUDENT, 'max_marks': 100})
+
+        assert response.status_code == 200
+        data = response.get_json()
+        assert set(data['predictions']) == {'linear_regression', 'random_forest', 'xgboost'}
+        assert sum(data['consensus']['risk_votes'].values()) == 3
+
+        grades = [float(p['predicted_grade']) for p in data['predictions'].values()]
+        assert float(data['consensus']['predicted_grade']) == pytest.approx(sum(grades) / 3, abs=0.01)
+        assert data['disagreement']['range'] == pytest.approx(max(grades) - min(grades), abs=0.01)
+
+    def test_matches_single_model_prediction(self, client):
+        response = client.post('/predict-consensus',
+                               json={'student_data': STUDENT, 'max_marks': 100, 'models': ['xgboost']})
+        single = client.post('/predict-with-model',
+                             json={'student_data': STUDENT, 'max_marks': 100, 'model': 'xgboost'})
+
+        consensus = response.get_json()
+        assert consensus['predictions']['xgboost']['predicted_grade'] == single.get_json()['predicted_grade']
+        assert consensus['consensus']['unanimous'] is True
+
+    def test_rejects_bad_input(self, client):
+        assert client.post('/predict-consensus', json={'models': ['svm']}).status_code == 400
+        bad = dict(STUDENT, G1='twelve')
+        assert client.post('/predict-consensus', json={'student_data': bad}).status_code == 400
+        for max_marks in ('abc', None, [100]):
+            response = client.post('/predict-consensus', json={'student_data': STUDENT, 'max_marks': max_marks})
+            assert response.status_code == 400
+
+
+class TestLatencyRouting:
+    """Test budget-based model selection on the prediction endpoints"""
+
+    def test_budget_reports_routed_model(self, client):
+        response = client.post('/simulate', json={'student_data': STUDENT, 'max_marks': 100,
+                                                  'latency_budget_ms': 1000})
+        data = response.get_json()
+        assert response.status_code == 200
+        assert data['model_used'] == 'random_forest'
+        assert data['routing']['reason'] == 'most_accurate_within_budget'
+
+    def test_explicit_model_is_not_routed(self, client):
+        response = client.post('/simulate', json={'student_data': STUDENT, 'model': 'xgboost'})
+        data = response.get_json()
+        assert data['model_used'] == 'xgboost'
+        assert 'routing' not in data
+
+    def test_invalid_tier(self, client):
+        response = client.post('/predict-with-model', json={'student_data': STUDENT, 'quality': 'ultra'})
+        assert response.status_code == 400
+
+
+class TestExplanationDeadline:
+    """Test prediction-first responses when SHAP misses its deadline"""
+
+    def test_late_explanation_is_fetched_by_token(self, client, monkeypatch):
+        # SHAP is held back until the response is in, so the deadline is always missed
+        release = threading.Event()
+        explain = predict_script.explain_with_model
+
+        def slow_explain(*args):
+            assert release.wait(timeout=60)
+            return explain(*args)
+        monkeypatch.setattr(predict_script, 'explain_with_model', slow_explain)
+
+        response = client.post('/predict-with-model', json={
+            'student_data': STUDENT, 'max_marks': 100, 'model': 'random_forest',
+            'explanation_deadline_ms': 10
+        })
+        data = response.get_json()
+        assert response.status_code == 200
+        assert data['predicted_grade']
+        assert 'explanation' not in data
+        assert data['explanation_status'] == 'pending'
+
+        token = data['explanation_token']
+        pending = client.get(f'/explanations/{token}')
+        assert pending.status_code == 202 and pending.get_json()['status'] == 'pending'
+
+        release.set()
+        predict_script.explanation_jobs.jobs[token].result(timeout=60)
+        result = client.get(f'/explanations/{token}')
+        assert result.status_code == 200
+        assert result.get_json()['explanation']['top_factors']
+
+    def test_default_deadline_returns_explanation_inline(self, client):
+        response = client.post('/predict-with-model', json={'student_data': STUDENT, 'max_marks': 100})
+        data = response.get_json()
+        assert data['explanation']['top_factors']
+        assert 'explanation_token' not in data
+
+    def test_unknown_token(self, client):
+        assert client.get('/explanations/nope').status_code == 404
+
+
+class TestScoreChangedRemovals:
+    """Students in the change log that no longer exist were deleted"""
+
+    def test_deleted_students_leave_cohort_and_caches(self, client, monkeypatch):
+        import cohort_index
+
+        monkeypatch.setattr(cohort_index, '_indexes', {})
+        cohort_index.set_cohort('linear_regression', ['st1', 'st2', 'st3'], [40.0, 60.0, 80.0])
+        monkeypatch.setitem(predict_script.explanation_cache, 'st2', ((), {'summary': 'stale'}))
+        monkeypatch.setattr(predict_script, 'invalidate_class_analytics', lambda: None)
+
+        def fake_score_changed(model_name, explain=None, on_scored=None):
+            # st2's delete was logged; only st1 still exists to be scored
+            on_scored(['st1'], np.array([90.0]))
+            return {'scored': 1, 'risk_counts': {}, 'model_used': model_name, 'students': ['st1', 'st2']}
+        monkeypatch.setattr(predict_script, 'score_changed', fake_score_changed)
+
+        response = client.post('/score-changed', json={})
+        assert response.status_code == 200
+
+        index = cohort_index.get_cohort('linear_regression')
+        assert index.ids == ['st3', 'st1']
+        assert 'st2' not in index.by_id
+        assert 'st2' not in predict_script.explanation_cache
+
+
+class TestOverloadRouting:
+    """Routed requests fall back to linear_regression while their lane has a queue"""
+
+    def test_queued_requests_route_to_fallback(self, client, monkeypatch):
+        import time
+        from admission import Lane
+
+        lane = Lane('explain', max_concurrent=1, max_queue=4, max_wait=10)
+        monkeypatch.setitem(predict_script.admission.lanes, 'explain', lane)
+        monkeypatch.setattr(predict_script.explanation_jobs, 'submit', lambda *args: None)
+
+        release = threading.Event()
+        get_model = predict_script.get_model
+
+        class BlockingModel:
+            def __init__(self, model):
+                self.model = model
+
+            def predict(self, X):
+                release.wait(10)
+                return self.model.predict(X)
+
+        def blocking_get_model(model_name, tenant=predict_script.DEFAULT_TENANT):
+            model = get_model(model_name, tenant)
+            return BlockingModel(model) if model_name == 'xgboost' else model
+        monkeypatch.setattr(predict_script, 'get_model', blocking_get_model)
+
+        def post(body, results):
+            with predict_script.app.test_client() as c:
+                results.append(c.post('/predict-with-model', json=dict(body, student_data=STUDENT)).get_json())
+
+        holder, routed = [], []
+        threads = [threading.Thread(target=post, args=({'model': 'xgboost'}, holder))]
+        threads += [threading.Thread(target=post, args=({'quality': 'best'}, routed)) for _ in range(2)]
+        threads[0].start()
+        deadline = time.time() + 5
+        while lane.in_flight < 1:
+            assert time.time() < deadline
+            time.sleep(0.01)
+        for thread in threads[1:]:
+            thread.start()
+        while lane.queued < 2:
+            assert time.time() < deadline
+            time.sleep(0.01)
+
+        release.set()
+        for thread in threads:
+            thread.join(10)
+
+        # The first routed request admitted still had the other one queued behind it
+        reasons = sorted(r['routing']['reason'] for r in routed)
+        assert reasons == ['most_accurate_within_budget', 'overloaded']
+        assert {r['model_used'] for r in routed if r['routing']['reason'] == 'overloaded'} == {'linear_regression'}
+        assert holder[0]['model_used'] == 'xgboost'
+
+
+class TestServingModelReload:
+    """A model published by retrain_from_db.py is served without a restart"""
+
+    def test_republished_model_and_explainer_are_used(self, client, tmp_path, monkeypatch):
+        import shutil
+        import joblib
+
+        for name in ('linear_regression_model.pkl', 'grade_scaler.pkl'):
+            shutil.copy(name, tmp_path / name)
+        monkeypatch.setattr(predict_script.registry, 'default_dir', str(tmp_path))
+        body = {'student_data': STUDENT, 'max_marks': 100}
+
+        before = client.post('/predict', json=body).get_json()
+        explainer = predict_script.serving_explainer()
+
+        # Publish a model that predicts one scaled unit lower, as publish() would
+        published = joblib.load('linear_regression_model.pkl')
+        published.intercept_ = published.intercept_ - 1
+        joblib.dump(published, tmp_path / 'linear_regression_model.pkl.tmp')
+        os.replace(tmp_path / 'linear_regression_model.pkl.tmp', tmp_path / 'linear_regression_model.pkl')
+        stat = os.stat(tmp_path / 'linear_regression_model.pkl')
+        os.utime(tmp_path / 'linear_regression_model.pkl', (stat.st_atime, stat.st_mtime + 10))
+
+        after = client.post('/predict', json=body).get_json()
+        assert float(after['predicted_grade']) < float(before['predicted_grade'])
+        assert predict_script.serving_explainer() is not explainer
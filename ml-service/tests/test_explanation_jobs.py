@@ -0,0 +1,73 @@
+"""
+Unit tests for the bounded background explanation pool
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import threading
+import time
+
+from explanation_jobs import ExplanationJobs
+
+
+class TestExplanationJobs:
+
+    def test_wait_returns_result_or_none(self, tmp_path):
+        jobs = ExplanationJobs(max_workers=1, result_dir=str(tmp_path))
+        release = threading.Event()
+
+        fast = jobs.submit(lambda: {'summary': 'done'})
+        slow = jobs.submit(release.wait)
+
+        assert jobs.wait(fast, timeout=5) == {'summary': 'done'}
+        assert jobs.wait(slow, timeout=0.01) is None
+        assert jobs.status(slow) == ('pending', None)
+
+        release.set()
+        jobs.jobs[slow].result(timeout=5)
+        assert jobs.status(slow) == ('done', True)
+
+    def test_full_queue_refuses_work(self, tmp_path):
+        jobs = ExplanationJobs(max_workers=1, max_pending=1, result_dir=str(tmp_path))
+        release = threading.Event()
+
+        assert jobs.submit(release.wait) is not None
+        assert jobs.submit(release.wait) is None
+        release.set()
+
+    def test_failures_and_unknown_tokens(self, tmp_path):
+        jobs = ExplanationJobs(max_workers=1, result_dir=str(tmp_path))
+        token = jobs.submit(lambda: 1 / 0)
+        jobs.jobs[token].exception(timeout=5)
+
+        assert jobs.status(token)[0] == 'failed'
+        assert jobs.status('missing') == ('unknown', None)
+
+    def test_results_are_shared_between_workers(self, tmp_path):
+        worker = ExplanationJobs(max_workers=1, result_dir=str(tmp_path))
+        other = ExplanationJobs(max_workers=1, result_dir=str(tmp_path))
+        release = threading.Event()
+
+        token = worker.submit(lambda: release.wait() and {'summary': 'done'})
+        assert other.status(token) == ('pending', None)
+
+        release.set()
+        worker.jobs[token].result(timeout=5)
+        assert other.status(token) == ('done', {'summary': 'done'})
+
+        failed = worker.submit(lambda: 1 / 0)
+        worker.jobs[failed].exception(timeout=5)
+        assert other.status(failed)[0] == 'failed'
+        assert other.status('../reports/x') == ('unknown', None)
+
+    def test_expired_records_are_swept(self, tmp_path):
+        jobs = ExplanationJobs(max_workers=1, ttl=0.5, result_dir=str(tmp_path))
+        token = jobs.submit(lambda: {'summary': 'done'})
+        jobs.jobs[token].result(timeout=5)
+
+        time.sleep(0.6)
+        jobs.sweep()
+        other = ExplanationJobs(max_workers=1, result_dir=str(tmp_path))
+        assert other.status(token) == ('unknown', None)
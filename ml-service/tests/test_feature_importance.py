@@ -0,0 +1,43 @@
+"""
+Unit tests for the training-time global feature importance
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Change working directory to ml-service so .pkl files are found
+os.chdir(os.path.dirname(os.path.abspath(os.path.join(__file__, '..'))))
+
+import joblib
+import numpy as np
+
+from feature_importance import global_importance, dependence_samples, shap_matrix
+
+
+class TestGlobalImportance:
+
+    def setup_method(self):
+        self.X_train = joblib.load('x_train.pkl')
+        self.model = joblib.load('linear_regression_model.pkl')
+
+    def test_mean_abs_shap_matches_per_row_values(self):
+        result = global_importance('linear_regression', self.model, self.X_train)
+        shap_values = shap_matrix('linear_regression', self.model, self.X_train)
+        expected = np.abs(shap_values).mean(axis=0)
+
+        by_feature = {f['feature_name']: f['value'] for f in result['factors']}
+        assert by_feature['G2'] == round(float(expected[5]), 5)
+        assert [f['value'] for f in result['factors']] == sorted(by_feature.values(), reverse=True)
+
+    def test_shares_sum_to_100(self):
+        result = global_importance('linear_regression', self.model, self.X_train)
+        total = sum(float(f['contribution_percentage'].rstrip('%')) for f in result['factors'])
+        assert abs(total - 100) < 0.5
+
+    def test_dependence_samples_sorted_and_capped(self):
+        values = np.array([5.0, 1.0, 3.0, 2.0, 4.0])
+        samples = dependence_samples(values, values * 2, points=3)
+        assert samples['values'] == sorted(samples['values'])
+        assert len(samples['values']) == 3
+        assert samples['shap_values'] == [v * 2 for v in samples['values']]
@@ -0,0 +1,156 @@
+"""
+Unit tests for the materialized feature table (database access is faked)
+"""
+
+import sys
+import os
+import re
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Change working directory to ml-service so .pkl files are found
+os.chdir(os.path.dirname(os.path.abspath(os.path.join(__file__, '..'))))
+
+from feature_store import REFRESH_FEATURES, fetch_materialized, refresh_features, report_features
+from score_roster import load_feature_rows
+from scoring import FEATURE_DEFAULTS, FEATURE_NAMES, build_feature_row
+
+WRITE_PATH_REFRESH = os.path.join('..', 'app', 'lib', 'studentFeatures.ts')
+
+
+class FakeCursor:
+    """Returns one canned result per execute() and records the executed SQL"""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.executed = []
+        self.rowcount = 0
+
+    def execute(self, sql, params=None):
+        self.executed.append((sql, params))
+        self.current = self.results.pop(0) if self.results else []
+        self.rowcount = len(self.current)
+
+    def fetchall(self):
+        return self.current
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.commits = 0
+
+    def cursor(self, dictionary=False):
+        return self._cursor
+
+    def commit(self):
+        self.commits += 1
+
+
+def stored_row(student_id, g1=16.0, g2=14.0):
+    return {'id': student_id, 'age': 16, 'failures': 0, 'absences': 3, 'studytime': 2,
+            'G1': g1, 'G2': g2}
+
+
+def missing_row(student_id):
+    return {'id': student_id, 'age': None, 'failures': None, 'absences': None, 'studytime': None,
+            'G1': None, 'G2': None}
+
+
+class TestMaterializedRows:
+
+    def test_stored_rows_read_in_one_query(self):
+        cursor = FakeCursor([stored_row('st1'), stored_row('st2', 10.0, 12.0)])
+        ids, features, missing = fetch_materialized(cursor, ['st1', 'st2'])
+
+        assert len(cursor.executed) == 1
+        sql, params = cursor.executed[0]
+        assert 'WHERE s.id IN (%s, %s)' in sql
+        assert params == ('st1', 'st2')
+        assert ids == ['st1', 'st2']
+        assert missing == []
+        assert list(features.loc[1, ['G1', 'G2']]) == [10.0, 12.0]
+
+    def test_students_without_a_row_are_derived_from_grades(self):
+        cursor = FakeCursor(
+            [stored_row('st1'), missing_row('st2')],
+            # ROSTER_QUERY rows for st2 only
+            [{'id': 'st2', 'age': 17, 'studytime': 3, 'failures': 1, 'absences': 0,
+              'score': 18, 'max_marks': 20}]
+        )
+        ids, features = load_feature_rows(cursor)
+
+        assert ids == ['st1', 'st2']
+        assert cursor.executed[1][1] == ('st2',)
+        assert list(features.loc[1]) == [17.0, 1.0, 0.0, 3.0, 18.0, FEATURE_DEFAULTS['G2']]
+
+    def test_no_derivation_when_every_row_is_stored(self):
+        cursor = FakeCursor([stored_row('st1')])
+        load_feature_rows(cursor)
+        assert len(cursor.executed) == 1
+
+
+class TestRefresh:
+
+    def test_refresh_sql_applies_scoring_defaults(self):
+        for feature in ('age', 'failures', 'absences', 'studytime'):
+            assert f"{FEATURE_DEFAULTS[feature]})" in REFRESH_FEATURES
+        assert 'ORDER BY g.date DESC, g.id DESC' in REFRESH_FEATURES
+        assert 'LIMIT 1 OFFSET 1' in REFRESH_FEATURES
+
+    def test_write_path_copy_uses_same_defaults(self):
+        with open(WRITE_PATH_REFRESH, 'r') as f:
+            source = f.read()
+        select = source[source.index('SELECT s.id'):source.index('FROM students s')]
+        # The fallback is the last argument of each COALESCE, in column order
+        defaults = re.findall(r',\s*(\d+(?:\.\d+)?)\),?\s*$', select, re.MULTILINE)
+        assert [float(d) for d in defaults] == [float(FEATURE_DEFAULTS[f]) for f in FEATURE_NAMES]
+
+    def test_refresh_selected_students_commits(self):
+        cursor = FakeCursor()
+        conn = FakeConnection(cursor)
+        refresh_features(conn, ['st1', 'st2'])
+
+        sql, params = cursor.executed[0]
+        assert 'WHERE s.id IN (%s, %s)' in sql
+        assert params == ('st1', 'st2')
+        assert conn.commits == 1
+
+    def test_refresh_nothing_is_a_no_op(self):
+        cursor = FakeCursor()
+        assert refresh_features(FakeConnection(cursor), []) == 0
+        assert cursor.executed == []
+
+    def test_changed_students_refreshed_before_scoring(self, monkeypatch):
+        import score_roster
+
+        cursor = FakeCursor([{'student_id': 'st2', 'last_change': 9},
+                             {'student_id': 'st1', 'last_change': 4}])
+        conn = FakeConnection(cursor)
+        conn.close = lambda: None
+        monkeypatch.setattr(score_roster, 'get_db_connection', lambda: conn)
+
+        assert score_roster.changed_students(0) == {'st2': 9, 'st1': 4}
+        sql, params = cursor.executed[1]
+        assert 'INSERT INTO student_features' in sql
+        assert params == ('st1', 'st2')
+
+
+class TestReportFeatures:
+
+    def test_stored_row_used_for_reports(self):
+        student = {'id': 'st1', 'age': 16, 'studytime': 15, 'failures': 0, 'absences': 1,
+                   'f_age': 16, 'f_failures': 0, 'f_absences': 1, 'f_studytime': 15,
+                   'f_G1': 75 / 100 * 20, 'f_G2': 92 / 100 * 20}
+        grades = [{'score': 75, 'max_marks': 100}, {'score': 92, 'max_marks': 100}]
+
+        assert report_features(student, grades) == build_feature_row(student, grades)
+
+    def test_falls_back_without_stored_row(self):
+        student = {'id': 'st9', 'age': 17, 'studytime': 0, 'failures': 2, 'absences': 5, 'f_age': None}
+        grades = [{'score': 12, 'max_marks': 20}]
+
+        assert report_features(student, grades) == build_feature_row(student, grades)
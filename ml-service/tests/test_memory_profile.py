@@ -0,0 +1,105 @@
+"""
+Unit tests for memory footprint reporting and the low-memory profile
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Change working directory to ml-service so .pkl files are found
+os.chdir(os.path.dirname(os.path.abspath(os.path.join(__file__, '..'))))
+
+import joblib
+import numpy as np
+import pytest
+import shap
+
+import predict_script
+from memory_profile import (LOW_MEMORY_BACKGROUND, LOW_MEMORY_BUDGET_MB, deep_size, memory_profile,
+                            memory_report, model_memory_budget_mb, shap_background)
+from scoring import FEATURE_NAMES
+
+STUDENT = {'age': 16, 'failures': 0, 'absences': 2, 'studytime': 2, 'G1': 12, 'G2': 13}
+
+
+@pytest.fixture(scope='module')
+def X_train():
+    return joblib.load('x_train.pkl')
+
+
+class TestProfile:
+
+    def test_default_is_standard(self, monkeypatch):
+        monkeypatch.delenv('MEMORY_PROFILE', raising=False)
+        assert memory_profile() == 'standard'
+
+    def test_unknown_profile_falls_back(self, monkeypatch):
+        monkeypatch.setenv('MEMORY_PROFILE', 'tiny')
+        assert memory_profile() == 'standard'
+
+    def test_low_profile_budget(self, monkeypatch):
+        monkeypatch.delenv('MODEL_MEMORY_BUDGET_MB', raising=False)
+        assert model_memory_budget_mb('low') == LOW_MEMORY_BUDGET_MB
+        assert model_memory_budget_mb('standard') == 512
+        monkeypatch.setenv('MODEL_MEMORY_BUDGET_MB', '64')
+        assert model_memory_budget_mb('low') == 64
+
+
+class TestBackground:
+
+    def test_standard_keeps_dataframe(self, X_train):
+        assert shap_background(X_train, 'standard') is X_train
+
+    def test_low_is_small_float32_array(self, X_train):
+        background = shap_background(X_train, 'low')
+
+        assert isinstance(background, np.ndarray)
+        assert background.dtype == np.float32
+        assert background.shape == (min(len(X_train), LOW_MEMORY_BACKGROUND), len(FEATURE_NAMES))
+        assert background.nbytes < X_train.memory_usage(deep=True).sum()
+        # Same sample in every worker
+        np.testing.assert_array_equal(background, shap_background(X_train, 'low'))
+
+    def test_low_background_explanations_stay_additive(self, X_train):
+        model = joblib.load('linear_regression_model.pkl')
+        explainer = shap.LinearExplainer(model, shap_background(X_train, 'low'))
+        row = X_train.iloc[:1]
+        values = explainer.shap_values(row)
+
+        assert values.shape == (1, len(FEATURE_NAMES))
+        assert explainer.expected_value + values.sum() == pytest.approx(model.predict(row)[0], abs=1e-4)
+
+
+class TestSizes:
+
+    def test_arrays_count_their_buffer(self):
+        assert deep_size(np.zeros(1000)) == 8000
+
+    def test_shared_objects_charged_once(self):
+        shared = np.zeros(1000)
+        report = memory_report({'first': {'a': shared}, 'second': {'b': [shared]}})
+
+        assert report['first']['items_kb']['a'] == pytest.approx(7.8, abs=0.1)
+        assert report['second']['items_kb']['b'] < 1
+
+    def test_tree_model_sized_like_its_pickle(self):
+        forest = joblib.load('random_forest_model.pkl')
+        pickled = os.path.getsize('random_forest_model.pkl')
+        assert 0.5 * pickled < deep_size(forest) < 2 * pickled
+
+
+class TestMemoryEndpoint:
+
+    def test_reports_every_component(self):
+        with predict_script.app.test_client() as client:
+            client.post('/predict', json={'student_data': STUDENT, 'max_marks': 100})
+            data = client.get('/memory').get_json()
+
+        assert data['success']
+        assert data['profile'] == predict_script.MEMORY_PROFILE
+        assert set(data['components']) == {'models', 'background', 'explainers', 'caches'}
+        assert 'serving/linear_regression' in data['components']['models']['items_kb']
+        assert 'explanation_cache' in data['components']['caches']['items_kb']
+        assert 'shap' in data['libraries']
+        if data['process']['rss_mb'] is not None:
+            assert data['process']['rss_mb'] > data['process']['accounted_mb']
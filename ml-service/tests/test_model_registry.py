@@ -0,0 +1,156 @@
+"""
+Unit tests for the multi-tenant model registry
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Change working directory to ml-service so .pkl files are found
+os.chdir(os.path.dirname(os.path.abspath(os.path.join(__file__, '..'))))
+
+import shutil
+import threading
+import time
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.dummy import DummyRegressor
+
+import model_registry
+import predict_script
+from model_registry import DEFAULT_TENANT, ModelRegistry
+
+STUDENT = {'age': 17, 'failures': 0, 'absences': 4, 'studytime': 2, 'G1': 12, 'G2': 13}
+
+
+def constant_model(scaled_grade):
+    return DummyRegressor(strategy='constant', constant=scaled_grade).fit(np.zeros((1, 6)), [scaled_grade])
+
+
+@pytest.fixture
+def tenants(tmp_path):
+    """Two tenants with a linear model each; school-b also has its own scaler"""
+    for tenant in ('school-a', 'school-b'):
+        (tmp_path / tenant).mkdir()
+        shutil.copy('linear_regression_model.pkl', tmp_path / tenant / 'linear_regression_model.pkl')
+    shutil.copy('grade_scaler.pkl', tmp_path / 'school-b' / 'grade_scaler.pkl')
+    return tmp_path
+
+
+class TestRegistry:
+
+    def test_hits_after_first_load(self, tenants):
+        registry = ModelRegistry(tenants_dir=str(tenants))
+        first = registry.get('school-a', 'linear_regression')
+        assert registry.get('school-a', 'linear_regression') is first
+        stats = registry.stats()['tenants']['school-a']
+        assert stats['loads'] == 1
+        assert stats['hits'] == 1
+        assert stats['resident'] == ['linear_regression']
+
+    def test_tenants_load_their_own_files(self, tenants):
+        registry = ModelRegistry(tenants_dir=str(tenants))
+        assert registry.get('school-a', 'linear_regression') is not registry.get('school-b', 'linear_regression')
+        assert registry.available('school-a') == ['linear_regression']
+        assert not registry.has('school-a', 'xgboost')
+        with pytest.raises(FileNotFoundError):
+            registry.get('school-a', 'xgboost')
+
+    def test_scaler_falls_back_to_default(self, tenants):
+        registry = ModelRegistry(tenants_dir=str(tenants))
+        assert registry.scaler('school-a') is registry.scaler(DEFAULT_TENANT)
+        assert registry.scaler('school-b') is not registry.scaler(DEFAULT_TENANT)
+        assert 'school-a' not in registry.stats()['tenants']
+
+    def test_invalid_tenant_id_rejected(self, tenants):
+        registry = ModelRegistry(tenants_dir=str(tenants))
+        with pytest.raises(ValueError):
+            registry.tenant_dir('../etc')
+
+    def test_lru_eviction_under_budget(self, tenants):
+        size = os.path.getsize('linear_regression_model.pkl')
+        evicted = []
+        # Room for exactly two models
+        registry = ModelRegistry(tenants_dir=str(tenants), memory_budget_mb=2.5 * size / 1024 / 1024,
+                                 on_evict=evicted.append)
+        registry.get('school-a', 'linear_regression')
+        registry.get('school-b', 'linear_regression')
+        registry.get('school-a', 'linear_regression')  # school-b is now least recently used
+        registry.get(DEFAULT_TENANT, 'linear_regression')
+
+        assert evicted == [('school-b', 'linear_regression')]
+        stats = registry.stats()
+        assert stats['models_loaded'] == 2
+        assert stats['memory_used_mb'] <= stats['memory_budget_mb']
+        assert stats['tenants']['school-b']['evictions'] == 1
+        assert stats['tenants']['school-b']['resident'] == []
+
+    def test_reloads_replaced_file(self, tenants):
+        registry = ModelRegistry(tenants_dir=str(tenants))
+        first = registry.get('school-a', 'linear_regression')
+        path = tenants / 'school-a' / 'linear_regression_model.pkl'
+        os.utime(path, (time.time() + 10, time.time() + 10))
+        assert registry.get('school-a', 'linear_regression') is not first
+        assert registry.stats()['tenants']['school-a']['loads'] == 2
+
+    def test_concurrent_requests_share_one_load(self, tenants, monkeypatch):
+        calls = []
+        load = joblib.load
+
+        def slow_load(path):
+            calls.append(path)
+            time.sleep(0.2)
+            return load(path)
+
+        monkeypatch.setattr(model_registry.joblib, 'load', slow_load)
+        registry = ModelRegistry(tenants_dir=str(tenants))
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(registry.get('school-a', 'linear_regression')))
+            for _ in range(8)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert len(calls) == 1
+        assert len(results) == 8
+        assert all(r is results[0] for r in results)
+
+
+class TestTenantEndpoints:
+
+    @pytest.fixture
+    def client(self, tmp_path, monkeypatch):
+        (tmp_path / 'school-a').mkdir()
+        # A constant well above the default model's prediction for STUDENT
+        joblib.dump(constant_model(3.0), tmp_path / 'school-a' / 'linear_regression_model.pkl')
+        registry = ModelRegistry(tenants_dir=str(tmp_path),
+                                 on_evict=lambda key: predict_script.model_explainers.pop(key, None))
+        monkeypatch.setattr(predict_script, 'registry', registry)
+        predict_script.app.config['TESTING'] = True
+        with predict_script.app.test_client() as client:
+            yield client
+
+    def test_tenant_header_selects_tenant_model(self, client):
+        body = dict(STUDENT, model='linear_regression')
+        default = client.post('/predict-with-model', json=body).get_json()
+        tenant = client.post('/predict-with-model', json=body, headers={'X-Tenant-ID': 'school-a'}).get_json()
+
+        assert default['success'] and tenant['success']
+        assert tenant['predicted_grade'] != default['predicted_grade']
+        stats = client.get('/model-registry').get_json()
+        assert stats['tenants']['school-a']['resident'] == ['linear_regression']
+
+    def test_unknown_tenant_model_is_404(self, client):
+        response = client.post('/predict-with-model', json=dict(STUDENT, model='xgboost'),
+                               headers={'X-Tenant-ID': 'school-a'})
+        assert response.status_code == 404
+
+    def test_malformed_tenant_is_400(self, client):
+        response = client.post('/predict-with-model', json=dict(STUDENT, model='linear_regression'),
+                               headers={'X-Tenant-ID': 'no/slashes'})
+        assert response.status_code == 400
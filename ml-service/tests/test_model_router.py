@@ -0,0 +1,53 @@
+"""
+Unit tests for latency-budget model routing
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+
+import pytest
+
+from model_router import ModelRouter
+
+
+@pytest.fixture
+def router(tmp_path):
+    metrics = {
+        'linear_regression': {'r2_score': 0.78, 'latency_ms': 0.5},
+        'random_forest': {'r2_score': 0.86, 'latency_ms': 20.0},
+        'xgboost': {'r2_score': 0.84, 'latency_ms': 2.0}
+    }
+    path = tmp_path / 'model_metrics.json'
+    path.write_text(json.dumps(metrics))
+    return ModelRouter(str(path))
+
+
+class TestModelRouter:
+
+    def test_most_accurate_model_within_budget(self, router):
+        assert router.choose(budget_ms=50)[0] == 'random_forest'
+        assert router.choose(budget_ms=5)[0] == 'xgboost'
+        assert router.choose(tier='best')[0] == 'random_forest'
+        assert router.choose(tier='fast')[0] == 'xgboost'
+
+    def test_nothing_fits_falls_back(self, router):
+        assert router.choose(budget_ms=0.1) == ('linear_regression', 'no_model_within_budget')
+
+    def test_only_available_models_are_considered(self, router):
+        assert router.choose(budget_ms=50, available=['linear_regression', 'xgboost'])[0] == 'xgboost'
+
+    def test_live_latency_moves_estimate(self, router):
+        for _ in range(20):
+            router.record('xgboost', 30.0)
+        assert router.latency_ms['xgboost'] > 25
+        assert router.choose(budget_ms=5)[0] == 'linear_regression'
+
+    def test_overload_routes_to_fallback(self, router):
+        overloaded = {'now': True}
+        router.overload_check = lambda: overloaded['now']
+        assert router.choose(tier='best') == ('linear_regression', 'overloaded')
+        overloaded['now'] = False
+        assert router.choose(tier='best')[0] == 'random_forest'
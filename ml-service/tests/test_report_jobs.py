@@ -0,0 +1,174 @@
+"""
+Unit tests for the asynchronous report job queue (rendering is faked)
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Change working directory to ml-service so .pkl files are found
+os.chdir(os.path.dirname(os.path.abspath(os.path.join(__file__, '..'))))
+
+import io
+import threading
+import time
+
+import pytest
+
+import predict_script
+from report_jobs import ReportJobs
+
+
+def wait_for(jobs, job_id, status, timeout=5):
+    deadline = time.time() + timeout
+    while jobs.status(job_id)['status'] != status:
+        assert time.time() < deadline, f'job never reached {status}'
+        time.sleep(0.01)
+
+
+def fake_render(student_id, progress):
+    if student_id == 'missing':
+        raise LookupError(f'Student {student_id} not found')
+    for stage in ('fetching', 'predicting', 'explaining', 'rendering'):
+        progress(stage)
+    return io.BytesIO(f'%PDF {student_id}'.encode())
+
+
+class TestReportJobs:
+
+    def test_finished_pdf_is_stored(self, tmp_path):
+        jobs = ReportJobs(fake_render, report_dir=str(tmp_path))
+        job, created = jobs.submit('st1')
+        assert created
+        wait_for(jobs, job['job_id'], 'done')
+
+        assert jobs.status(job['job_id'])['progress'] == 100
+        with open(jobs.path(job['job_id']), 'rb') as f:
+            assert f.read() == b'%PDF st1'
+
+    def test_unknown_student_fails(self, tmp_path):
+        jobs = ReportJobs(fake_render, report_dir=str(tmp_path))
+        job, _ = jobs.submit('missing')
+        wait_for(jobs, job['job_id'], 'failed')
+        assert 'not found' in jobs.status(job['job_id'])['error']
+
+    def test_duplicate_submit_reuses_active_job(self, tmp_path):
+        release = threading.Event()
+        jobs = ReportJobs(lambda s, p: release.wait() and io.BytesIO(b'%PDF'),
+                          max_workers=1, max_queued=2, report_dir=str(tmp_path))
+
+        first, _ = jobs.submit('st1')
+        again, created = jobs.submit('st1')
+        assert again['job_id'] == first['job_id'] and not created
+
+        jobs.submit('st2')
+        assert jobs.submit('st3') == (None, False)
+        release.set()
+
+    def test_expired_jobs_are_removed(self, tmp_path):
+        jobs = ReportJobs(fake_render, ttl=0.5, report_dir=str(tmp_path))
+        job, _ = jobs.submit('st1')
+        wait_for(jobs, job['job_id'], 'done')
+
+        time.sleep(0.6)
+        assert jobs.status(job['job_id']) is None
+        jobs.sweep()
+        assert os.listdir(tmp_path) == []
+
+    def test_dead_workers_jobs_are_failed(self, tmp_path):
+        release = threading.Event()
+        dead = ReportJobs(lambda s, p: release.wait() and io.BytesIO(b'%PDF'),
+                          max_workers=1, max_queued=1, stale_after=0.5, report_dir=str(tmp_path))
+        job, _ = dead.submit('st1')
+        # The worker process dies: its heartbeat stops refreshing the record
+        dead._active.clear()
+
+        alive = ReportJobs(fake_render, max_queued=1, stale_after=0.5, report_dir=str(tmp_path))
+        assert alive.submit('st2') == (None, False)
+        time.sleep(0.6)
+
+        assert alive.status(job['job_id'])['status'] == 'failed'
+        assert 'resubmit' in alive.status(job['job_id'])['error']
+        assert alive.queue_depth() == {'queued': 0, 'running': 0}
+        retry, created = alive.submit('st1')
+        assert created and retry['job_id'] != job['job_id']
+        wait_for(alive, retry['job_id'], 'done')
+        release.set()
+
+    def test_heartbeat_keeps_slow_jobs_alive(self, tmp_path):
+        release = threading.Event()
+        jobs = ReportJobs(lambda s, p: release.wait() and io.BytesIO(b'%PDF'),
+                          max_workers=1, stale_after=0.4, report_dir=str(tmp_path))
+        job, _ = jobs.submit('st1')
+        time.sleep(0.8)
+
+        other = ReportJobs(fake_render, stale_after=0.4, report_dir=str(tmp_path))
+        assert other.status(job['job_id'])['status'] == 'running'
+        release.set()
+        wait_for(jobs, job['job_id'], 'done')
+
+    def test_other_worker_sees_job(self, tmp_path):
+        renderer = ReportJobs(fake_render, report_dir=str(tmp_path))
+        job, _ = renderer.submit('st1')
+        wait_for(renderer, job['job_id'], 'done')
+
+        # A worker started later shares the directory without wiping it
+        other = ReportJobs(fake_render, report_dir=str(tmp_path))
+        assert other.status(job['job_id'])['status'] == 'done'
+        with open(other.path(job['job_id']), 'rb') as f:
+            assert f.read() == b'%PDF st1'
+        assert other.queue_depth() == {'queued': 0, 'running': 0}
+
+    def test_other_worker_reuses_active_job(self, tmp_path):
+        release = threading.Event()
+        renderer = ReportJobs(lambda s, p: release.wait() and io.BytesIO(b'%PDF'),
+                              max_workers=1, report_dir=str(tmp_path))
+        first, _ = renderer.submit('st1')
+
+        other = ReportJobs(fake_render, report_dir=str(tmp_path))
+        again, created = other.submit('st1')
+        assert again['job_id'] == first['job_id'] and not created
+        release.set()
+        wait_for(other, first['job_id'], 'done')
+
+    def test_only_files_past_ttl_are_swept(self, tmp_path):
+        stale = tmp_path / ('a' * 32 + '.pdf')
+        fresh = tmp_path / ('b' * 32 + '.pdf')
+        stale.write_bytes(b'%PDF')
+        fresh.write_bytes(b'%PDF')
+        os.utime(stale, (time.time() - 7200, time.time() - 7200))
+
+        ReportJobs(fake_render, ttl=3600, report_dir=str(tmp_path))
+        assert os.listdir(tmp_path) == [fresh.name]
+
+    def test_malformed_job_id(self, tmp_path):
+        jobs = ReportJobs(fake_render, report_dir=str(tmp_path))
+        assert jobs.status('../reports') is None
+
+
+class TestReportEndpoints:
+
+    @pytest.fixture
+    def client(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(predict_script, 'report_jobs', ReportJobs(fake_render, report_dir=str(tmp_path)))
+        return predict_script.app.test_client()
+
+    def test_submit_poll_download(self, client):
+        response = client.post('/reports', json={'student_id': 'st1'})
+        assert response.status_code == 202
+        job_id = response.get_json()['job_id']
+
+        wait_for(predict_script.report_jobs, job_id, 'done')
+        assert client.get(f'/reports/{job_id}').get_json()['status'] == 'done'
+
+        download = client.get(f'/reports/{job_id}/download')
+        assert download.status_code == 200
+        assert download.mimetype == 'application/pdf'
+        assert download.data == b'%PDF st1'
+
+    def test_missing_student_id(self, client):
+        assert client.post('/reports', json={}).status_code == 400
+
+    def test_unknown_job(self, client):
+        assert client.get('/reports/nope').status_code == 404
+        assert client.get('/reports/nope/download').status_code == 404
@@ -0,0 +1,124 @@
+"""
+Unit tests for lean prediction responses and the fast JSON provider
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Change working directory to ml-service so .pkl files are found
+os.chdir(os.path.dirname(os.path.abspath(os.path.join(__file__, '..'))))
+
+import datetime
+import json
+from decimal import Decimal
+
+import numpy as np
+import pytest
+from flask.json.provider import DefaultJSONProvider
+
+import predict_script
+from responses import compact, response_options, shape_response
+
+STUDENT = {'age': 16, 'failures': 0, 'absences': 2, 'studytime': 2, 'G1': 12, 'G2': 13}
+
+
+@pytest.fixture
+def client():
+    return predict_script.app.test_client()
+
+
+class TestResponseOptions:
+
+    def test_defaults_keep_full_response(self):
+        assert response_options({}, {}) == {'explain': True, 'fields': None, 'compact': False}
+
+    def test_body_wins_over_query_string(self):
+        options = response_options({'explain': False}, {'explain': 'true', 'format': 'compact'})
+        assert options['explain'] is False
+        assert options['compact'] is True
+
+    def test_fields_without_explanation_skip_it(self):
+        options = response_options({}, {'fields': 'predicted_grade, risk_level'})
+        assert options['fields'] == {'predicted_grade', 'risk_level'}
+        assert options['explain'] is False
+
+    @pytest.mark.parametrize('data', [{'explain': 'maybe'}, {'fields': 3}, {'format': 'xml'}])
+    def test_malformed_options(self, data):
+        with pytest.raises(ValueError):
+            response_options(data, {})
+
+    def test_compact_turns_strings_into_numbers(self):
+        result = compact({
+            'success': True, 'predicted_grade': '72.50', 'risk_level': 'Medium',
+            'interval': {'coverage': 0.9, 'lower': '60.00', 'upper': '80.25'},
+            'explanation': {'summary': 'x', 'top_factors': [{'factor': 'G2', 'contribution_percentage': '+12.5%'}]}
+        })
+        assert result['predicted_grade'] == 72.5
+        assert result['interval'] == {'coverage': 0.9, 'lower': 60.0, 'upper': 80.25}
+        assert result['explanation']['top_factors'][0]['contribution_percentage'] == 12.5
+
+    def test_fields_keep_success(self):
+        options = {'explain': False, 'fields': {'risk_level'}, 'compact': False}
+        assert shape_response({'success': True, 'predicted_grade': '1.00', 'risk_level': 'High'},
+                              options) == {'success': True, 'risk_level': 'High'}
+
+
+class TestJSONProvider:
+
+    def test_same_output_as_flask_default(self):
+        default = DefaultJSONProvider(predict_script.app)
+        obj = {'b': 1, 'a': [1.5, 'x', None], 'when': datetime.datetime(2025, 1, 6, 8, 30),
+               'day': datetime.date(2025, 1, 6), 'amount': Decimal('1.25')}
+        assert json.loads(predict_script.app.json.dumps(obj)) == json.loads(default.dumps(obj))
+        assert predict_script.app.json.dumps({'b': 1, 'a': 2}) == '{"a":2,"b":1}'
+
+    def test_numpy_values(self):
+        encoded = predict_script.app.json.dumps({'grade': np.float64(12.5), 'count': np.int64(3)})
+        assert json.loads(encoded) == {'grade': 12.5, 'count': 3}
+
+
+class TestLeanEndpoints:
+
+    def test_explain_false_skips_shap(self, client, monkeypatch):
+        def no_shap(*args):
+            raise AssertionError('explanation computed')
+        monkeypatch.setattr(predict_script, 'calculate_shap_explanation', no_shap)
+
+        data = client.post('/predict', json={'student_data': STUDENT, 'max_marks': 100,
+                                             'explain': False}).get_json()
+        assert data['success']
+        assert 'explanation' not in data
+
+    def test_compact_grade_and_risk_only(self, client):
+        full = client.post('/predict', json={'student_data': STUDENT, 'max_marks': 100}).get_json()
+        lean = client.post('/predict?fields=predicted_grade,risk_level&format=compact',
+                           json={'student_data': STUDENT, 'max_marks': 100}).get_json()
+
+        assert lean == {'success': True, 'predicted_grade': float(full['predicted_grade']),
+                        'risk_level': full['risk_level']}
+
+    def test_predict_with_model_explain_false(self, client, monkeypatch):
+        submitted = []
+        monkeypatch.setattr(predict_script.explanation_jobs, 'submit', lambda *args: submitted.append(args))
+        data = client.post('/predict-with-model', json={'student_data': STUDENT, 'max_marks': 100,
+                                                        'model': 'xgboost', 'explain': False}).get_json()
+
+        assert data['success'] and data['model_used'] == 'xgboost'
+        assert 'explanation' not in data and 'explanation_token' not in data
+        assert submitted == []
+
+    def test_bad_option_is_400(self, client):
+        response = client.post('/predict-with-model', json={'student_data': STUDENT, 'max_marks': 100,
+                                                            'format': 'xml'})
+        assert response.status_code == 400
+
+    def test_compact_stream(self, client):
+        body = json.dumps(dict(STUDENT, id='st1'))
+        response = client.post('/predict-stream?format=compact', data=body,
+                               content_type='application/x-ndjson')
+        line = json.loads(response.data.decode().splitlines()[0])
+
+        single = predict_script.predict(STUDENT, 100)
+        assert line['predicted_grade'] == pytest.approx(float(single['predicted_grade']), abs=0.005)
+        assert isinstance(line['predicted_grade'], float)
@@ -0,0 +1,83 @@
+"""
+Unit tests for feature building and incremental retraining helpers
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Change working directory to ml-service so .pkl files are found
+os.chdir(os.path.dirname(os.path.abspath(os.path.join(__file__, '..'))))
+
+from datetime import date
+
+import joblib
+
+from scoring import build_feature_row
+from retrain_from_db import RecentWindow, labelled_rows, in_holdout, load_base_training_set, bump_version
+
+
+STUDENT = {'id': 'st1', 'age': 17, 'studytime': 3, 'failures': 1, 'absences': 4}
+
+
+class TestFeatureRows:
+    """Test feature derivation from the grades table"""
+
+    def test_recent_grades_become_g1_g2_on_20_scale(self):
+        grades = [
+            {'score': 80, 'max_marks': 100},
+            {'score': 15, 'max_marks': 20}
+        ]
+        row = build_feature_row(STUDENT, grades)
+        assert row['G1'] == 16.0
+        assert row['G2'] == 15.0
+        assert row['age'] == 17
+
+    def test_missing_history_uses_defaults(self):
+        row = build_feature_row({'age': None}, [])
+        assert row == {'age': 16, 'failures': 0, 'absences': 0, 'studytime': 2, 'G1': 10, 'G2': 10}
+
+
+class TestRetrainHelpers:
+    """Test the streaming retrain building blocks"""
+
+    def test_each_grade_with_two_predecessors_is_a_label(self):
+        grades = [{'score': s, 'max_marks': 20} for s in [14, 12, 11, 9]]
+        rows = list(labelled_rows(STUDENT, grades))
+
+        assert len(rows) == 2
+        features, g3 = rows[0]
+        assert g3 == 14.0
+        assert (features['G1'], features['G2']) == (12.0, 11.0)
+
+    def test_holdout_assignment_is_stable(self):
+        assert in_holdout('st42') == in_holdout('st42')
+        assert 5 < sum(in_holdout(f'st{i}') for i in range(100)) < 40
+
+    def test_base_training_set_matches_x_train(self):
+        grade_scaler = joblib.load('grade_scaler.pkl')
+        X_base, y_base = load_base_training_set(grade_scaler)
+        assert X_base.shape == joblib.load('x_train.pkl').shape
+        assert len(y_base) == len(X_base)
+
+    def test_version_bump(self):
+        assert bump_version('v1.0') == 'v1.1'
+        assert bump_version('v2.9') == 'v2.10'
+
+    def test_window_keeps_most_recent_rows_by_date(self):
+        window = RecentWindow(3)
+        # Streamed per student, so dates arrive out of order
+        for day, row in [(5, 'a'), (1, 'b'), (9, 'c'), (3, 'd'), (7, 'e'), (9, 'f')]:
+            window.add(date(2025, 1, day), row)
+
+        assert len(window) == 3
+        assert window.rows() == ['e', 'c', 'f']
+
+    def test_labels_are_dated_by_their_grade(self):
+        grades = [{'score': s, 'max_marks': 20, 'date': date(2025, 1, d)}
+                  for s, d in [(14, 4), (12, 3), (11, 2), (9, 1)]]
+        window = RecentWindow(10)
+        for grade, row in zip(grades, labelled_rows(STUDENT, grades)):
+            window.add(grade['date'], row)
+
+        assert [g3 for _, g3 in window.rows()] == [12.0, 14.0]
@@ -0,0 +1,126 @@
+"""
+Unit tests for the roster scoring job (database access is faked)
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Change working directory to ml-service so .pkl files are found
+os.chdir(os.path.dirname(os.path.abspath(os.path.join(__file__, '..'))))
+
+import joblib
+
+from score_roster import fetch_feature_rows, score_students
+from predict_script import predict
+
+
+class FakeCursor:
+    """Returns canned ROSTER_QUERY rows and records the executed SQL"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.executed = []
+
+    def execute(self, sql, params=None):
+        self.executed.append((sql, params))
+
+    def fetchall(self):
+        return self.rows
+
+
+def roster_row(student_id, score=None, max_marks=None):
+    return {'id': student_id, 'age': 16, 'studytime': 2, 'failures': 0, 'absences': 3,
+            'score': score, 'max_marks': max_marks}
+
+
+class TestScoreRoster:
+
+    def test_feature_rows_grouped_per_student(self):
+        cursor = FakeCursor([
+            roster_row('st1', 80, 100), roster_row('st1', 70, 100),
+            roster_row('st2')
+        ])
+        ids, features = fetch_feature_rows(cursor)
+
+        assert ids == ['st1', 'st2']
+        assert list(features.loc[0, ['G1', 'G2']]) == [16.0, 14.0]
+        assert list(features.loc[1, ['G1', 'G2']]) == [10.0, 10.0]
+
+    def test_student_filter_uses_placeholders(self):
+        cursor = FakeCursor([])
+        fetch_feature_rows(cursor, ['st1', 'st2'])
+        sql, params = cursor.executed[0]
+        assert 'WHERE s.id IN (%s, %s)' in sql
+        assert params == ('st1', 'st2')
+
+    def test_vectorized_scores_match_predict(self):
+        cursor = FakeCursor([roster_row('st1', 15, 20), roster_row('st1', 14, 20)])
+        _, features = fetch_feature_rows(cursor)
+        _, grades, levels = score_students(joblib.load('linear_regression_model.pkl'),
+                                        joblib.load('grade_scaler.pkl'), features)
+
+        single = predict(features.iloc[0].to_dict(), 100)
+        assert f"{grades[0]:.2f}" == single['predicted_grade']
+        assert levels[0] == single['risk_level']
+
+
+class TestScoreChanged:
+    """Dirty-tracking pass over the student_changes log"""
+
+    def test_only_changed_students_rescored_and_watermark_advances(self, tmp_path, monkeypatch):
+        import score_roster
+
+        monkeypatch.setattr(score_roster, 'STATE_FILE', str(tmp_path / 'state.json'))
+        seen = {}
+        monkeypatch.setattr(score_roster, 'changed_students',
+                            lambda since: {} if since else {'st2': 7, 'st1': 4})
+
+        def fake_score_roster(model_name, student_ids, batch_size, explain, on_scored):
+            seen['ids'] = student_ids
+            return {'scored': len(student_ids)}
+        monkeypatch.setattr(score_roster, 'score_roster', fake_score_roster)
+
+        summary = score_roster.score_changed()
+        assert seen['ids'] == ['st1', 'st2']
+        assert summary['students'] == ['st1', 'st2']
+        assert score_roster.load_state() == {'linear_regression': 7}
+
+        # Nothing new since the watermark
+        assert score_roster.score_changed()['scored'] == 0
+
+    def test_each_model_keeps_its_own_watermark(self, tmp_path, monkeypatch):
+        import score_roster
+
+        monkeypatch.setattr(score_roster, 'STATE_FILE', str(tmp_path / 'state.json'))
+        monkeypatch.setattr(score_roster, 'changed_students',
+                            lambda since: {'st1': 4} if since < 4 else {})
+        monkeypatch.setattr(score_roster, 'score_roster',
+                            lambda model_name, student_ids, *args: {'scored': len(student_ids)})
+
+        assert score_roster.score_changed('linear_regression')['scored'] == 1
+        # The linear pass must not hide the change from the other models
+        assert score_roster.score_changed('xgboost')['scored'] == 1
+        assert score_roster.score_changed('xgboost')['scored'] == 0
+        assert score_roster.load_state() == {'linear_regression': 4, 'xgboost': 4}
+
+    def test_shared_legacy_watermark_is_rescanned(self, tmp_path, monkeypatch):
+        import score_roster
+
+        state_file = tmp_path / 'state.json'
+        state_file.write_text('{"last_change_id": 9}')
+        monkeypatch.setattr(score_roster, 'STATE_FILE', str(state_file))
+        assert score_roster.load_state() == {}
+
+    def test_batch_explanations_match_single(self):
+        from predict_script import explain_batch, calculate_shap_explanation
+
+        cursor = FakeCursor([roster_row('st1', 15, 20), roster_row('st1', 9, 20),
+                             roster_row('st2', 6, 20)])
+        _, features = fetch_feature_rows(cursor)
+        final_grades, _, levels = score_students(joblib.load('linear_regression_model.pkl'),
+                                                 joblib.load('grade_scaler.pkl'), features)
+
+        batch = explain_batch(features, final_grades, levels)
+        single = calculate_shap_explanation(features.iloc[[1]], final_grades[1], levels[1])
+        assert batch[1] == single
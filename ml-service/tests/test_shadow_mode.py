@@ -0,0 +1,150 @@
+"""
+Unit tests for shadow evaluation of candidate models
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Change working directory to ml-service so .pkl files are found
+os.chdir(os.path.dirname(os.path.abspath(os.path.join(__file__, '..'))))
+
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.dummy import DummyRegressor
+
+import predict_script
+from scoring import FEATURE_NAMES
+from shadow_mode import ShadowEvaluator, ModelShadowStats, load_candidate_info, stage_candidate
+
+STUDENT = {'age': 17, 'failures': 0, 'absences': 4, 'studytime': 2, 'G1': 12, 'G2': 13}
+
+
+class IdentityScaler:
+    """Scaled output is already a 0-20 grade"""
+
+    def inverse_transform(self, X):
+        return X
+
+
+def constant_model(grade):
+    return DummyRegressor(strategy='constant', constant=grade).fit(np.zeros((1, 6)), [grade])
+
+
+def rows(n=1):
+    return pd.DataFrame([STUDENT] * n, columns=FEATURE_NAMES)
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, 'shadow worker did not finish'
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def candidates(tmp_path):
+    stage_candidate('linear_regression', constant_model(12.0),
+                    {'mae': 1.5, 'r2': 0.8, 'serving_mae': 1.7}, candidate_dir=str(tmp_path))
+    return tmp_path
+
+
+class TestShadowStats:
+
+    def test_agreement_deltas_and_flips(self):
+        stats = ModelShadowStats()
+        # Served grades vs candidate 12.0: Medium agrees, High and Low flip
+        stats.add(np.array([11.0, 9.0, 15.0]), np.array([12.0, 12.0, 12.0]), latency_ms=0.5)
+        summary = stats.summary()
+
+        assert summary['compared'] == 3
+        assert summary['agreement_rate'] == pytest.approx(1 / 3, abs=1e-4)
+        assert summary['risk_flips'] == {'High->Medium': 1, 'Low->Medium': 1}
+        assert summary['mean_delta'] == pytest.approx(1.0 / 3, abs=1e-4)
+        assert summary['max_abs_delta'] == 3.0
+        assert summary['candidate_latency_ms']['mean'] == 0.5
+
+    def test_empty_summary(self):
+        assert ModelShadowStats().summary() == {'compared': 0}
+
+
+class TestShadowEvaluator:
+
+    def test_staging_records_holdout_metrics(self, candidates):
+        info = load_candidate_info(str(candidates))
+        assert info['linear_regression']['holdout_mae'] == 1.5
+        assert os.path.exists(candidates / 'linear_regression_model.pkl')
+
+    def test_sampled_predictions_scored_in_background(self, candidates):
+        shadow = ShadowEvaluator(IdentityScaler(), candidate_dir=str(candidates), sample_rate=1.0)
+        for served in (11.0, 9.0):
+            assert shadow.submit('linear_regression', rows(), [served])
+
+        wait_for(lambda: shadow.stats()['candidates']['linear_regression']['compared'] == 2)
+        stats = shadow.stats()
+        assert stats['sampled'] == 2
+        assert stats['candidates']['linear_regression']['risk_flips'] == {'High->Medium': 1}
+        assert stats['candidates']['linear_regression']['holdout_r2'] == 0.8
+
+    def test_models_without_candidate_not_sampled(self, candidates):
+        shadow = ShadowEvaluator(IdentityScaler(), candidate_dir=str(candidates), sample_rate=1.0)
+        assert not shadow.submit('xgboost', rows(), [11.0])
+        assert shadow.stats()['sampled'] == 0
+
+    def test_zero_sample_rate_skips_everything(self, candidates):
+        shadow = ShadowEvaluator(IdentityScaler(), candidate_dir=str(candidates), sample_rate=0)
+        assert not shadow.submit('linear_regression', rows(), [11.0])
+
+    def test_full_queue_drops_without_blocking(self, candidates):
+        shadow = ShadowEvaluator(IdentityScaler(), candidate_dir=str(candidates), sample_rate=1.0,
+                                 capacity=2)
+        # Keep the worker from draining the queue during the test
+        shadow._thread = 'stopped'
+        start = time.perf_counter()
+        accepted = [shadow.submit('linear_regression', rows(), [11.0]) for _ in range(50)]
+        elapsed = time.perf_counter() - start
+
+        assert accepted.count(True) == 2
+        assert shadow.stats()['dropped'] == 48
+        assert shadow.stats()['queue_depth'] == 2
+        assert elapsed < 1.0
+
+    def test_drain_batches_per_model(self, candidates):
+        shadow = ShadowEvaluator(IdentityScaler(), candidate_dir=str(candidates), sample_rate=1.0)
+        shadow._thread = 'stopped'
+        for _ in range(3):
+            shadow.submit('linear_regression', rows(2), [12.0, 12.5])
+
+        assert shadow.drain() == 3
+        summary = shadow.stats()['candidates']['linear_regression']
+        assert summary['compared'] == 6
+        assert summary['agreement_rate'] == 1.0
+
+    def test_candidate_errors_are_counted(self, candidates):
+        joblib.dump('not a model', candidates / 'linear_regression_model.pkl')
+        shadow = ShadowEvaluator(IdentityScaler(), candidate_dir=str(candidates), sample_rate=1.0)
+        shadow._thread = 'stopped'
+        shadow.submit('linear_regression', rows(), [12.0])
+
+        shadow.drain()
+        assert shadow.stats()['errors'] == 1
+
+
+class TestShadowEndpoint:
+
+    def test_live_prediction_reaches_candidate(self, candidates, monkeypatch):
+        shadow = ShadowEvaluator(predict_script.grade_scaler, candidate_dir=str(candidates), sample_rate=1.0)
+        monkeypatch.setattr(predict_script, 'shadow', shadow)
+        predict_script.app.config['TESTING'] = True
+        with predict_script.app.test_client() as client:
+            response = client.post('/predict', json={'student_data': STUDENT, 'max_marks': 100})
+            assert response.status_code == 200
+
+            wait_for(lambda: client.get('/shadow').get_json()['candidates']['linear_regression']['compared'] == 1)
+            stats = client.get('/shadow').get_json()
+        assert stats['success']
+        assert stats['sampled'] == 1
@@ -7,12 +7,30 @@ import numpy as np
 import pandas as pd
 import joblib
 import json
+import time
 from sklearn.linear_model import LinearRegression
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import MinMaxScaler
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 from xgboost import XGBRegressor
+from feature_importance import compute_importance, save_importance, IMPORTANCE_FILE
+from drift_monitor import build_reference, save_reference, REFERENCE_FILE
+from calibration import calibrate, save_calibration, CALIBRATION_FILE
+
+def measure_latency(model, X, repeats=50):
+    """
+    Median single-row predict() latency in milliseconds
+    Seeds the latency-budget router (model_router.py).
+    """
+    row = X.iloc[[0]]
+    model.predict(row)
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict(row)
+        timings.append((time.perf_counter() - start) * 1000)
+    return round(float(np.median(timings)), 3)
 
 def train_all_models(dataset_path='student-mat.csv'):
     """
@@ -111,14 +129,16 @@ def train_all_models(dataset_path='student-mat.csv'):
             'r2_score': round(float(test_r2), 4),
             'mae': round(float(test_mae), 4),
             'rmse': round(float(test_rmse), 4),
-            'train_r2': round(float(train_r2), 4)
+            'train_r2': round(float(train_r2), 4),
+            'latency_ms': measure_latency(model, X_test)
         }
         
         # Save model
         model_filename = f'{model_id}_model.pkl'
         joblib.dump(model, model_filename)
         
-        print(f"   Trained | R2 (test): {test_r2:.4f} | MAE: {test_mae:.4f}")
+        print(f"   Trained | R2 (test): {test_r2:.4f} | MAE: {test_mae:.4f} | "
+              f"Latency: {metrics[model_id]['latency_ms']:.2f} ms")
         print(f"   Saved: {model_filename}")
     
     # Save grade scaler (same for all models)
@@ -134,6 +154,25 @@ def train_all_models(dataset_path='student-mat.csv'):
     
     print("   Metrics saved: model_metrics.json")
     
+    # Global SHAP importance, computed once here instead of per request
+    print("\n6. Computing global feature importance...")
+    trained = {model_id: model_info['model'] for model_id, model_info in models.items()}
+    save_importance(compute_importance(trained, X_train))
+    print(f"   Importance saved: {IMPORTANCE_FILE}")
+    
+    # Reference histograms for the live drift monitor
+    print("\n7. Saving drift reference...")
+    save_reference(build_reference(X_train))
+    print(f"   Reference saved: {REFERENCE_FILE}")
+    
+    # Conformal residuals on the test split for prediction intervals
+    print("\n8. Calibrating prediction intervals...")
+    save_calibration({
+        model_id: calibrate(model_id, model_info['model'], X_test, y_test, grade_scaler, X_spread=X)
+        for model_id, model_info in models.items()
+    })
+    print(f"   Calibration saved: {CALIBRATION_FILE}")
+    
     # Display summary
     print("\n" + "="*60)
     print("TRAINING SUMMARY")
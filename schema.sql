@@ -8,6 +8,11 @@
 -- ============================================
 
 -- Drop existing tables (in correct order due to foreign keys)
+DROP TABLE IF EXISTS class_weekly_stats;
+DROP TABLE IF EXISTS student_weekly_stats;
+DROP TABLE IF EXISTS student_features;
+DROP TABLE IF EXISTS prediction_audit;
+DROP TABLE IF EXISTS student_changes;
 DROP TABLE IF EXISTS predictions;
 DROP TABLE IF EXISTS grades;
 DROP TABLE IF EXISTS students;
@@ -85,7 +90,8 @@ CREATE TABLE grades (
     INDEX idx_grades_student_id (student_id),
     INDEX idx_grades_subject (subject),
     INDEX idx_grades_date (date),
-    INDEX idx_grades_student_subject (student_id, subject)
+    INDEX idx_grades_student_subject (student_id, subject),
+    INDEX idx_grades_student_date (student_id, date)  -- latest grades per student
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- ============================================
@@ -115,6 +121,98 @@ CREATE TABLE predictions (
     CONSTRAINT uq_predictions_student_date UNIQUE (student_id, created_at)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
+-- ============================================
+-- PREDICTION AUDIT TABLE
+-- ============================================
+-- Every prediction served by the ML service: tenant, inputs, model version,
+-- result, latency and top SHAP factors. Written in batches by a background thread
+-- (ml-service/audit_log.py). No foreign key: ad-hoc predictions have no
+-- student id.
+CREATE TABLE prediction_audit (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    served_at DATETIME(3) NOT NULL,
+    endpoint VARCHAR(40) NOT NULL,
+    tenant VARCHAR(64) NOT NULL DEFAULT 'default',
+    student_id VARCHAR(36) DEFAULT NULL,
+    model_name VARCHAR(50) NOT NULL,
+    model_version VARCHAR(50) NOT NULL,
+    inputs JSON NOT NULL,
+    predicted_grade DECIMAL(6,2) NOT NULL,
+    risk_level ENUM('Low', 'Medium', 'High') NOT NULL,
+    latency_ms DECIMAL(10,3) NOT NULL,
+    top_factors JSON NOT NULL,
+    
+    -- Indexes
+    INDEX idx_prediction_audit_served_at (served_at),
+    INDEX idx_prediction_audit_student_id (student_id),
+    INDEX idx_prediction_audit_tenant (tenant, served_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- ============================================
+-- STUDENT CHANGES TABLE
+-- ============================================
+-- Append-only log of students whose grades or profile changed.
+-- Written by the grade/student API routes; the ML service re-scores only
+-- students logged after its last pass (score_roster.py --changed-only).
+-- No foreign key, so deletions are logged too.
+CREATE TABLE student_changes (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    student_id VARCHAR(36) NOT NULL,
+    source ENUM('grades', 'students') NOT NULL,
+    changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    
+    -- Indexes
+    INDEX idx_student_changes_student_id (student_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- ============================================
+-- STUDENT FEATURES TABLE
+-- ============================================
+-- Materialized six-feature model input per student: profile fields with
+-- defaults applied, and G1/G2 = the two most recent grades on the 0-20
+-- scale. Refreshed after every grade/student write
+-- (app/lib/studentFeatures.ts) and rebuilt by ml-service/feature_store.py.
+CREATE TABLE student_features (
+    student_id VARCHAR(36) PRIMARY KEY,
+    age INT NOT NULL,
+    failures INT NOT NULL,
+    absences INT NOT NULL,
+    studytime INT NOT NULL,
+    g1 DOUBLE NOT NULL,
+    g2 DOUBLE NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    
+    CONSTRAINT fk_student_features_student FOREIGN KEY (student_id) 
+        REFERENCES students(id) ON DELETE CASCADE ON UPDATE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- ============================================
+-- WEEKLY STATS TABLES
+-- ============================================
+-- Incrementally maintained weekly buckets (week_start = Monday).
+-- Each grade or attendance event updates one student bucket and one class
+-- bucket (app/lib/weeklyStats.ts). Grades are stored on the 0-20 scale.
+CREATE TABLE student_weekly_stats (
+    student_id VARCHAR(36) NOT NULL,
+    week_start DATE NOT NULL,
+    absences INT NOT NULL DEFAULT 0,
+    grade_count INT NOT NULL DEFAULT 0,
+    grade_sum DECIMAL(8,2) NOT NULL DEFAULT 0,
+    last_grade DECIMAL(5,2) DEFAULT NULL,   -- latest grade recorded that week
+    prev_grade DECIMAL(5,2) DEFAULT NULL,   -- the grade before it, same week
+    
+    PRIMARY KEY (student_id, week_start),
+    CONSTRAINT fk_weekly_stats_student FOREIGN KEY (student_id) 
+        REFERENCES students(id) ON DELETE CASCADE ON UPDATE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE TABLE class_weekly_stats (
+    week_start DATE PRIMARY KEY,
+    absences INT NOT NULL DEFAULT 0,
+    grade_count INT NOT NULL DEFAULT 0,
+    grade_sum DECIMAL(10,2) NOT NULL DEFAULT 0
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
 -- ============================================
 -- VIEWS (Optional - for convenient queries)
 -- ============================================
@@ -193,6 +291,12 @@ INSERT INTO grades (student_id, subject, score, max_marks, grade, date) VALUES
 ('st3', 'Math', 95, 100, 'A+', '2024-01-15'),
 ('st3', 'English', 89, 100, 'B+', '2024-01-16');
 
+-- Feature rows for the sample students (G1/G2 = two latest grades, 0-20 scale)
+INSERT INTO student_features (student_id, age, failures, absences, studytime, g1, g2) VALUES
+('st1', 16, 0, 1, 15, 15.0, 18.4),
+('st2', 15, 1, 4, 12, 14.4, 13.0),
+('st3', 16, 0, 0, 18, 17.8, 19.0);
+
 -- Insert sample predictions
 INSERT INTO predictions (student_id, predicted_grade, risk_level, confidence) VALUES
 ('st1', 85.50, 'Low', 85.0),